@@ -0,0 +1,44 @@
+import pytest
+
+from trip_planner.analytics import UNASSIGNED, cost_summary, line_cities
+from trip_planner.currency import RateTable
+from trip_planner.itinerary import CostLink, Event, ItineraryDay, Location
+from trip_planner.ledger import CostLedger
+from trip_planner.pricing import Party
+
+RATES = RateTable('test', {'GBP': 1.0})
+LONDON = Location('London', 51.5074, -0.1278)
+YORK = Location('York', 53.9600, -1.0873)
+EDINBURGH = Location('Edinburgh', 55.9533, -3.1883)
+
+ITINERARY = (
+    ItineraryDay(1, '', 'London', '', events=(
+        Event("09:00", "Museum", LONDON, CostLink('Day 1 - London', 'Museum')),)),
+    ItineraryDay(2, '', 'North', '', events=(
+        Event("09:00", "Train", LONDON, CostLink('Day 2 - North', 'Train')),
+        Event("14:00", "Minster", YORK),
+        Event("18:00", "Castle", EDINBURGH, CostLink('Day 2 - North', 'Castle')))),
+)
+
+
+def test_days_match_the_itinerary_by_label_not_position():
+    # The trip's days come in another order, and one of them isn't on the itinerary
+    day_city, linked = line_cities(['Day 2 - North', 'Day 0 - Arrival', 'Day 1 - London'], ITINERARY)
+    assert day_city == {'Day 2 - North': 'Edinburgh', 'Day 1 - London': 'London'}
+    assert linked[('Day 2 - North', 'Train')] == 'London'
+
+
+def test_renamed_days_are_unassigned():
+    ledger = CostLedger.from_daily_costs({
+        'Day 2 - North': [{'Activity': 'Train', 'Category': 'Transport', 'Unit Price': 50},
+                          {'Activity': 'Dinner', 'Category': 'Food', 'Unit Price': 20}],
+        'Day 1 - Londres': [{'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10}],
+    })
+    summary = cost_summary(ledger.frame(Party(adults=1, rooms=1), RATES, 'GBP'), ITINERARY)
+    cities = {(str(day), category): (city, total)
+              for day, category, city, total, _ in summary.itertuples(index=False, name=None)}
+    assert cities == {
+        ('Day 2 - North', 'Transport'): ('London', pytest.approx(50)),
+        ('Day 2 - North', 'Food'): ('Edinburgh', pytest.approx(20)),
+        ('Day 1 - Londres', 'Attraction'): (UNASSIGNED, pytest.approx(10)),
+    }
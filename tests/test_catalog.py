@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pytest
+
+from trip_planner.catalog import CATALOG_PATH, Attraction, AttractionCatalog, load_catalog, normalize
+from trip_planner.routing import haversine
+
+PLACES = [
+    Attraction('Edinburgh Castle', 'Edinburgh', 'Castle', 55.9486, -3.1999),
+    Attraction('Edinburgh Zoo', 'Edinburgh', 'Zoo', 55.9422, -3.2683),
+    Attraction('Arthur\'s Seat', 'Edinburgh', 'Hill', 55.9441, -3.1618),
+    Attraction('London Eye', 'London', 'Landmark', 51.5033, -0.1196),
+    Attraction('Tower of London', 'London', 'Castle', 51.5081, -0.0759),
+    Attraction('St Paul\'s Café', 'London', 'Cafe', 51.5138, -0.0984),
+]
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return AttractionCatalog(PLACES)
+
+
+def names(attractions):
+    return [attraction.name for attraction in attractions]
+
+
+def test_normalize():
+    assert normalize("St Paul's Café") == "st pauls cafe"
+    assert normalize("  Tower-of   London ") == "tower of london"
+
+
+def test_get_ignores_case_and_punctuation(catalog):
+    assert catalog.get("st pauls cafe").town == 'London'
+    assert catalog.get("ARTHURS SEAT").category == 'Hill'
+    assert catalog.get("Big Ben") is None
+
+
+def test_search_ranks_name_prefixes_before_word_prefixes(catalog):
+    assert names(catalog.search("lond")) == ['London Eye', 'Tower of London']
+    assert names(catalog.search("edin", limit=1)) == ['Edinburgh Zoo']
+    assert names(catalog.search("castle")) == ['Edinburgh Castle']
+    assert catalog.search("") == []
+
+
+def test_search_finds_misspellings(catalog):
+    assert names(catalog.search("edinbrugh castel"))[0] == 'Edinburgh Castle'
+    assert catalog.search("zzzz") == []
+
+
+def test_near_matches_a_full_scan():
+    rng = np.random.default_rng(11)
+    coords = np.column_stack([rng.uniform(49.5, 59, 2000), rng.uniform(-8, 2, 2000)])
+    catalog = AttractionCatalog(Attraction(f"Place {i}", '', '', lat, lon) for i, (lat, lon) in enumerate(coords))
+    for lat, lon, km in [(51.5, -0.1, 25), (55.9, -3.2, 60), (54.0, -2.0, 150)]:
+        distances = haversine(coords, [lat, lon])
+        expected = np.flatnonzero(distances <= km)
+        expected = expected[np.argsort(distances[expected], kind='stable')][:10]
+        found = catalog.near(lat, lon, km)
+        assert names(attraction for attraction, _ in found) == [f"Place {i}" for i in expected]
+        assert [distance for _, distance in found] == pytest.approx(distances[expected].tolist())
+
+
+def test_near_place_leaves_the_place_out(catalog):
+    nearby = catalog.near_place("Edinburgh Castle", km=10)
+    assert names(attraction for attraction, _ in nearby) == ["Arthur's Seat", 'Edinburgh Zoo']
+    assert catalog.near_place("Atlantis") == []
+
+
+def test_load_catalog(tmp_path):
+    records = [{'name': 'Eden Project', 'lat': 50.362, 'lon': -4.745, 'price': '32.5', 'highlights': ['Biomes']}]
+    path = tmp_path / 'places.json'
+    path.write_text(json.dumps(records), encoding='utf-8')
+    loaded = load_catalog(str(path))
+    assert loaded.get('eden project').price == 32.5
+    assert loaded.get('eden project').highlights == ('Biomes',)
+
+    bad = tmp_path / 'bad.csv'
+    bad.write_text('name,lat,lon\nNowhere,north,\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="bad attraction record"):
+        load_catalog(str(bad))
+
+
+def test_bundled_catalog_loads():
+    catalog = load_catalog(CATALOG_PATH)
+    assert len(catalog) > 0
+    assert catalog.get('London').category == 'Town'
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from trip_planner.cli import main
+from trip_planner.core import evaluate_files, trip_totals
+from trip_planner.currency import RateTable
+from trip_planner.ledger import CostLedger
+from trip_planner.pricing import Party
+
+RATES = RateTable('test', {'GBP': 1.0, 'EUR': 1.2})
+PARTY = Party(adults=2, children=1, seniors=0, rooms=1)
+
+DAILY_COSTS = {
+    'Day 1': [
+        {'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10, 'Child Discount': 0.5},
+        {'Activity': 'Hotel', 'Category': 'Accommodation', 'Unit Price': 100, 'Pricing': 'Per room'},
+    ],
+    'Day 2': [
+        {'Activity': 'Taxi', 'Category': 'Transport', 'Unit Price': 30, 'Pricing': 'Per group'},
+        # Flights are budgeted separately and stay out of the daily total
+        {'Activity': 'Flight home', 'Category': 'Flight', 'Unit Price': 500},
+    ],
+}
+
+
+def write_trip(path, daily_costs=DAILY_COSTS, **fields):
+    path.write_text(json.dumps({'daily_costs': daily_costs, **fields}), encoding='utf-8')
+    return str(path)
+
+
+def test_trip_totals():
+    ledger = CostLedger.from_daily_costs(DAILY_COSTS)
+    totals = trip_totals({'Flights': 600}, ledger, PARTY, RATES)
+    # Museum 2 x 10 + 1 x 5, hotel 1 room, taxi once; flights 600 a head
+    assert totals == {'flights': 1800, 'daily': 155, 'grand': 1955}
+
+
+def test_trip_totals_converts_currency():
+    ledger = CostLedger.from_daily_costs(DAILY_COSTS)
+    totals = trip_totals({'Flights': 600}, ledger, PARTY, RATES, 'EUR')
+    assert totals['flights'] == pytest.approx(2160)
+    assert totals['daily'] == pytest.approx(186)
+    assert totals['grand'] == pytest.approx(2346)
+
+
+def test_evaluate_files(tmp_path):
+    good = write_trip(tmp_path / 'good.json', cost_data={'Flights': 600},
+                      party={'adults': 2, 'children': 1, 'seniors': 0, 'rooms': 1})
+    negative = write_trip(tmp_path / 'negative.json', {'Day 1': [{'Activity': 'Refund', 'Unit Price': -5}]})
+    missing = str(tmp_path / 'missing.json')
+
+    results = list(evaluate_files([good, negative, missing], workers=1))
+
+    assert [result['file'] for result in results] == [good, negative, missing]
+    assert results[0]['issues'] == []
+    assert results[0]['name'] == 'good'
+    assert (results[0]['days'], results[0]['line_items'], results[0]['party_size']) == (2, 4, 3)
+    assert results[0]['grand_total'] == pytest.approx(1955)
+    assert results[0]['day_totals'] == {'Day 1': pytest.approx(125), 'Day 2': pytest.approx(30)}
+    assert results[1]['issues'] == ["Day 1: Refund: negative price"]
+    assert 'FileNotFoundError' in results[2]['error']
+
+
+def test_evaluate_files_in_worker_processes(tmp_path):
+    paths = [write_trip(tmp_path / f'trip{i}.json') for i in range(5)]
+    serial = list(evaluate_files(paths, workers=1))
+    parallel = list(evaluate_files(paths, workers=2, chunk_size=2))
+    assert parallel == serial
+
+
+def test_cli_exit_codes(tmp_path, capsys):
+    good = write_trip(tmp_path / 'good.json')
+    bad = tmp_path / 'bad.json'
+    bad.write_text('{not json', encoding='utf-8')
+
+    assert main(['price', good]) == 0
+    assert json.loads(capsys.readouterr().out)['file'] == good
+    assert main(['validate', good]) == 0
+    assert capsys.readouterr().out.endswith("1 of 1 trip file(s) OK\n")
+
+    assert main(['price', good, str(bad)]) == 1
+    assert main(['validate', str(bad)]) == 1
+    assert "0 of 1 trip file(s) OK" in capsys.readouterr().out
+
+
+def test_cli_prices_a_directory_to_csv(tmp_path):
+    trips = tmp_path / 'trips'
+    trips.mkdir()
+    write_trip(trips / 'a.json')
+    write_trip(trips / 'b.json')
+    output = tmp_path / 'totals.csv'
+    assert main(['price', str(trips), '--format', 'csv', '-o', str(output)]) == 0
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert lines[0].startswith('file,name,days')
+    assert [line.split(',')[1] for line in lines[1:]] == ['a', 'b']
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from trip_planner.currency import RATES_DIR, RateTable, available_versions, load_rates
+
+RATES = RateTable('test', {'GBP': 1.0, 'EUR': 1.2, 'INR': 105.0}, {'GBP': '£', 'INR': '₹'})
+
+
+def test_rate_and_factors():
+    assert RATES.rate('GBP', 'INR') == 105
+    assert RATES.rate('EUR', 'GBP') == pytest.approx(1 / 1.2)
+    assert RATES.factors(['GBP', 'EUR', 'GBP'], 'EUR').tolist() == pytest.approx([1.2, 1.0, 1.2])
+    assert 'EUR' in RATES and 'USD' not in RATES
+
+
+def test_convert_mixed_currencies():
+    converted = RATES.convert([10.0, 12.0, 105.0], ['GBP', 'EUR', 'INR'], 'GBP')
+    assert np.allclose(converted, [10.0, 10.0, 1.0])
+
+
+def test_format():
+    assert RATES.format(1234.5, 'GBP') == "£1,234"
+    assert RATES.format(3.456, 'EUR', 2) == "EUR 3.46"
+
+
+def write_snapshot(directory, version, rows):
+    (directory / f'rates-{version}.csv').write_text(
+        "currency,symbol,per_gbp\n" + "".join(f"{row}\n" for row in rows), encoding='utf-8')
+
+
+def test_load_rates_picks_the_newest_snapshot(tmp_path):
+    write_snapshot(tmp_path, '2024-01-01', ["GBP,£,1.0", "EUR,€,1.10"])
+    write_snapshot(tmp_path, '2024-06-01', ["GBP,£,1.0", "eur,€,1.20"])
+    (tmp_path / 'notes.txt').write_text("not a snapshot", encoding='utf-8')
+
+    assert available_versions(str(tmp_path)) == ['2024-01-01', '2024-06-01']
+    assert load_rates(str(tmp_path)).version == '2024-06-01'
+    assert load_rates(str(tmp_path)).rate('GBP', 'EUR') == pytest.approx(1.2)
+    assert load_rates(str(tmp_path), '2024-01-01').rate('GBP', 'EUR') == pytest.approx(1.1)
+
+
+def test_load_rates_refuses_bad_snapshots(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_rates(str(tmp_path))
+    write_snapshot(tmp_path, '2024-01-01', ["GBP,£,1.5"])
+    with pytest.raises(ValueError):
+        load_rates(str(tmp_path))
+
+
+def test_bundled_snapshot_loads():
+    rates = load_rates(RATES_DIR)
+    assert rates.rate('GBP', 'GBP') == 1.0
+    assert 'INR' in rates
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from trip_planner.history import EditLog
+from trip_planner.ledger import CostLedger
+
+DAILY_COSTS = {
+    'Day 1': [{'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10}],
+    'Day 2': [{'Activity': 'Lunch', 'Category': 'Food', 'Unit Price': 12}],
+}
+
+
+def new_log(snapshot_every=4):
+    ledger = CostLedger.from_daily_costs(DAILY_COSTS)
+    return EditLog(ledger, {'Flights': 600, 'Food Budget': 350}, snapshot_every)
+
+
+def trip(log):
+    return dict(log.costs), log.ledger.to_daily_costs()
+
+
+def test_undo_and_redo():
+    log = new_log()
+    opened = trip(log)
+    log.set_cost('Flights', 650)
+    log.add_line('Day 1', 'Tea', 'Food', 5.0)
+    edited = trip(log)
+
+    assert log.undo().describe() == "Added Tea to Day 1"
+    assert log.undo().describe() == "Flights: 600 → 650"
+    assert log.undo() is None
+    assert trip(log) == opened
+
+    log.redo()
+    log.redo()
+    assert log.redo() is None
+    assert trip(log) == edited
+
+
+def test_editing_after_undo_drops_the_undone_edits():
+    log = new_log()
+    log.set_cost('Flights', 650)
+    log.set_cost('Flights', 700)
+    log.undo()
+    log.set_cost('Food Budget', 300)
+    assert len(log) == 2 and not log.can_redo
+    assert log.costs == {'Flights': 650, 'Food Budget': 300}
+
+
+def test_unchanged_values_are_not_logged():
+    log = new_log()
+    log.set_cost('Flights', 600)
+    log.update_line('Day 1', 0, unit_price=10.0)
+    assert len(log) == 0
+
+
+def test_goto_and_state_match_every_version():
+    rng = random.Random(3)
+    log = new_log()
+    versions = [trip(log)]
+    for step in range(40):
+        day = rng.choice(['Day 1', 'Day 2'])
+        rows = len(log.ledger.rows(day))
+        action = rng.choice(['cost', 'add', 'update', 'delete'] if rows else ['cost', 'add'])
+        if action == 'cost':
+            log.set_cost(rng.choice(['Flights', 'Food Budget']), 100 + step)
+        elif action == 'add':
+            log.add_line(day, f"Item {step}", 'Other', float(step))
+        elif action == 'update':
+            log.update_line(day, rng.randrange(rows), unit_price=float(step) + 0.5)
+        else:
+            log.delete_line(day, rng.randrange(rows))
+        versions.append(trip(log))
+
+    # Far jumps restore a snapshot, near ones step; both land on the same trip
+    for version in [0, 40, 3, 37, 20, 21, 8, 40, 0]:
+        log.goto(version)
+        assert log.version == version
+        assert trip(log) == versions[version]
+        costs, days = log.state(version)
+        assert {**versions[0][0], **costs} == versions[version][0]
+        assert {day: list(rows) for day, rows in days.items()} == {
+            day: versions[version][1][day] for day in days}
+
+    with pytest.raises(ValueError):
+        log.goto(41)
+
+
+def test_diff():
+    log = new_log()
+    log.set_cost('Flights', 650)
+    log.add_line('Day 2', 'Dinner', 'Food', 20.0)
+    log.update_line('Day 1', 0, unit_price=15.0)
+    changes = log.diff(0, 3)
+    assert [(change['Where'], change['Change']) for change in changes] == [
+        ('Budget', 'changed'), ('Day 2', 'added'), ('Day 1', 'changed')]
+    assert changes[0]['After'] == "Flights: 650"
+    assert log.diff(3, 3) == []
+
+
+def test_take_dirty_costs():
+    log = new_log()
+    log.set_cost('Flights', 650)
+    assert log.take_dirty_costs() == {'Flights': 650}
+    assert log.take_dirty_costs() == {}
+    log.undo()
+    assert log.take_dirty_costs() == {'Flights': 600}
+    assert log.touches('cost', 'Flights') and not log.touches('line', 'Day 1')
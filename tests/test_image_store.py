@@ -0,0 +1,69 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from trip_planner import image_store
+from trip_planner.image_store import IMAGE_SIZES, PlaceImageStore
+
+
+def photo(color, size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count the photos the store decodes."""
+    calls = []
+
+    def counting(source, longest_edge):
+        calls.append(longest_edge)
+        return image_store.decode_reduced.__wrapped__(source, longest_edge)
+
+    counting.__wrapped__ = image_store.decode_reduced
+    monkeypatch.setattr(image_store, 'decode_reduced', counting)
+    return calls
+
+
+def test_a_photo_is_decoded_once_and_shared(tmp_path, decodes):
+    store = PlaceImageStore(str(tmp_path))
+    red = photo('red')
+    digest = store.put('London', red)
+    assert store.put('London', red) == digest
+    assert store.put('Tower of London', red) == digest
+    assert len(decodes) == 1 and len(store) == 1
+    assert store.urls('London') == store.urls('Tower of London')
+
+    with Image.open(os.path.join(store.root, f"{digest}-display.webp")) as display:
+        assert max(display.size) == IMAGE_SIZES['display']
+
+
+def test_least_recently_shown_photos_are_evicted(tmp_path):
+    store = PlaceImageStore(str(tmp_path))
+    store.put('London', photo('red'))
+    store.put('York', photo('green'))
+    # Room for about two and a half photos
+    store.max_bytes = store.total_bytes() * 1.25
+    store.urls('London')
+    store.put('Edinburgh', photo('blue'))
+    assert store.urls('York') is None
+    assert store.urls('London') is not None and store.urls('Edinburgh') is not None
+
+
+def test_the_index_survives_a_restart(tmp_path, decodes):
+    red = photo('red')
+    digest = PlaceImageStore(str(tmp_path)).put('London', red)
+    reopened = PlaceImageStore(str(tmp_path))
+    assert reopened.urls('London')['thumbnail'].endswith(f"{digest}-thumbnail.webp")
+    reopened.put('London', red)
+    assert len(decodes) == 1
+
+
+def test_unreadable_uploads_are_refused(tmp_path):
+    store = PlaceImageStore(str(tmp_path))
+    with pytest.raises(ValueError, match="Not a readable image"):
+        store.put('London', b'not an image')
+    assert len(store) == 0
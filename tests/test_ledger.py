@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from trip_planner.currency import RateTable
+from trip_planner.ledger import CostLedger
+from trip_planner.pricing import PRICING_RULES, Party
+
+RATES = RateTable('test', {'GBP': 1.0, 'EUR': 1.2})
+GROUP_OF_4 = Party(adults=4, rooms=2)
+
+# The shape the app kept before the ledger, with a group-of-4 total on every line
+LEGACY_DAILY_COSTS = {
+    'Day 1': [
+        {'Activity': 'Flight to London', 'Individual': 600, 'Couple': 1200, 'Total_4': 2400},
+        {'Activity': 'Heathrow Express', 'Individual': 25, 'Couple': 50, 'Total_4': 100},
+        {'Activity': 'Tower of London', 'Individual': 29.90, 'Couple': 59.80, 'Total_4': 119.60},
+    ],
+    'Day 2': [
+        {'Activity': 'Train to Edinburgh', 'Individual': 35, 'Couple': 70, 'Total_4': 140},
+        {'Activity': 'Edinburgh Castle', 'Total_4': 78},
+    ],
+}
+
+def legacy_day_total(activities):
+    """How the app totalled a day before the ledger."""
+    return sum(activity['Total_4'] for activity in activities if 'Flight' not in activity['Activity'])
+
+
+def day_total(ledger, day):
+    return ledger.day_total(day, GROUP_OF_4, RATES, 'GBP')
+
+
+def grand_total(ledger):
+    return ledger.grand_total(GROUP_OF_4, RATES, 'GBP')
+
+
+def test_totals_match_the_legacy_dict_totals():
+    ledger = CostLedger.from_daily_costs(LEGACY_DAILY_COSTS)
+    for day, activities in LEGACY_DAILY_COSTS.items():
+        assert day_total(ledger, day) == pytest.approx(legacy_day_total(activities))
+    assert grand_total(ledger) == pytest.approx(sum(map(legacy_day_total, LEGACY_DAILY_COSTS.values())))
+    assert ledger.get(ledger.rows('Day 1')[0])['Category'] == 'Flight'
+
+
+def test_running_totals_match_a_rebuild():
+    rng = random.Random(5)
+    ledger = CostLedger.from_daily_costs(LEGACY_DAILY_COSTS)
+    for step in range(200):
+        day = rng.choice(['Day 1', 'Day 2', 'Day 3'])
+        rows = ledger.rows(day) if day in ledger.days else []
+        action = rng.choice(['add', 'update', 'delete'] if rows else ['add'])
+        if action == 'add':
+            ledger.add(day, f"Item {step}", rng.choice(['Food', 'Transport', 'Flight']), rng.uniform(0, 50),
+                       currency=rng.choice(['GBP', 'EUR']), rule=rng.choice(PRICING_RULES))
+        elif action == 'update':
+            ledger.update(rng.choice(rows), unit_price=rng.uniform(0, 50), rule=rng.choice(PRICING_RULES))
+        else:
+            ledger.delete(rng.choice(rows))
+
+    rebuilt = CostLedger.from_daily_costs(ledger.to_daily_costs())
+    for day in ledger.days:
+        assert day_total(ledger, day) == pytest.approx(day_total(rebuilt, day))
+    assert grand_total(ledger) == pytest.approx(grand_total(rebuilt))
+
+
+def test_totals_convert_each_currency():
+    ledger = CostLedger.from_daily_costs({'Day 1': [
+        {'Activity': 'Lunch', 'Category': 'Food', 'Unit Price': 12, 'Currency': 'EUR'},
+        {'Activity': 'Tea', 'Category': 'Food', 'Unit Price': 5},
+    ]})
+    one = Party(adults=1, rooms=1)
+    assert ledger.day_total('Day 1', one, RATES, 'GBP') == pytest.approx(15)
+    assert ledger.grand_total(one, RATES, 'EUR') == pytest.approx(18)
+
+
+def test_unknown_choices_are_refused():
+    ledger = CostLedger(['Day 1'])
+    with pytest.raises(ValueError):
+        ledger.add('Day 1', 'Snack', 'Snacks', 2.0)
+    with pytest.raises(ValueError):
+        ledger.add('Day 1', 'Snack', 'Food', 2.0, rule='Per snack')
+    assert len(ledger) == 0
+    with pytest.raises(KeyError):
+        ledger.update(0, unit_price=1.0)
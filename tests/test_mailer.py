@@ -0,0 +1,199 @@
+import email
+import socketserver
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from trip_planner.currency import available_versions
+from trip_planner.mailer import Mailer, SMTPSettings, parse_recipients, summary_context
+from trip_planner.pricing import Party
+from trip_planner.store import Trip
+
+TRIP = Trip(1, 'Highlands', date(2024, 12, 25), date(2024, 12, 26), Party(adults=2, rooms=1))
+DAILY_COSTS = {'Day 1': [{'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10}]}
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """A local SMTP server that keeps every message it receives.
+
+    It speaks just enough SMTP for ``smtplib``. The first ``fail_first``
+    messages are refused with a temporary 421, recipients in ``reject`` with
+    a permanent 550, and given a ``gate``, messages wait for it to open
+    before being accepted.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fail_first=0, reject=(), gate=None):
+        super().__init__(('127.0.0.1', 0), SMTPSession)
+        self.fail_first = fail_first
+        self.reject = set(reject)
+        self.gate = gate
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, args=(0.05,), name='smtp-sink', daemon=True).start()
+
+    @property
+    def settings(self):
+        host, port = self.server_address[:2]
+        return SMTPSettings(host, port, timeout=5.0)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def subjects(self):
+        return [email.message_from_bytes(data)['Subject'] for _, data in self.messages]
+
+
+class SMTPSession(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 sink")
+        recipients = []
+        while line := self.rfile.readline():
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply("250 sink")
+            elif verb == 'MAIL':
+                with sink.lock:
+                    refused = sink.fail_first > 0
+                    sink.fail_first -= refused
+                recipients = []
+                self.reply("421 Try again later" if refused else "250 OK")
+            elif verb == 'RCPT':
+                address = command[8:].strip(' <>')
+                if address in sink.reject:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = bytearray()
+                while (chunk := self.rfile.readline()) not in (b'.\r\n', b'.\n', b''):
+                    data += chunk[1:] if chunk.startswith(b'..') else chunk
+                if sink.gate is not None:
+                    sink.gate.wait()
+                with sink.lock:
+                    sink.messages.append((recipients, bytes(data)))
+                self.reply("250 Queued")
+            elif verb in ('RSET', 'NOOP'):
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+@pytest.fixture
+def context():
+    return summary_context(TRIP, TRIP.party, {'Flights': 600}, DAILY_COSTS, 'GBP', available_versions()[-1])
+
+
+def wait(mailer, batch_id, timeout=10):
+    batch = mailer.batch(batch_id)
+    deadline = time.monotonic() + timeout
+    while not batch.done:
+        if time.monotonic() > deadline:
+            pytest.fail(f"batch still sending: {batch.counts()}")
+        time.sleep(0.01)
+    return batch
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**options):
+        servers.append(SMTPSink(**options))
+        return servers[-1]
+
+    yield start
+    for started in servers:
+        started.stop()
+
+
+def test_parse_recipients():
+    assert parse_recipients("Asha <asha@example.com>, ravi@example.com\nnobody") == [
+        ('Asha', 'asha@example.com'), ('', 'ravi@example.com')]
+
+
+def test_one_connection_carries_a_worker_s_messages(server, context):
+    sink = server()
+    mailer = Mailer(sink.settings, workers=1)
+    recipients = [(f"Traveller {i}", f"t{i}@example.com") for i in range(5)]
+    batch = wait(mailer, mailer.send_summary(context, recipients))
+    assert batch.counts()['sent'] == 5
+    assert sink.connections == 1
+    assert [to for to, _ in sink.messages] == [[address] for _, address in recipients]
+    assert sink.subjects() == ["Your trip summary: Highlands"] * 5
+
+
+def test_temporary_failures_are_retried_with_backoff(server, context):
+    sink = server(fail_first=2)
+    mailer = Mailer(sink.settings, workers=1, backoff=0.1)
+    started = time.monotonic()
+    batch = wait(mailer, mailer.send_summary(context, [('Asha', 'asha@example.com')]))
+    # Waits of 0.1 then 0.2 seconds, each on a fresh connection
+    assert time.monotonic() - started >= 0.3
+    [job] = batch.jobs
+    assert (job.status, job.attempts) == ('sent', 3)
+    assert sink.connections == 3 and len(sink.messages) == 1
+
+
+def test_temporary_failures_give_up_after_max_attempts(server, context):
+    sink = server(fail_first=10)
+    mailer = Mailer(sink.settings, workers=1, max_attempts=2, backoff=0.01)
+    batch = wait(mailer, mailer.send_summary(context, [('Asha', 'asha@example.com')]))
+    [job] = batch.jobs
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert "421" in job.error
+
+
+def test_permanent_failures_are_not_retried(server, context):
+    sink = server(reject={'gone@example.com'})
+    mailer = Mailer(sink.settings, workers=1, backoff=0.01)
+    batch = wait(mailer, mailer.send_summary(context, [('', 'gone@example.com'), ('Asha', 'asha@example.com')]))
+    gone, asha = batch.jobs
+    assert (gone.status, gone.attempts) == ('failed', 1)
+    assert "550" in gone.error and batch.errors() == [f"gone@example.com: {gone.error}"]
+    assert asha.status == 'sent'
+    assert sink.connections == 1
+
+
+def test_a_bad_trip_fails_without_sending(server, context):
+    sink = server()
+    mailer = Mailer(sink.settings, workers=1)
+    batch = wait(mailer, mailer.send_summary({**context, 'rates_version': '1999-01-01'},
+                                             [('Asha', 'asha@example.com')]))
+    assert batch.jobs[0].status == 'failed' and batch.jobs[0].attempts == 0
+    assert sink.connections == 0
+
+
+def test_sending_to_a_big_group_returns_at_once(server, context):
+    gate = threading.Event()
+    sink = server(gate=gate)
+    mailer = Mailer(sink.settings, workers=4)
+    recipients = [(f"Traveller {i}", f"t{i}@example.com") for i in range(60)]
+
+    started = time.monotonic()
+    batch_id = mailer.send_summary(context, recipients)
+    assert time.monotonic() - started < 0.5
+    # Nothing can have been delivered yet: the server holds every message until the gate opens
+    assert mailer.batch(batch_id).counts()['sent'] == 0
+
+    gate.set()
+    batch = wait(mailer, batch_id)
+    assert batch.counts()['sent'] == 60 and len(sink.messages) == 60
+    assert sink.connections <= 4
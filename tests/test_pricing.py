@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from trip_planner.pricing import PER_GROUP, PER_PERSON, PER_ROOM, Party, line_components, price_lines
+
+FAMILY = Party(adults=2, children=2, seniors=1, rooms=2)
+
+
+def test_per_person_prices_apply_discounts():
+    # 2 adults at 20, 2 children at 25% off, 1 senior at 10% off
+    totals = price_lines([20.0], [PER_PERSON], [0.25], [0.10], FAMILY)
+    assert totals.tolist() == pytest.approx([2 * 20 + 2 * 15 + 18])
+
+
+def test_per_room_and_per_group_prices_ignore_head_counts_and_discounts():
+    totals = price_lines([100.0, 30.0], [PER_ROOM, PER_GROUP], [0.5, 0.5], [0.5, 0.5], FAMILY)
+    assert totals.tolist() == pytest.approx([200.0, 30.0])
+
+
+def test_components_are_linear_in_price():
+    rules = np.array([PER_PERSON, PER_ROOM, PER_GROUP])
+    one = line_components([1.0, 1.0, 1.0], rules, 0.2, 0.1)
+    assert np.allclose(line_components([7.0, 7.0, 7.0], rules, 0.2, 0.1), 7 * one)
+    # Columns: adults, children, seniors, rooms, group
+    assert np.allclose(one, [[1, 0.8, 0.9, 0, 0], [0, 0, 0, 1, 0], [0, 0, 0, 0, 1]])
+
+
+def test_party():
+    assert FAMILY.size == 5
+    assert FAMILY.per_person(100) == 20
+    assert Party(adults=0, children=0).per_person(100) == 100
+    assert FAMILY.describe() == "Group of 5: 2 adults, 2 children, 1 seniors"
+    assert Party(adults=2, label="Couple").describe() == "Group of 2: Couple"
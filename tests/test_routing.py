@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from trip_planner.routing import build_routes, haversine, haversine_matrix, optimize_order, path_length
+
+LONDON = [51.5074, -0.1278]
+EDINBURGH = [55.9533, -3.1883]
+
+
+def test_haversine():
+    assert haversine(LONDON, EDINBURGH) == pytest.approx(534, abs=2)
+    assert haversine(LONDON, LONDON) == 0
+
+
+def test_haversine_matrix_is_symmetric():
+    dist = haversine_matrix([LONDON, EDINBURGH, [53.4808, -2.2426]])
+    assert dist.shape == (3, 3)
+    assert np.allclose(dist, dist.T)
+    assert np.allclose(np.diag(dist), 0)
+
+
+def test_optimize_order_untangles_a_line():
+    # Stops along one meridian, given out of order
+    coords = [[50 + i, 0] for i in (0, 3, 1, 4, 2)]
+    assert optimize_order(coords, start=0).tolist() == [0, 2, 4, 1, 3]
+    assert optimize_order(coords, start=0, end=1).tolist() == [0, 2, 4, 3, 1]
+
+
+def test_optimize_order_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        coords = np.column_stack([rng.uniform(50, 58, 7), rng.uniform(-5, 1, 7)])
+        dist = haversine_matrix(coords)
+        order = optimize_order(coords, start=0, end=6)
+        assert order[0] == 0 and order[-1] == 6
+        assert sorted(order.tolist()) == list(range(7))
+        best = min(path_length([0, *middle, 6], dist) for middle in itertools.permutations(range(1, 6)))
+        assert path_length(order, dist) <= best * 1.05
+
+
+def test_optimize_order_small_inputs():
+    assert optimize_order([]).tolist() == []
+    assert optimize_order([LONDON]).tolist() == [0]
+    assert optimize_order([LONDON, EDINBURGH]).tolist() == [0, 1]
+
+
+def test_build_routes():
+    routes = build_routes(['London', 'Edinburgh'], [LONDON, EDINBURGH], np.array([0, 1]), mode='Train')
+    assert len(routes) == 1
+    assert routes[0]['stops'] == ['London', 'Edinburgh']
+    assert routes[0]['distance_km'] == pytest.approx(534, abs=2)
+    assert routes[0]['minutes'] == pytest.approx(534 * 1.25 / 95 * 60, rel=0.01)
@@ -0,0 +1,65 @@
+import pytest
+
+from trip_planner.itinerary import Event, ItineraryDay, Location
+from trip_planner.schedule import check_schedule, parse_duration, parse_time, travel_mode
+
+LONDON = Location('London', 51.5074, -0.1278)
+EDINBURGH = Location('Edinburgh', 55.9533, -3.1883)
+DELHI = Location('Delhi', 28.5562, 77.1000, utc_offset=330)
+
+
+def day(number, *events):
+    return ItineraryDay(number, '', f"Day {number}", '', events=tuple(events))
+
+
+def kinds(itinerary):
+    return [conflict.kind for conflict in check_schedule(itinerary)]
+
+
+def test_parse_time():
+    assert parse_time("09:30") == (570, 0, None)
+    assert parse_time("05:05+1 IST") == (305, 1, 'IST')
+    with pytest.raises(ValueError):
+        parse_time("half nine")
+    with pytest.raises(ValueError):
+        parse_time("09:30 XYZ")
+
+
+def test_parse_duration_and_travel_mode():
+    assert parse_duration("Tower of London (2.5 hours)") == 150
+    assert parse_duration("Lunch (45 mins)") == 45
+    assert parse_duration("Free afternoon") is None
+    assert travel_mode("**LNER Express** to Edinburgh") == 'Train'
+    assert travel_mode("Walk along the Thames") == 'Walk'
+    assert travel_mode("Afternoon tea") is None
+
+
+def test_a_clean_day_has_no_conflicts():
+    assert check_schedule([day(1, Event("09:00", "Museum (2 hours)", LONDON),
+                               Event("11:30", "Lunch (1 hour)", LONDON))]) == []
+
+
+def test_overlap():
+    conflicts = check_schedule([day(1, Event("09:00", "Museum (3 hours)", LONDON),
+                                    Event("11:00", "Lunch", LONDON))])
+    assert [(conflict.kind, conflict.time) for conflict in conflicts] == [('overlap', "11:00")]
+    assert "starts during Museum" in conflicts[0].message
+
+
+def test_impossible_transfer():
+    # 530 km by car in an hour is impossible; a train leaving at 09:00 arrives in time
+    assert kinds([day(1, Event("09:00", "Museum (1 hour)", LONDON), Event("11:00", "Castle", EDINBURGH))]) == ['transfer']
+    assert kinds([day(1, Event("09:00", "Train to Edinburgh", LONDON), Event("14:00", "Castle", EDINBURGH))]) == []
+
+
+def test_rollovers():
+    # Marked and unmarked times past midnight are both reported, and neither counts as an overlap
+    assert kinds([day(1, Event("22:00", "Night flight", DELHI), Event("05:05+1 IST", "Land", DELHI))]) == ['rollover']
+    assert kinds([day(1, Event("23:00", "Night bus", LONDON), Event("01:00", "Arrive", LONDON))]) == ['rollover']
+
+
+def test_time_zones_share_one_timeline():
+    # Breakfast in Delhi runs 02:30-03:00 UTC
+    breakfast = Event("08:00 IST", "Breakfast (30 mins)", DELHI)
+    assert kinds([day(1, breakfast, Event("03:00 GMT", "Call home", DELHI))]) == []
+    assert kinds([day(1, breakfast, Event("02:45 GMT", "Call home", DELHI))]) == ['overlap']
@@ -0,0 +1,103 @@
+import threading
+from datetime import date
+
+import pytest
+
+from trip_planner.pricing import Party
+from trip_planner.shared import BUDGET, DAY, PARTY, Conflict, SharedTrip
+from trip_planner.store import TripStore
+
+DAILY_COSTS = {
+    'Day 1': [{'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10}],
+    'Day 2': [{'Activity': 'Lunch', 'Category': 'Food', 'Unit Price': 12}],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TripStore(str(tmp_path / 'trips.sqlite3'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def shared(store):
+    trip_id = store.create_trip('Test', date(2024, 12, 25), date(2024, 12, 26), Party(),
+                                {'Flights': 600, 'Food Budget': 350}, DAILY_COSTS)
+    return SharedTrip(store, trip_id)
+
+
+def museum(price):
+    return [{'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': price, 'Currency': 'GBP',
+             'Pricing': 'Per person', 'Child Discount': 0.0, 'Senior Discount': 0.0}]
+
+
+def test_commit_writes_and_bumps_versions(store, shared):
+    seen = shared.versions()
+    versions = shared.commit(seen, days={'Day 1': museum(15.0)}, costs={'Flights': 650})
+    assert versions == {(DAY, 'Day 1'): 1, (BUDGET, 'Flights'): 1}
+    assert store.load_day(shared.trip_id, 'Day 1')[0]['Unit Price'] == 15.0
+    assert store.load_costs(shared.trip_id)['Flights'] == 650
+
+
+def test_a_stale_commit_is_refused_and_writes_nothing(store, shared):
+    first, second = shared.versions(), shared.versions()
+    first.update(shared.commit(first, days={'Day 1': museum(15.0)}))
+
+    with pytest.raises(Conflict) as refused:
+        shared.commit(second, days={'Day 1': museum(20.0), 'Day 2': []}, costs={'Flights': 700})
+    assert refused.value.keys == [(DAY, 'Day 1')]
+    assert store.load_day(shared.trip_id, 'Day 1')[0]['Unit Price'] == 15.0
+    assert len(store.load_day(shared.trip_id, 'Day 2')) == 1
+    assert store.load_costs(shared.trip_id)['Flights'] == 600
+
+    # Other days and lines are still free, and each session is only behind on the other's commits
+    second.update(shared.commit(second, days={'Day 2': []}))
+    assert shared.changed(second) == [(DAY, 'Day 1')]
+    assert shared.changed(first) == [(DAY, 'Day 2')]
+
+
+def test_party_is_committed_with_a_version(store, shared):
+    first, second = shared.versions(), shared.versions()
+    first.update(shared.commit(first, party=Party(adults=2, rooms=1)))
+    assert store.trip(shared.trip_id).party == Party(adults=2, rooms=1)
+    assert shared.changed(second) == [(PARTY, 'party')]
+
+    with pytest.raises(Conflict, match="party"):
+        shared.commit(second, party=Party(adults=6))
+    assert store.trip(shared.trip_id).party.adults == 2
+
+
+def test_a_failed_write_stores_nothing(store, shared):
+    seen = shared.versions()
+    # The party is written last, after the day and budget line, in the same transaction
+    with pytest.raises(AttributeError):
+        shared.commit(seen, days={'Day 1': museum(15.0)}, costs={'Flights': 650}, party='not a party')
+    assert store.load_day(shared.trip_id, 'Day 1')[0]['Unit Price'] == 10
+    assert store.load_costs(shared.trip_id)['Flights'] == 600
+    assert shared.versions() == {}
+
+    shared.commit(seen, days={'Day 1': museum(15.0)}, costs={'Flights': 650}, party=Party(adults=3))
+    assert store.trip(shared.trip_id).party == Party(adults=3)
+
+
+def test_concurrent_commits_to_one_day_let_exactly_one_win(shared):
+    seen = shared.versions()
+    start = threading.Barrier(8)
+    outcomes = []
+
+    def commit(price):
+        start.wait()
+        try:
+            shared.commit(dict(seen), days={'Day 1': museum(price)})
+            outcomes.append('won')
+        except Conflict:
+            outcomes.append('refused')
+
+    threads = [threading.Thread(target=commit, args=(float(price),)) for price in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == ['refused'] * 7 + ['won']
+    assert shared.version((DAY, 'Day 1')) == 1
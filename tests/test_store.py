@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from trip_planner.currency import RateTable
+from trip_planner.ledger import CostLedger
+from trip_planner.pricing import Party
+from trip_planner.store import Trip, TripStore
+
+RATES = RateTable('test', {'GBP': 1.0, 'EUR': 1.2})
+PARTY = Party(adults=2, children=1, seniors=1, rooms=2, label='Family')
+COST_DATA = {'Flights': 600, 'Food Budget': 350}
+DAILY_COSTS = {
+    'Day 1': [
+        {'Activity': 'Flight to London', 'Category': 'Flight', 'Unit Price': 600},
+        {'Activity': 'Museum', 'Category': 'Attraction', 'Unit Price': 10, 'Child Discount': 0.5,
+         'Senior Discount': 0.2},
+        {'Activity': 'Hotel', 'Category': 'Accommodation', 'Unit Price': 100, 'Pricing': 'Per room'},
+    ],
+    'Day 2': [],
+    'Day 3': [
+        {'Activity': 'Lunch', 'Category': 'Food', 'Unit Price': 12, 'Currency': 'EUR'},
+        {'Activity': 'Taxi', 'Category': 'Transport', 'Unit Price': 30, 'Pricing': 'Per group'},
+        {'Activity': 'Dinner', 'Category': 'Food', 'Unit Price': 18, 'Currency': 'EUR'},
+    ],
+}
+LOCATIONS = {'London': {'coords': [51.5074, -0.1278], 'color': 'red', 'icon': 'home', 'popup': 'Start'}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TripStore(str(tmp_path / 'trips.sqlite3'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def trip_id(store):
+    return store.create_trip('Test', date(2024, 12, 25), date(2024, 12, 27), PARTY, COST_DATA, DAILY_COSTS,
+                             LOCATIONS)
+
+
+def assert_same_totals(ledger, expected):
+    assert ledger.days == expected.days
+    for currency in ('GBP', 'EUR'):
+        for day in expected.days:
+            assert ledger.day_total(day, PARTY, RATES, currency) == pytest.approx(
+                expected.day_total(day, PARTY, RATES, currency))
+        assert ledger.grand_total(PARTY, RATES, currency) == pytest.approx(
+            expected.grand_total(PARTY, RATES, currency))
+
+
+def test_a_trip_round_trips(store, trip_id):
+    assert store.list_trips() == [(trip_id, 'Test')]
+    assert store.trip(trip_id) == Trip(trip_id, 'Test', date(2024, 12, 25), date(2024, 12, 27), PARTY)
+    assert store.load_costs(trip_id) == COST_DATA
+    assert store.load_locations(trip_id) == LOCATIONS
+    expected = CostLedger.from_daily_costs(DAILY_COSTS).to_daily_costs()
+    assert {day: store.load_day(trip_id, day) for day in DAILY_COSTS} == expected
+    with pytest.raises(KeyError):
+        store.trip(trip_id + 1)
+
+
+def test_saves_replace_days_and_append_new_ones(store, trip_id):
+    store.save_days(trip_id, {'Day 2': [{'Activity': 'Tea', 'Category': 'Food', 'Unit Price': 5}], 'Day 4': []})
+    store.save_costs(trip_id, {'Flights': 650})
+    store.save_party(trip_id, Party(adults=3))
+    assert [row['Activity'] for row in store.load_day(trip_id, 'Day 2')] == ['Tea']
+    assert len(store.load_day(trip_id, 'Day 3')) == 3
+    assert store.open_ledger(trip_id).days == ['Day 1', 'Day 2', 'Day 3', 'Day 4']
+    assert store.load_costs(trip_id) == {'Flights': 650, 'Food Budget': 350}
+    assert store.trip(trip_id).party == Party(adults=3)
+
+
+def test_open_ledger_reads_days_only_when_asked(store, trip_id):
+    read = []
+
+    def load_day(label):
+        read.append(label)
+        return store.load_day(trip_id, label)
+
+    ledger = store.open_ledger(trip_id, load_day)
+    assert ledger.loaded_days() == 0 and len(ledger) == 0
+    ledger.day_total('Day 3', PARTY, RATES, 'GBP')
+    assert read == []
+
+    assert [ledger.get(row)['Activity'] for row in ledger.rows('Day 3')] == ['Lunch', 'Taxi', 'Dinner']
+    assert read == ['Day 3'] and ledger.loaded_days() == 1
+    ledger.rows('Day 3')
+    assert read == ['Day 3']
+
+
+def test_open_ledger_sums_match_a_full_load(store, trip_id):
+    expected = CostLedger.from_daily_costs(DAILY_COSTS)
+    ledger = store.open_ledger(trip_id)
+    assert_same_totals(ledger, expected)
+    # Edits to a lazily opened ledger keep its totals right
+    ledger.add('Day 2', 'Tea', 'Food', 5.0)
+    expected.add('Day 2', 'Tea', 'Food', 5.0)
+    ledger.delete(ledger.rows('Day 1')[1])
+    expected.delete(expected.rows('Day 1')[1])
+    assert_same_totals(ledger, expected)
+
+
+def test_open_ledger_places_sums_by_day_not_stored_position(store, trip_id):
+    # Positions with gaps, as left by days removed by hand
+    with store.transaction() as conn:
+        conn.execute('UPDATE days SET position = position * 10 + 5 WHERE trip_id = ?', (trip_id,))
+    assert_same_totals(store.open_ledger(trip_id), CostLedger.from_daily_costs(DAILY_COSTS))
@@ -0,0 +1,84 @@
+import time
+from datetime import date
+
+import pytest
+
+from trip_planner.currency import available_versions
+from trip_planner.itinerary import Event, ItineraryDay
+from trip_planner.pricing import Party
+from trip_planner.store import Trip
+from trip_planner.trip_pack import PackExporter, pack_content, pack_key, render_html
+
+TRIP = Trip(1, 'Fish & <Chips> Tour', date(2024, 12, 25), date(2024, 12, 26), Party(adults=2, rooms=1))
+DAILY_COSTS = {'Day 1': [{'Activity': '<b>Tea</b> & cake', 'Category': 'Food', 'Unit Price': 5}]}
+LOCATIONS = {'London': {'coords': [51.5074, -0.1278], 'color': 'red'},
+             'York': {'coords': [53.9600, -1.0873], 'color': 'blue'}}
+ROUTES = [{'coords': [[51.5074, -0.1278], [53.9600, -1.0873]], 'color': 'green', 'weight': 3,
+           'tooltip': 'London -> York'}]
+PLACE_INFO = {'York': {'description': 'Walls <and> minster', 'highlights': ['Minster'],
+                       'visit_time': '1 day', 'best_time': 'Spring'}}
+
+
+def content(rates_version=None, **changes):
+    itinerary = [ItineraryDay(1, '🚂', 'North', 'London -> York', events=(
+        Event("09:00", "**LNER** to <York>", notes=("Book <early>",)),))]
+    values = dict(trip=TRIP, party=TRIP.party, cost_data={'Flights': 600}, daily_costs=DAILY_COSTS,
+                  currency='GBP', rates_version=rates_version or available_versions()[-1], itinerary=itinerary,
+                  locations=LOCATIONS, routes=ROUTES, place_info=PLACE_INFO)
+    return pack_content(**{**values, **changes})
+
+
+def wait(exporter, key):
+    for _ in range(300):
+        status = exporter.status(key)
+        if status[0] != 'building':
+            return status
+        time.sleep(0.1)
+    pytest.fail("pack still building")
+
+
+def test_pack_key_is_stable_for_equal_content():
+    assert pack_key(content(), 'html') == pack_key(content(), 'html')
+    assert pack_key(content(), 'html') != pack_key(content(), 'pdf')
+    assert pack_key(content(), 'html') != pack_key(content(currency='EUR'), 'html')
+
+
+def test_render_html_escapes_user_text():
+    document = render_html(content())
+    assert '<h1>Fish &amp; &lt;Chips&gt; Tour</h1>' in document
+    assert '&lt;b&gt;Tea&lt;/b&gt; &amp; cake' in document
+    assert 'Walls &lt;and&gt; minster' in document
+    # Itinerary bold still renders, around escaped text
+    assert '<strong>LNER</strong> to &lt;York&gt;' in document
+    assert 'Book &lt;early&gt;' in document
+    assert '<York>' not in document and '<Chips>' not in document
+
+
+def test_a_pack_is_built_once_and_served_from_disk(tmp_path):
+    exporter = PackExporter(str(tmp_path), workers=1)
+    try:
+        key = exporter.submit(content())
+        state, path = wait(exporter, key)
+        assert state == 'ready'
+        with open(path, encoding='utf-8') as f:
+            assert f.read().startswith('<!DOCTYPE html>')
+        assert exporter.submit(content()) == key
+        assert exporter.status(key) == ('ready', path)
+    finally:
+        exporter.shutdown()
+
+
+def test_status_reports_a_failed_build(tmp_path):
+    exporter = PackExporter(str(tmp_path), workers=1)
+    try:
+        key = exporter.submit(content(rates_version='1999-01-01'))
+        state, message = wait(exporter, key)
+        assert state == 'failed'
+        assert 'rates-1999-01-01.csv' in message
+        # Still failed when asked again, and no pack was left behind
+        assert exporter.status(key)[0] == 'failed'
+        assert not list(tmp_path.glob('*.html'))
+        with pytest.raises(ValueError):
+            exporter.submit(content(), fmt='docx')
+    finally:
+        exporter.shutdown()
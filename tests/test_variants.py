@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pytest
+
+from trip_planner.itinerary import Event, ItineraryDay, Location
+from trip_planner.ledger import CATEGORIES
+from trip_planner.variants import VariantSpace, pareto_front
+
+LOCATIONS = {
+    'London': {"coords": [51.5074, -0.1278]},
+    'York': {"coords": [53.9590, -1.0815]},
+    'Edinburgh': {"coords": [55.9533, -3.1883]},
+    'Inverness': {"coords": [57.4778, -4.2247]},
+}
+
+
+def day(number, *places):
+    events = tuple(Event(f"{9 + i}:00", f"Visit {place}", Location(place)) for i, place in enumerate(places))
+    return ItineraryDay(number, '', f"Day {number}", '', events=events)
+
+
+ITINERARY = (day(1, 'London'), day(2, 'York'), day(3, 'Edinburgh'), day(4, 'Inverness'), day(5, 'London'))
+
+
+def day_costs():
+    costs = np.zeros((len(ITINERARY), len(CATEGORIES)))
+    costs[:, CATEGORIES.index('Accommodation')] = [100, 80, 90, 70, 0]
+    costs[:, CATEGORIES.index('Transport')] = [10, 40, 40, 30, 120]
+    costs[:, CATEGORIES.index('Food')] = 30
+    costs[0, CATEGORIES.index('Flight')] = 600
+    return costs
+
+
+def test_pareto_front_drops_dominated_variants():
+    cost = np.array([100, 90, 120, 95, 90])
+    distance = np.array([50, 60, 40, 70, 60])
+    changes = np.array([2, 2, 1, 2, 3])
+    # 3 is beaten by 1 on every score; 4 ties 1 except for more changes
+    assert pareto_front(cost, distance, changes).tolist() == [1, 0, 2]
+
+
+def test_pareto_front_counts_equal_scores_once():
+    cost, distance, changes = np.array([10.0, 10.001, 10.0]), np.array([5.0, 5.0, 5.04]), np.array([1, 1, 1])
+    assert len(pareto_front(cost, distance, changes)) == 1
+
+
+def test_pareto_front_with_one_objective_is_the_cheapest():
+    cost = np.array([30.0, 10.0, 20.0, 10.0])
+    assert pareto_front(cost, np.zeros(4), np.zeros(4, dtype=int)).tolist() == [1]
+
+
+def test_planned_variant_costs_what_the_ledger_says():
+    space = VariantSpace(ITINERARY, LOCATIONS, day_costs())
+    cost, distance, changes = space.score(*space.planned())
+    costs = day_costs()
+    assert cost[0] == pytest.approx(costs.sum() - costs[:, CATEGORIES.index('Flight')].sum())
+    assert changes[0] == 3
+    assert distance[0] > 0
+
+
+def test_every_variant_is_enumerated_under_the_limit():
+    space = VariantSpace(ITINERARY, LOCATIONS, day_costs())
+    orders, nights = space.variants(max_swaps=1)
+    # 3! orders of the middle days, each with no swap or one of 4 nights moved to one of 4 places
+    assert len(orders) == 1 + math.factorial(3) * (1 + 4 * 4)
+    assert (orders[:, 0] == 0).all() and (orders[:, -1] == 4).all()
+    assert len({tuple(order) for order in orders}) == math.factorial(3)
+
+
+def test_variants_are_sampled_over_the_limit():
+    space = VariantSpace(ITINERARY, LOCATIONS, day_costs())
+    orders, nights = space.variants(pinned=(1,), max_swaps=2, limit=50, seed=3)
+    assert orders.shape == (51, 5) and nights.shape == (51, 4)
+    assert (orders[:, 0] == 0).all()
+    assert all(sorted(order) == list(range(5)) for order in orders.tolist())
+    # Only the nights picked for a swap differ from where the moved days planned to sleep
+    moved = (nights != space.last[orders[:, :-1]]).sum(axis=1)
+    assert moved.max() <= 2
+    again = space.variants(pinned=(1,), max_swaps=2, limit=50, seed=3)
+    assert np.array_equal(orders, again[0]) and np.array_equal(nights, again[1])
+
+
+def test_search_puts_the_plan_in_the_table():
+    table, scored = VariantSpace(ITINERARY, LOCATIONS, day_costs()).search()
+    assert scored == 1 + math.factorial(3) * 17
+    assert list(table['Cost']) == sorted(table['Cost'])
+    assert table['Day Order'].str.startswith('1 → ').all()
+
+
+def test_unusable_trips_are_refused():
+    with pytest.raises(ValueError, match="expected 5"):
+        VariantSpace(ITINERARY, LOCATIONS, day_costs()[:4])
+    with pytest.raises(ValueError, match="Day 2 has no events at a mapped location"):
+        VariantSpace((day(1, 'London'), day(2, 'Paris')), LOCATIONS, np.zeros((2, len(CATEGORIES))))
@@ -0,0 +1 @@
+"""Supporting code for the UK travel planner Streamlit app."""
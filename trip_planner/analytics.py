@@ -0,0 +1,120 @@
+"""Cost analytics over the ledger: one small summary frame and the charts drawn from it.
+
+``cost_summary`` folds every line item into one row per (day, category,
+city) with its party total, flights excluded like the other totals. Each
+chart is then a group-by of that frame, so thousands of line items cost a
+single aggregation pass however many views are drawn. A line's city is the
+location of the itinerary event it pays for, or else where that day ends.
+
+Charts are built with ``plotly.graph_objects`` straight from the aggregated
+arrays; ``summary_key`` hashes the numbers so a caller can cache a figure
+for as long as they don't change.
+"""
+import hashlib
+
+from .imports import lazy_import
+from .ledger import EXCLUDED_CATEGORIES
+
+UNASSIGNED = "Unassigned"
+
+
+def line_cities(days, itinerary):
+    """``({day: city}, {(day, activity): city})`` for placing ledger lines on the map.
+
+    Ledger days match itinerary days by label (``ItineraryDay.ledger_day``),
+    so renamed, reordered or unplanned days never take another day's city; a
+    day's city is where its last located event happens. Events linked to a
+    line item place that line.
+    """
+    planned = {itinerary_day.ledger_day: itinerary_day for itinerary_day in itinerary if itinerary_day.ledger_day}
+    day_city = {}
+    for day in days:
+        itinerary_day = planned.get(day)
+        if itinerary_day is None:
+            continue
+        located = [event.location.name for event in itinerary_day.events if event.location]
+        if located:
+            day_city[day] = located[-1]
+    linked = {(event.cost.day, event.cost.activity): event.location.name
+              for itinerary_day in itinerary for event in itinerary_day.events
+              if event.cost and event.location}
+    return day_city, linked
+
+
+def cost_summary(lines, itinerary):
+    """Party totals per (Day, Category, City) from a ``CostLedger.frame()``, in day order."""
+    pd = lazy_import('pandas')
+    lines = lines[~lines['Category'].isin(EXCLUDED_CATEGORIES)]
+    day_city, linked = line_cities(lines['Day'].cat.categories, itinerary)
+    city = lines['Day'].map(day_city).astype(object).fillna(UNASSIGNED)
+    if linked:
+        keys = pd.MultiIndex.from_arrays([lines['Day'].astype(str), lines['Activity']])
+        link = pd.Series(keys.map(linked.get), index=lines.index)
+        city = link.where(link.notna(), city)
+    summary = lines.assign(City=pd.Categorical(city)).groupby(
+        ['Day', 'Category', 'City'], observed=True, sort=True,
+    )['Party Total'].agg(['sum', 'size']).reset_index()
+    return summary.rename(columns={'sum': 'Total', 'size': 'Items'})
+
+
+def summary_key(summary):
+    """Hash of a summary's labels and numbers, for caching figures drawn from it."""
+    pd = lazy_import('pandas')
+    return hashlib.sha1(pd.util.hash_pandas_object(summary, index=False).values.tobytes()).hexdigest()
+
+
+def _layout(fig, title, **layout):
+    fig.update_layout(title=title, margin={'l': 10, 'r': 10, 't': 50, 'b': 10}, **layout)
+    return fig
+
+
+def daily_figure(summary, symbol):
+    """Stacked bars of each day's cost by category."""
+    go = lazy_import('plotly.graph_objects')
+    table = summary.groupby(['Day', 'Category'], observed=False)['Total'].sum().unstack(fill_value=0.0)
+    table = table.loc[:, table.sum() > 0]
+    days = table.index.astype(str)
+    fig = go.Figure([
+        go.Bar(name=category, x=days, y=table[category].to_numpy(),
+               hovertemplate=f"%{{x}}<br>{category}: {symbol}%{{y:,.2f}}<extra></extra>")
+        for category in table.columns
+    ])
+    return _layout(fig, "Cost per Day", barmode='stack', yaxis_tickprefix=symbol)
+
+
+def cumulative_figure(summary, symbol):
+    """Running total of spend across the trip's days."""
+    go = lazy_import('plotly.graph_objects')
+    per_day = summary.groupby('Day', observed=False)['Total'].sum()
+    fig = go.Figure(go.Scatter(
+        x=per_day.index.astype(str), y=per_day.cumsum().to_numpy(), mode='lines+markers', fill='tozeroy',
+        hovertemplate=f"%{{x}}<br>Spent so far: {symbol}%{{y:,.2f}}<extra></extra>",
+    ))
+    return _layout(fig, "Cumulative Spend", yaxis_tickprefix=symbol)
+
+
+def city_figure(summary, symbol):
+    """Total cost per city, largest at the top."""
+    go = lazy_import('plotly.graph_objects')
+    per_city = summary.groupby('City', observed=True)['Total'].sum().sort_values()
+    fig = go.Figure(go.Bar(
+        x=per_city.to_numpy(), y=per_city.index.astype(str), orientation='h',
+        hovertemplate=f"%{{y}}: {symbol}%{{x:,.2f}}<extra></extra>",
+    ))
+    return _layout(fig, "Cost per City", xaxis_tickprefix=symbol)
+
+
+def budget_figure(budget, symbol):
+    """Share of each Cost Calculator budget line, as a pie; ``budget`` is ``{name: amount}``."""
+    go = lazy_import('plotly.graph_objects')
+    fig = go.Figure(go.Pie(labels=list(budget), values=list(budget.values())))
+    return _layout(fig, "Cost Distribution per Person")
+
+
+# View name -> figure builder taking (data, currency symbol)
+FIGURES = {
+    'Budget split': budget_figure,
+    'Cost per day': daily_figure,
+    'Cumulative spend': cumulative_figure,
+    'Cost per city': city_figure,
+}
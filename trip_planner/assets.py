@@ -0,0 +1,80 @@
+"""Pre-sized photo variants served through Streamlit's static file route.
+
+The source photo is decoded once at a reduced scale and written out as a small
+sidebar thumbnail and a full-width background, each as WebP and progressive
+JPEG. File names carry the source's content hash, so a URL never changes
+meaning and browsers can keep it cached for as long as they like.
+"""
+import hashlib
+import os
+
+from .imports import lazy_import
+
+# Streamlit serves <script dir>/static at this URL prefix when
+# server.enableStaticServing is on (see .streamlit/config.toml)
+STATIC_URL = "app/static"
+ASSET_SUBDIR = "assets"
+
+# name -> longest edge in pixels
+VARIANT_SIZES = {
+    'thumbnail': 480,
+    'background': 1920,
+}
+
+# format -> (extension, save options)
+VARIANT_FORMATS = {
+    'WEBP': ('webp', {'quality': 80, 'method': 4}),
+    'JPEG': ('jpg', {'quality': 78, 'optimize': True, 'progressive': True}),
+}
+
+
+def file_digest(path):
+    """Return a short SHA-256 hex digest of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def decode_reduced(path, longest_edge):
+    """Open an image, letting JPEG decode at the smallest scale still >= ``longest_edge``."""
+    image = lazy_import('PIL.Image').open(path)
+    scale = longest_edge / max(image.size)
+    if scale < 1:
+        image.draft('RGB', (int(image.width * scale) + 1, int(image.height * scale) + 1))
+    image = lazy_import('PIL.ImageOps').exif_transpose(image)
+    return image.convert('RGB')
+
+
+def build_variants(source_path, static_dir):
+    """Write every size/format variant of ``source_path`` under ``static_dir``.
+
+    Returns ``{variant: {format: url}}`` with URLs relative to the app root.
+    Variants that already exist for this content hash are not re-encoded.
+    """
+    digest = file_digest(source_path)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    out_dir = os.path.join(static_dir, ASSET_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    image = None
+    urls = {}
+    for variant, longest_edge in VARIANT_SIZES.items():
+        urls[variant] = {}
+        resized = None
+        for fmt, (ext, options) in VARIANT_FORMATS.items():
+            filename = f"{stem}-{variant}-{digest}.{ext}"
+            target = os.path.join(out_dir, filename)
+            if not os.path.exists(target):
+                if image is None:
+                    image = decode_reduced(source_path, max(VARIANT_SIZES.values()))
+                if resized is None:
+                    resized = image.copy()
+                    resized.thumbnail((longest_edge, longest_edge), lazy_import('PIL.Image').LANCZOS)
+                # Write then rename so a concurrent request never sees a partial file
+                tmp = target + '.tmp'
+                resized.save(tmp, fmt, **options)
+                os.replace(tmp, target)
+            urls[variant][fmt] = f"{STATIC_URL}/{ASSET_SUBDIR}/{filename}"
+    return urls
@@ -0,0 +1,208 @@
+"""Rerun latency of the Streamlit app under scripted interactions, at several trip sizes.
+
+Each size is a trip of that many line items (five a day, and at least as
+many days as the default trip) and the default map locations, saved to a
+fresh database. The app is driven
+headless with ``streamlit.testing``'s ``AppTest``: load, edit every Cost
+Calculator budget, switch the price table's day, turn on edit mode and add
+an activity. Every step's rerun is timed; after a warm-up run the scenario
+is repeated and the median kept. One more run, traced, records each step's
+peak memory.
+
+Results are ``{size: {step: {'seconds', 'peak_mb'}}}`` and can be stored as
+baselines. A later run regresses when a step is slower than its baseline by
+more than the relative threshold and by more than ``MIN_REGRESSION_SECONDS``,
+which keeps millisecond noise from failing a run.
+
+Timings only compare on the machine they were taken on, so baselines are
+machine-local: ``benchmarks/baselines.json`` is git-ignored and written by
+``bench --update-baselines``. Without one, a run reports but can't regress.
+"""
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from .defaults import DEFAULT_COST_DATA, DEFAULT_DAILY_COSTS
+from .pricing import DEFAULT_PARTY
+from .route_map import LOCATIONS
+from .store import TripStore
+
+DEFAULT_SIZES = (8, 100, 1_000, 10_000)
+ITEMS_PER_DAY = 5
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 0.25
+MIN_REGRESSION_SECONDS = 0.02
+APP_TIMEOUT = 600
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'baselines.json')
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uk_travel_planner.py')
+
+BUDGET_LABELS = (
+    "Flights (return per person)", "London Hotels", "Scotland Hotels", "All Transport",
+    "Attraction Entries", "Food Budget", "Shopping", "Emergency Fund",
+)
+
+
+def scaled_daily_costs(line_items):
+    """``line_items`` copies of the default line items, cycled, spread over days of ``ITEMS_PER_DAY``."""
+    template = [activity for activities in DEFAULT_DAILY_COSTS.values() for activity in activities]
+    days = max(len(DEFAULT_DAILY_COSTS), -(-line_items // ITEMS_PER_DAY))
+    daily_costs = {f"Day {number}": [] for number in range(1, days + 1)}
+    labels = list(daily_costs)
+    for i in range(line_items):
+        daily_costs[labels[i * days // line_items]].append(dict(template[i % len(template)]))
+    return daily_costs
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _tab(at, emoji):
+    return next(tab.label for tab in at.tabs if tab.label.startswith(emoji))
+
+
+def _scenario(at):
+    """Yield ``(step name, action)`` pairs; each action changes widgets before a rerun."""
+    yield 'load', lambda: None
+    yield 'open cost calculator', lambda: at.session_state.__setitem__('active_tab', _tab(at, "💰"))
+    for label in BUDGET_LABELS:
+        def edit(label=label):
+            widget = _widget(at.number_input, label)
+            widget.set_value(widget.value + 25)
+        yield f"edit {label}", edit
+    yield 'open price tables', lambda: at.session_state.__setitem__('active_tab', _tab(at, "📊"))
+    yield 'switch day', lambda: _widget(at.selectbox, "Select Day to Edit/View").set_value(
+        _widget(at.selectbox, "Select Day to Edit/View").options[-1])
+    yield 'edit mode on', lambda: _widget(at.toggle, "✏️ Edit Price Table").set_value(True)
+
+    def add_activity():
+        _widget(at.text_input, "Activity Name").set_value("Benchmark Activity")
+        _widget(at.number_input, "Unit Price").set_value(12.5)
+        _widget(at.button, "Add Activity").click()
+    yield 'add activity', add_activity
+
+
+def run_scenario(trip_id, trace_memory=False):
+    """Play the scenario once against the current database.
+
+    Returns ``{step: seconds}``, or with ``trace_memory`` ``{step: peak
+    bytes}`` allocated above the step's starting point. Tracing slows Python
+    down several times over, so time and memory come from separate runs.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=APP_TIMEOUT)
+    at.query_params['trip'] = str(trip_id)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        measured = {}
+        for step, action in _scenario(at):
+            if step != 'load':
+                action()
+            if trace_memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            at.run()
+            seconds = time.perf_counter() - started
+            if at.exception:
+                raise RuntimeError(f"{step}: {at.exception[0].message}")
+            measured[step] = tracemalloc.get_traced_memory()[1] - before if trace_memory else seconds
+        return measured
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+
+def benchmark_size(line_items, repeats=DEFAULT_REPEATS):
+    """Median seconds and peak MB per step for a trip of ``line_items`` line items."""
+    import streamlit as st
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'trips.sqlite3')
+        store = TripStore(db_path)
+        trip_id = store.create_trip(f"Benchmark {line_items}", date(2024, 12, 25), date(2025, 1, 1), DEFAULT_PARTY,
+                                    DEFAULT_COST_DATA, scaled_daily_costs(line_items), LOCATIONS)
+        store.close()
+        previous = os.environ.get('TRIP_DB_PATH')
+        os.environ['TRIP_DB_PATH'] = db_path
+        try:
+            runs = []
+            # The first run pays for the process's one-off imports and is dropped
+            for trace_memory in [False] * (repeats + 1) + [True]:
+                # The store and caches are per process; start each scenario cold
+                st.cache_resource.clear()
+                st.cache_data.clear()
+                runs.append(run_scenario(trip_id, trace_memory))
+        finally:
+            st.cache_resource.clear()
+            if previous is None:
+                os.environ.pop('TRIP_DB_PATH', None)
+            else:
+                os.environ['TRIP_DB_PATH'] = previous
+    timed, memory = runs[1:-1], runs[-1]
+    return {
+        step: {
+            'seconds': round(statistics.median(run[step] for run in timed), 4),
+            'peak_mb': round(memory[step] / 2**20, 2),
+        }
+        for step in memory
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS, progress=None):
+    """``{size: step results}`` for every size; ``progress(size)`` is called before each."""
+    # Streamlit warns about bare mode and deprecations on every rerun and resets
+    # its loggers' levels as it goes; mute warnings outright to keep the report readable
+    logging.disable(logging.WARNING)
+    try:
+        results = {}
+        for size in sizes:
+            if progress:
+                progress(size)
+            results[str(size)] = benchmark_size(size, repeats)
+        return results
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def load_baselines(path=BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results, path=BASELINE_PATH):
+    """Merge ``results`` into the baselines at ``path``, replacing the sizes they cover."""
+    baselines = {**load_baselines(path), **results}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def regressions(results, baselines, threshold=DEFAULT_THRESHOLD):
+    """Messages for steps slower than their baseline by more than ``threshold`` (0.25 = 25%)."""
+    found = []
+    for size, steps in results.items():
+        for step, result in steps.items():
+            baseline = baselines.get(size, {}).get(step)
+            if baseline is None:
+                continue
+            slower = result['seconds'] - baseline['seconds']
+            if slower > MIN_REGRESSION_SECONDS and result['seconds'] > baseline['seconds'] * (1 + threshold):
+                found.append(f"{size} items, {step}: {result['seconds'] * 1000:.0f} ms vs "
+                             f"{baseline['seconds'] * 1000:.0f} ms baseline (+{slower / baseline['seconds']:.0%})")
+    return found
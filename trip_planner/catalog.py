@@ -0,0 +1,238 @@
+"""A local catalog of attractions with type-ahead search and "what's near" lookups.
+
+The catalog is read once from ``data/attractions.csv`` (or a JSON list of
+the same fields; ``TRIP_CATALOG_PATH`` points at another file) and indexed
+three ways so a lookup never scans it:
+
+* names, and every tail of a name starting at a word, sorted for prefix
+  search with ``bisect``: "edin" finds Edinburgh Castle, "lond" the London
+  Eye;
+* word trigrams mapped to arrays of attraction ids, so a misspelt query
+  ("edinbrugh castel") is scored against only the names sharing a trigram
+  with it, counted in one ``np.bincount``;
+* a grid of ``CELL_DEGREES`` cells, with attractions sorted by cell. A grid
+  row is a contiguous run of that order, so a radius search reads one slice
+  per row of its bounding box and measures just those candidates.
+"""
+import bisect
+import csv
+import json
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+
+from .routing import haversine
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'attractions.csv')
+
+# Grid cells are about 11 km tall; a search box wider than MAX_CELLS measures everything instead
+CELL_DEGREES = 0.1
+MAX_CELLS = 4096
+_COLUMNS = math.ceil(360 / CELL_DEGREES) + 1
+KM_PER_DEGREE = 111.2
+
+# Prefix matches read at most this many index entries; fuzzy matches need this share of trigrams
+PREFIX_SCAN = 256
+MIN_SIMILARITY = 0.5
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class Attraction:
+    """One place to visit; ``price`` is the adult entry price in ``currency`` (0 if free)."""
+
+    name: str
+    town: str
+    category: str
+    lat: float
+    lon: float
+    price: float = 0.0
+    currency: str = 'GBP'
+    opening_hours: str = ''
+    visit_time: str = ''
+    best_time: str = ''
+    description: str = ''
+    highlights: tuple = ()
+
+    @property
+    def coords(self):
+        return [self.lat, self.lon]
+
+    def info(self):
+        """The description, highlights and timings shown for a place, e.g. in the trip pack."""
+        return {'description': self.description, 'highlights': list(self.highlights),
+                'visit_time': self.visit_time, 'best_time': self.best_time}
+
+
+def normalize(text):
+    """Lower-case ASCII words of ``text`` joined by single spaces: "St Paul's Café" -> "st pauls cafe"."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return ' '.join(_WORD.findall(text.replace("'", '')))
+
+
+def _cells(lat, lon):
+    """Grid cell keys, numbered row by row from the south-west corner of the globe."""
+    rows = np.floor((np.asarray(lat) + 90) / CELL_DEGREES).astype(np.int64)
+    cols = np.floor((np.asarray(lon) + 180) / CELL_DEGREES).astype(np.int64)
+    return rows * _COLUMNS + cols
+
+
+def trigrams(text):
+    """Trigrams of each normalized word, padded so word starts and ends count too."""
+    return {f"  {word} "[i:i + 3] for word in text.split() for i in range(len(word) + 1)}
+
+
+class AttractionCatalog:
+    """Attractions indexed by name prefix, name trigrams and location."""
+
+    def __init__(self, attractions):
+        self.attractions = list(attractions)
+        names = [normalize(attraction.name) for attraction in self.attractions]
+        self._ids = {}
+        for i, name in enumerate(names):
+            self._ids.setdefault(name, i)
+        self._name_lengths = np.array([len(name) for name in names])
+
+        # (tail of a name from one of its words, id, whether it's the whole name), sorted by tail
+        tails = sorted((name[start:], i, start == 0) for i, name in enumerate(names)
+                       for start in [0] + [m.start() + 1 for m in re.finditer(' ', name)])
+        self._tails = [tail for tail, _, _ in tails]
+        self._tail_ids = [(i, whole) for _, i, whole in tails]
+
+        postings = {}
+        gram_counts = np.zeros(len(names), dtype=np.int32)
+        for i, name in enumerate(names):
+            grams = trigrams(name)
+            gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = gram_counts
+
+        self._coords = np.array([[a.lat, a.lon] for a in self.attractions], dtype=np.float64).reshape(-1, 2)
+        cells = _cells(self._coords[:, 0], self._coords[:, 1])
+        self._by_cell = np.argsort(cells, kind='stable')
+        self._cell_keys = cells[self._by_cell]
+
+    def __len__(self):
+        return len(self.attractions)
+
+    def __iter__(self):
+        return iter(self.attractions)
+
+    def get(self, name):
+        """The attraction called ``name`` (case and punctuation aside), or None."""
+        i = self._ids.get(normalize(name))
+        return None if i is None else self.attractions[i]
+
+    def place_info(self, names):
+        """``{name: Attraction.info()}`` for each of ``names`` the catalog has."""
+        found = {name: self.get(name) for name in names}
+        return {name: attraction.info() for name, attraction in found.items() if attraction is not None}
+
+    # Search by name
+
+    def search(self, query, limit=10):
+        """Best matches for a partly typed or misspelt name, best first.
+
+        Names starting with the query rank first, then names with a word
+        starting with it; ties go to the shorter name. Only if that finds
+        fewer than ``limit`` are names merely similar to the query added.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        scores = {}
+        start = bisect.bisect_left(self._tails, query)
+        for tail, (i, whole) in zip(self._tails[start:start + PREFIX_SCAN], self._tail_ids[start:start + PREFIX_SCAN]):
+            if not tail.startswith(query):
+                break
+            scores[i] = max(scores.get(i, 0.0), 2.0 if whole else 1.0)
+        if len(scores) < limit:
+            for i, similarity in self._similar(query, limit):
+                scores.setdefault(i, similarity)
+        best = sorted(scores, key=lambda i: (-scores[i], self._name_lengths[i], i))[:limit]
+        return [self.attractions[i] for i in best]
+
+    def _similar(self, query, limit):
+        """The ``limit`` best ``(id, share of the query's trigrams in the name)``, of those with ``MIN_SIMILARITY``."""
+        grams = trigrams(query)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        # Too few known trigrams left for any name to reach the threshold
+        if len(postings) < MIN_SIMILARITY * len(grams):
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.attractions))
+        candidates = np.flatnonzero(shared >= MIN_SIMILARITY * len(grams))
+        candidates = candidates[np.lexsort((self._name_lengths[candidates], -shared[candidates]))[:limit]]
+        return zip(candidates.tolist(), (shared[candidates] / len(grams)).tolist())
+
+    # Search by location
+
+    def _candidates(self, lat, lon, km):
+        """Ids of attractions in the grid cells covering ``km`` around a point."""
+        dlat = km / KM_PER_DEGREE
+        dlon = km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        row0, col0 = divmod(int(_cells(lat - dlat, lon - dlon)), _COLUMNS)
+        row1, col1 = divmod(int(_cells(lat + dlat, lon + dlon)), _COLUMNS)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > MAX_CELLS:
+            return np.arange(len(self.attractions))
+        # Each grid row of the box is one run of cell keys, so one slice of the sorted ids
+        row_keys = np.arange(row0, row1 + 1) * _COLUMNS
+        starts = np.searchsorted(self._cell_keys, row_keys + col0, side='left')
+        ends = np.searchsorted(self._cell_keys, row_keys + col1, side='right')
+        return np.concatenate([self._by_cell[s:e] for s, e in zip(starts, ends)] or [np.zeros(0, dtype=np.intp)])
+
+    def near(self, lat, lon, km=25.0, limit=10):
+        """``(attraction, km away)`` pairs within ``km`` of a point, nearest first."""
+        ids = self._candidates(lat, lon, km)
+        distances = haversine(self._coords[ids], [lat, lon])
+        inside = distances <= km
+        ids, distances = ids[inside], distances[inside]
+        order = np.argpartition(distances, limit)[:limit] if limit < len(distances) else np.arange(len(distances))
+        order = order[np.argsort(distances[order], kind='stable')]
+        return [(self.attractions[i], float(distances[j])) for j, i in zip(order, ids[order])]
+
+    def near_place(self, name, km=25.0, limit=10):
+        """``near`` the attraction or town called ``name``, leaving it out; [] if the catalog hasn't got it."""
+        place = self.get(name)
+        if place is None:
+            return []
+        return [(attraction, distance) for attraction, distance in self.near(place.lat, place.lon, km, limit + 1)
+                if attraction is not place][:limit]
+
+
+def _attraction(record):
+    """An ``Attraction`` from a CSV row or JSON object; CSV highlights are separated by ``|``."""
+    highlights = record.get('highlights') or ()
+    if isinstance(highlights, str):
+        highlights = [highlight.strip() for highlight in highlights.split('|') if highlight.strip()]
+    return Attraction(
+        name=record['name'].strip(),
+        town=(record.get('town') or '').strip(),
+        category=(record.get('category') or '').strip(),
+        lat=float(record['lat']),
+        lon=float(record['lon']),
+        price=float(record.get('price') or 0.0),
+        currency=(record.get('currency') or 'GBP').strip(),
+        opening_hours=record.get('opening_hours') or '',
+        visit_time=record.get('visit_time') or '',
+        best_time=record.get('best_time') or '',
+        description=record.get('description') or '',
+        highlights=tuple(highlights),
+    )
+
+
+def load_catalog(path=None):
+    """Read and index a catalog from CSV or JSON (by extension); ``TRIP_CATALOG_PATH`` or the bundled file by default."""
+    path = path or os.environ.get('TRIP_CATALOG_PATH', CATALOG_PATH)
+    with open(path, newline='', encoding='utf-8') as f:
+        records = json.load(f) if path.endswith('.json') else list(csv.DictReader(f))
+    try:
+        return AttractionCatalog(_attraction(record) for record in records)
+    except (KeyError, ValueError) as error:
+        raise ValueError(f"{path}: bad attraction record ({error})") from error
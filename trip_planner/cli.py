@@ -0,0 +1,174 @@
+"""Command-line pricing and validation of trip files.
+
+    python -m trip_planner price trips/ --currency GBP --format csv -o prices.csv
+    python -m trip_planner validate trips/*.json
+    python -m trip_planner startup
+    python -m trip_planner bench --sizes 8 100 --update-baselines
+    python -m trip_planner catalog "fort william" --near 30
+
+``price`` writes one result per file (JSON lines by default); ``validate``
+prints the issues found. Both exit with status 1 if any file had issues or
+could not be read. ``startup`` shows how long the app's top-level imports
+take in a fresh interpreter, per package. ``bench`` times the app's reruns
+under scripted interactions and exits with status 1 on a regression against
+this machine's baselines, recorded with ``--update-baselines``. ``catalog``
+searches the attraction catalog by name and, with ``--near``, lists what is
+within that many km of the best match, timing each lookup.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from .benchmark import (
+    BASELINE_PATH, DEFAULT_REPEATS, DEFAULT_SIZES, DEFAULT_THRESHOLD, load_baselines, regressions, run_benchmarks,
+    save_baselines
+)
+from .catalog import load_catalog
+from .core import HOME_CURRENCY, evaluate_files, find_trip_files
+from .currency import BASE_CURRENCY
+from .imports import default_script, startup_profile, top_level_imports
+
+CSV_FIELDS = (
+    'file', 'name', 'days', 'line_items', 'party_size', 'currency', 'flights_total', 'daily_total',
+    'grand_total', 'per_person', 'home_currency', 'home_grand_total', 'issues', 'error',
+)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m trip_planner', description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('price', 'price trip files'), ('validate', 'check trip files for problems')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('paths', nargs='+', help='JSON/CSV trip files or directories of them')
+        command.add_argument('--currency', default=BASE_CURRENCY, help='currency for totals (default %(default)s)')
+        command.add_argument('--home-currency', default=HOME_CURRENCY,
+                             help='second currency for the grand total (default %(default)s)')
+        command.add_argument('--rates-version', help='exchange-rate snapshot date (default: newest)')
+        command.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+        command.add_argument('--chunk-size', type=int, default=64, help='files per worker task (default %(default)s)')
+    commands.choices['price'].add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    commands.choices['price'].add_argument('-o', '--output', help='write results here instead of stdout')
+    startup = commands.add_parser('startup', help='time the app\'s imports per package')
+    startup.add_argument('modules', nargs='*', help='modules to time instead of the app\'s top-level imports')
+    startup.add_argument('--script', default=default_script(), help='app script to read imports from')
+    startup.add_argument('--top', type=int, default=15, help='packages to list (default %(default)s)')
+    bench = commands.add_parser('bench', help='time app reruns at several trip sizes')
+    bench.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                       help='line items per trip (default %(default)s)')
+    bench.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='scenario runs per size (default %(default)s)')
+    bench.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help='allowed slowdown over the baseline, as a fraction (default %(default)s)')
+    bench.add_argument('--baselines', default=BASELINE_PATH, help='baseline file (default %(default)s)')
+    bench.add_argument('--update-baselines', action='store_true', help='store these results as the new baselines')
+    bench.add_argument('-o', '--output', help='also write the results here as JSON')
+    catalog = commands.add_parser('catalog', help='search the attraction catalog by name or distance')
+    catalog.add_argument('query', help='name, or part of one; misspellings are fine')
+    catalog.add_argument('--near', type=float, metavar='KM', help='list attractions within KM of the best match')
+    catalog.add_argument('--limit', type=int, default=10, help='results to show (default %(default)s)')
+    catalog.add_argument('--catalog', help='CSV/JSON catalog file (default: TRIP_CATALOG_PATH or the bundled one)')
+    return parser
+
+
+def _write_results(results, out, fmt):
+    failed = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+    for result in results:
+        failed += bool(result.get('error') or result.get('issues'))
+        if fmt == 'csv':
+            writer.writerow({**result, 'issues': '; '.join(result.get('issues', []))})
+        else:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+    return failed
+
+
+def _report_issues(results, out):
+    failed = checked = 0
+    for result in results:
+        checked += 1
+        problems = result.get('issues', []) + ([result['error']] if 'error' in result else [])
+        if problems:
+            failed += 1
+            out.write(f"{result['file']}:\n" + ''.join(f"  - {problem}\n" for problem in problems))
+    out.write(f"{checked - failed} of {checked} trip file(s) OK\n")
+    return failed
+
+
+def _report_startup(modules, script, top, out):
+    profile = startup_profile(modules, cwd=os.path.dirname(os.path.abspath(script)))
+    total = sum(seconds for _, seconds in profile)
+    for package, seconds in profile[:top]:
+        out.write(f"{seconds * 1000:8.1f} ms  {seconds / total:6.1%}  {package}\n")
+    out.write(f"{total * 1000:8.1f} ms  total for {len(modules)} module(s)\n")
+
+
+def _run_bench(args, out):
+    results = run_benchmarks(args.sizes, args.repeats,
+                             progress=lambda size: out.write(f"Benchmarking {size:,} line items...\n"))
+    baselines = load_baselines(args.baselines)
+    for size, steps in results.items():
+        out.write(f"\n{int(size):,} line items\n")
+        for step, result in steps.items():
+            baseline = baselines.get(size, {}).get(step)
+            versus = f"  (baseline {baseline['seconds'] * 1000:.0f} ms)" if baseline else ""
+            out.write(f"  {step:<45} {result['seconds'] * 1000:8.1f} ms {result['peak_mb']:8.1f} MB peak{versus}\n")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baselines:
+        save_baselines(results, args.baselines)
+        out.write(f"\nBaselines updated in {args.baselines}\n")
+        return 0
+    if not baselines:
+        out.write(f"\nNo baselines in {args.baselines}; run with --update-baselines to record them\n")
+    found = regressions(results, baselines, args.threshold)
+    out.write(''.join(f"REGRESSION {message}\n" for message in found))
+    return 1 if found else 0
+
+
+def _search_catalog(args, out):
+    started = time.perf_counter()
+    catalog = load_catalog(args.catalog)
+    out.write(f"Loaded {len(catalog):,} attractions in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+    started = time.perf_counter()
+    matches = catalog.search(args.query, args.limit)
+    out.write(f"\n{len(matches)} match(es) for {args.query!r} in {(time.perf_counter() - started) * 1000:.2f} ms\n")
+    for attraction in matches:
+        out.write(f"  {attraction.name} ({attraction.category}, {attraction.town})\n")
+    if args.near is None:
+        return 0
+    if not matches:
+        return 1
+    place = matches[0]
+    started = time.perf_counter()
+    nearby = catalog.near_place(place.name, args.near, args.limit)
+    out.write(f"\n{len(nearby)} within {args.near:g} km of {place.name} in {(time.perf_counter() - started) * 1000:.2f} ms\n")
+    for attraction, distance in nearby:
+        out.write(f"  {distance:6.1f} km  {attraction.name} ({attraction.category}, {attraction.town})\n")
+    return 0
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.command == 'startup':
+        _report_startup(args.modules or top_level_imports(args.script), args.script, args.top, sys.stdout)
+        return 0
+    if args.command == 'bench':
+        return _run_bench(args, sys.stdout)
+    if args.command == 'catalog':
+        return _search_catalog(args, sys.stdout)
+    paths = find_trip_files(args.paths)
+    results = evaluate_files(paths, args.currency, args.home_currency, args.rates_version,
+                             workers=args.workers, chunk_size=args.chunk_size)
+    if args.command == 'validate':
+        failed = _report_issues(results, sys.stdout)
+    elif args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as out:
+            failed = _write_results(results, out, args.format)
+    else:
+        failed = _write_results(results, sys.stdout, args.format)
+    return 1 if failed else 0
@@ -0,0 +1,186 @@
+"""Streamlit-free trip pricing and validation.
+
+Everything the app totals up can be computed here from plain data: a trip is
+a budget (``cost_data``), day-by-day line items in the ``daily_costs`` shape
+and a party. Trip files are JSON (either ``{"daily_costs": ..., "cost_data":
+..., "party": ...}`` or a bare ``daily_costs`` mapping) or CSV with one line
+item per row and a ``Day`` column. ``evaluate_files`` prices many files in
+parallel worker processes.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .currency import BASE_CURRENCY, load_rates
+from .defaults import DEFAULT_COST_DATA
+from .ledger import CATEGORIES, CostLedger
+from .pricing import DEFAULT_PARTY, PRICING_RULES, Party
+
+HOME_CURRENCY = 'INR'
+TRIP_FILE_EXTENSIONS = ('.json', '.csv')
+
+_NUMERIC_FIELDS = ('Unit Price', 'Individual', 'Total_4', 'Child Discount', 'Senior Discount')
+
+
+def trip_totals(cost_data, ledger, party, rates, currency=BASE_CURRENCY):
+    """Group totals in ``currency``: flights, daily costs (flights excluded) and both together.
+
+    The flight budget is per person in GBP, like every Cost Calculator field.
+    """
+    flights = cost_data['Flights'] * party.size * rates.rate(BASE_CURRENCY, currency)
+    daily = ledger.grand_total(party, rates, currency)
+    return {'flights': flights, 'daily': daily, 'grand': flights + daily}
+
+
+# Trip files
+
+def _read_csv(path):
+    daily_costs = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            day = row.pop('Day')
+            activity = {key: value for key, value in row.items() if value not in (None, '')}
+            for field in _NUMERIC_FIELDS:
+                if field in activity:
+                    activity[field] = float(activity[field])
+            daily_costs.setdefault(day, []).append(activity)
+    return {'daily_costs': daily_costs}
+
+
+def load_trip_file(path):
+    """Read a JSON or CSV trip file into ``{'name', 'cost_data', 'daily_costs', 'party'}``.
+
+    Missing budget fields fall back to the default trip's and a missing
+    party to the default party.
+    """
+    if path.lower().endswith('.csv'):
+        data = _read_csv(path)
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'daily_costs' not in data:
+            data = {'daily_costs': data}
+    party = data.get('party')
+    return {
+        'name': data.get('name') or os.path.splitext(os.path.basename(path))[0],
+        'cost_data': {**DEFAULT_COST_DATA, **data.get('cost_data', {})},
+        'daily_costs': data['daily_costs'],
+        'party': DEFAULT_PARTY if party is None else Party(**party),
+    }
+
+
+def find_trip_files(paths):
+    """Expand directories in ``paths`` to the trip files inside them, sorted."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names if name.lower().endswith(TRIP_FILE_EXTENSIONS)
+            ))
+        else:
+            found.append(path)
+    return found
+
+
+# Evaluation
+
+def validate_trip(trip, rates):
+    """Problems that would make a trip's totals wrong or unpriceable, as messages."""
+    issues = []
+    for name, amount in trip['cost_data'].items():
+        if amount < 0:
+            issues.append(f"Budget '{name}' is negative")
+    for day, activities in trip['daily_costs'].items():
+        if not activities:
+            issues.append(f"{day}: no line items")
+        for activity in activities:
+            label = f"{day}: {activity.get('Activity', '?')}"
+            if not any(field in activity for field in ('Unit Price', 'Individual', 'Total_4')):
+                issues.append(f"{label}: no price")
+            elif activity.get('Unit Price', activity.get('Individual', activity.get('Total_4'))) < 0:
+                issues.append(f"{label}: negative price")
+            if activity.get('Currency', BASE_CURRENCY) not in rates:
+                issues.append(f"{label}: no exchange rate for {activity['Currency']}")
+            if activity.get('Category', CATEGORIES[0]) not in CATEGORIES:
+                issues.append(f"{label}: unknown category {activity['Category']!r}")
+            if activity.get('Pricing', PRICING_RULES[0]) not in PRICING_RULES:
+                issues.append(f"{label}: unknown pricing rule {activity['Pricing']!r}")
+            for field in ('Child Discount', 'Senior Discount'):
+                if not 0 <= activity.get(field, 0) <= 1:
+                    issues.append(f"{label}: {field} must be a fraction between 0 and 1")
+    return issues
+
+
+def evaluate_trip(trip, rates, currency=BASE_CURRENCY, home_currency=HOME_CURRENCY):
+    """Validate and price one trip; amounts are in ``currency`` unless named for ``home_currency``.
+
+    A trip with issues is still priced where possible; one that can't be
+    priced at all comes back with no totals.
+    """
+    issues = validate_trip(trip, rates)
+    result = {'name': trip['name'], 'days': len(trip['daily_costs']), 'issues': issues}
+    try:
+        ledger = CostLedger.from_daily_costs(trip['daily_costs'])
+        party = trip['party']
+        totals = trip_totals(trip['cost_data'], ledger, party, rates, currency)
+    except (KeyError, ValueError, TypeError):
+        return result
+    result.update({
+        'line_items': len(ledger),
+        'party_size': party.size,
+        'currency': currency,
+        'flights_total': totals['flights'],
+        'daily_total': totals['daily'],
+        'grand_total': totals['grand'],
+        'per_person': party.per_person(totals['grand']),
+        'home_currency': home_currency,
+        'home_grand_total': totals['grand'] * rates.rate(currency, home_currency),
+        'day_totals': {day: ledger.day_total(day, party, rates, currency) for day in ledger.days},
+        'category_totals': ledger.category_totals(party, rates, currency),
+    })
+    return result
+
+
+# Parallel batch evaluation; each worker process loads the rates once
+
+_worker_rates = None
+
+
+def _init_worker(rates_version):
+    global _worker_rates
+    _worker_rates = load_rates(version=rates_version)
+
+
+def _evaluate_path(path, currency, home_currency):
+    try:
+        result = evaluate_trip(load_trip_file(path), _worker_rates, currency, home_currency)
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        result = {'error': f"{type(error).__name__}: {error}"}
+    return {'file': path, **result}
+
+
+def _evaluate_chunk(paths, currency, home_currency):
+    return [_evaluate_path(path, currency, home_currency) for path in paths]
+
+
+def evaluate_files(paths, currency=BASE_CURRENCY, home_currency=HOME_CURRENCY, rates_version=None,
+                   workers=None, chunk_size=64):
+    """Yield ``evaluate_trip`` results for trip files, in input order, using worker processes.
+
+    Files go to workers in chunks of ``chunk_size`` to keep inter-process
+    traffic low; ``workers=1`` evaluates in this process instead. Unreadable
+    files yield a result with an ``error`` message.
+    """
+    paths = list(paths)
+    if workers == 1 or len(paths) <= chunk_size:
+        _init_worker(rates_version)
+        for path in paths:
+            yield _evaluate_path(path, currency, home_currency)
+        return
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates_version,)) as pool:
+        for results in pool.map(_evaluate_chunk, chunks, [currency] * len(chunks), [home_currency] * len(chunks)):
+            yield from results
@@ -0,0 +1,82 @@
+"""Exchange rates from dated CSV snapshots and vectorized conversion.
+
+Snapshots live in ``data/rates/rates-YYYY-MM-DD.csv`` with columns
+``currency,symbol,per_gbp`` (units of the currency per £1). The date in the
+file name is the rate table's version; the newest snapshot is used unless a
+version is asked for.
+"""
+import csv
+import os
+import re
+
+import numpy as np
+
+BASE_CURRENCY = 'GBP'
+RATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'rates')
+
+_SNAPSHOT = re.compile(r'^rates-(\d{4}-\d{2}-\d{2})\.csv$')
+
+
+class RateTable:
+    """One snapshot of exchange rates, all quoted against GBP."""
+
+    def __init__(self, version, per_gbp, symbols=None):
+        self.version = version
+        self.codes = tuple(per_gbp)
+        self.per_gbp = np.array([per_gbp[code] for code in self.codes], dtype=np.float64)
+        self.symbols = dict(symbols or {})
+        self._index = {code: i for i, code in enumerate(self.codes)}
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def rate(self, source, target):
+        """How many ``target`` units one ``source`` unit buys."""
+        return float(self.per_gbp[self._index[target]] / self.per_gbp[self._index[source]])
+
+    def factors(self, codes, target):
+        """Conversion factor into ``target`` for each currency in ``codes``."""
+        index = np.array([self._index[code] for code in codes], dtype=np.intp)
+        return self.per_gbp[self._index[target]] / self.per_gbp[index]
+
+    def convert(self, amounts, codes, target):
+        """Convert ``amounts`` (each in the matching entry of ``codes``) into ``target``."""
+        unique, inverse = np.unique(np.asarray(codes), return_inverse=True)
+        return np.asarray(amounts, dtype=np.float64) * self.factors(unique, target)[inverse]
+
+    def format(self, amount, code, decimals=0):
+        """Format an amount with its currency symbol, e.g. ``£1,234``."""
+        return f"{self.symbols.get(code, code + ' ')}{amount:,.{decimals}f}"
+
+    def number_format(self, code, decimals=2):
+        """printf-style pattern for a table column of ``code`` amounts, e.g. ``£%.2f``."""
+        return self.symbols.get(code, code + ' ').replace('%', '%%') + f"%.{decimals}f"
+
+
+def available_versions(directory=RATES_DIR):
+    """Versions (snapshot dates) found in ``directory``, oldest first."""
+    versions = []
+    for name in os.listdir(directory):
+        match = _SNAPSHOT.match(name)
+        if match:
+            versions.append(match.group(1))
+    return sorted(versions)
+
+
+def load_rates(directory=RATES_DIR, version=None):
+    """Load the snapshot for ``version``, or the newest one."""
+    if version is None:
+        versions = available_versions(directory)
+        if not versions:
+            raise FileNotFoundError(f"No rates-YYYY-MM-DD.csv snapshots in {directory}")
+        version = versions[-1]
+    per_gbp = {}
+    symbols = {}
+    with open(os.path.join(directory, f'rates-{version}.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            code = row['currency'].strip().upper()
+            per_gbp[code] = float(row['per_gbp'])
+            symbols[code] = row.get('symbol') or code + ' '
+    if per_gbp.get(BASE_CURRENCY) != 1.0:
+        raise ValueError(f"rates-{version}.csv must quote {BASE_CURRENCY} at 1.0")
+    return RateTable(version, per_gbp, symbols)
@@ -0,0 +1,236 @@
+"""Default budget and day-by-day line items for the Christmas 2024 trip."""
+from datetime import date
+
+from .itinerary import CostLink, Event, ItineraryDay, Location
+
+# The trip every new database starts with
+DEFAULT_TRIP_NAME = "UK Epic Christmas Trip"
+DEFAULT_START_DATE = date(2024, 12, 25)
+DEFAULT_END_DATE = date(2025, 1, 1)
+
+# Per-person budget categories for the Cost Calculator
+DEFAULT_COST_DATA = {
+    'Flights': 600,
+    'London Accommodation (3 nights)': 300,
+    'Edinburgh/Highland Accommodation': 200,
+    'Transport (all trains/buses)': 180,
+    'Attractions': 150,
+    'Food Budget': 350,
+    'Shopping & Souvenirs': 200,
+    'Emergency Fund': 100
+}
+
+# Daily line items, priced per person in GBP unless 'Pricing' says otherwise
+DEFAULT_DAILY_COSTS = {
+    'Day 1 - Christmas London': [
+        {'Activity': 'Heathrow Express', 'Category': 'Transport', 'Unit Price': 25},
+        {'Activity': 'Tower Bridge (walk)', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Tower of London', 'Category': 'Attraction', 'Unit Price': 29.90},
+        {'Activity': 'London Eye', 'Category': 'Attraction', 'Unit Price': 32},
+        {'Activity': 'London Day Travel Card', 'Category': 'Transport', 'Unit Price': 15}
+    ],
+    'Day 2 - Boxing Day London': [
+        {'Activity': 'Buckingham Palace', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Hyde Park Winter Wonderland', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Ice Skating', 'Category': 'Attraction', 'Unit Price': 17},
+        {'Activity': 'London Day Travel Card', 'Category': 'Transport', 'Unit Price': 15}
+    ],
+    'Day 3 - Final London': [
+        {'Activity': 'The Shard', 'Category': 'Attraction', 'Unit Price': 32},
+        {'Activity': 'British Museum', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Chelsea FC Stadium', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Train to Northallerton', 'Category': 'Transport', 'Unit Price': 45},
+        {'Activity': 'London Day Travel Card', 'Category': 'Transport', 'Unit Price': 15}
+    ],
+    'Day 4 - Northern England': [
+        {'Activity': 'Train to Durham', 'Category': 'Transport', 'Unit Price': 15},
+        {'Activity': 'Durham Cathedral', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Train Durham-Newcastle', 'Category': 'Transport', 'Unit Price': 8},
+        {'Activity': 'Bus Newcastle-Whitby', 'Category': 'Transport', 'Unit Price': 12},
+        {'Activity': 'Whitby Abbey', 'Category': 'Attraction', 'Unit Price': 7.20},
+        {'Activity': 'Bus Whitby-Northallerton', 'Category': 'Transport', 'Unit Price': 10}
+    ],
+    'Day 5 - Edinburgh to Highlands': [
+        {'Activity': 'Train to Edinburgh', 'Category': 'Transport', 'Unit Price': 35},
+        {'Activity': 'Edinburgh Castle', 'Category': 'Attraction', 'Unit Price': 19.50},
+        {'Activity': 'Train Edinburgh-Fort William', 'Category': 'Transport', 'Unit Price': 45},
+        {'Activity': 'Fort William Accommodation', 'Category': 'Accommodation', 'Unit Price': 40}
+    ],
+    'Day 6 - Scottish Highlands': [
+        {'Activity': 'Highland Day Tour', 'Category': 'Attraction', 'Unit Price': 65},
+        {'Activity': 'Ben Nevis Views', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Glenfinnan Viaduct', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Glen Coe Views', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Fort William Accommodation', 'Category': 'Accommodation', 'Unit Price': 40}
+    ],
+    'Day 7 - Edinburgh Hogmanay': [
+        {'Activity': 'Train Fort William-Edinburgh', 'Category': 'Transport', 'Unit Price': 45},
+        {'Activity': 'Holyrood Palace', 'Category': 'Attraction', 'Unit Price': 17.50},
+        {'Activity': 'Arthur\'s Seat (free)', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Hogmanay Street Party', 'Category': 'Attraction', 'Unit Price': 0},
+        {'Activity': 'Edinburgh Airport Hotel', 'Category': 'Accommodation', 'Unit Price': 37.50}
+    ],
+    'Day 8 - Departure': [
+        {'Activity': 'Airport Bus', 'Category': 'Transport', 'Unit Price': 8}
+    ]
+}
+
+# Places the itinerary visits; those on the route map carry its coordinates
+TRIVANDRUM = Location('Trivandrum', 8.5241, 76.9366, utc_offset=330)
+LONDON = Location('London', 51.5074, -0.1278)
+NORTHALLERTON = Location('Northallerton', 54.3394, -1.4324)
+DURHAM = Location('Durham', 54.7761, -1.5733)
+NEWCASTLE = Location('Newcastle', 54.9783, -1.6178)
+WHITBY = Location('Whitby', 54.4858, -0.6206)
+EDINBURGH = Location('Edinburgh', 55.9533, -3.1883)
+FORT_WILLIAM = Location('Fort William', 56.8198, -5.1052)
+BANGALORE = Location('Bangalore', 12.9716, 77.5946, utc_offset=330)
+
+# Day-by-day timeline for the Itinerary tab, linked to the daily line items above
+DEFAULT_ITINERARY = (
+    ItineraryDay(
+        1, '🎄', 'Christmas Day - December 25', 'Trivandrum → London',
+        theme='Tower Thames Area (All Walking Distance)',
+        events=(
+            Event('03:55 IST', 'Departure from Trivandrum (Qatar Airways)', TRIVANDRUM),
+            Event('13:20 GMT', 'Arrive London', LONDON),
+            Event('15:00', 'Heathrow Express to Central London', LONDON, CostLink('Day 1 - Christmas London', 'Heathrow Express')),
+            Event('16:00', 'Hotel check-in & freshen up', LONDON),
+            Event('17:00', '**Lunch/Late Breakfast**', LONDON),
+            Event('18:00', '**Tower Bridge** - Walk across, iconic Christmas photos', LONDON, CostLink('Day 1 - Christmas London', 'Tower Bridge (walk)')),
+            Event('19:00', '**Tower of London** - Crown Jewels, Beefeaters (5-min walk)', LONDON, CostLink('Day 1 - Christmas London', 'Tower of London')),
+            Event('20:30', '**Walk along Thames to Westminster** (20 mins riverside)', LONDON),
+            Event('21:00', '**London Eye** - Christmas evening panoramic views', LONDON, CostLink('Day 1 - Christmas London', 'London Eye')),
+            Event('22:30', '**Christmas Dinner**', LONDON),
+        ),
+        note='💡 Christmas Day: Limited tube services, but all these attractions walkable along Thames',
+    ),
+    ItineraryDay(
+        2, '🎁', 'Boxing Day - December 26', 'London',
+        theme='Royal London & Christmas Lights Circuit',
+        events=(
+            Event('09:00', '**Breakfast**', LONDON),
+            Event('10:00', '**Tube to Green Park** → **Buckingham Palace** - Guard changing, royal atmosphere', LONDON, CostLink('Day 2 - Boxing Day London', 'Buckingham Palace')),
+            Event('11:30', "**Walk through St. James's Park** - Royal park, lake views", LONDON),
+            Event('12:30', '**Tube to Hyde Park Corner** → **Hyde Park Winter Wonderland**', LONDON, CostLink('Day 2 - Boxing Day London', 'Hyde Park Winter Wonderland')),
+            Event('14:00', '**Lunch** at Winter Wonderland', LONDON),
+            Event('15:30', '**Ice skating** and Christmas market exploration', LONDON, CostLink('Day 2 - Boxing Day London', 'Ice Skating')),
+            Event('16:30', '**Tube to Oxford Circus** → **Oxford Street Christmas Lights**', LONDON),
+            Event('17:00', '**Walk to Regent Street** → **Regent Street Christmas Lights**', LONDON),
+            Event('17:30', '**Walk to Covent Garden** → **Christmas Market, street performers**', LONDON),
+            Event('18:30', '**Walk to Leicester Square** → **Christmas decorations and buzz**', LONDON),
+            Event('20:00', '**Dinner** in West End area', LONDON),
+        ),
+        note='✅ Perfect Boxing Day when everything reopens and Winter Wonderland is fully operational',
+        note_kind='success',
+    ),
+    ItineraryDay(
+        3, '🏛️', 'December 27', 'London → Northallerton',
+        theme='Final London Highlights',
+        events=(
+            Event('09:00', '**Breakfast**', LONDON),
+            Event('10:00', "**Tube to London Bridge** → **The Shard** - Europe's tallest building views", LONDON, CostLink('Day 3 - Final London', 'The Shard')),
+            Event('11:30', '**Walk to Borough Market** (2-minute walk) - Historic food market', LONDON),
+            Event('12:30', '**Tube to Russell Square** → **British Museum** - World artifacts, Egyptian collection', LONDON, CostLink('Day 3 - Final London', 'British Museum')),
+            Event('14:00', '**Lunch** near British Museum', LONDON),
+            Event('15:30', '**Tube to Fulham Broadway** → **Chelsea FC Stadium (exterior)** - Quick photos', LONDON, CostLink('Day 3 - Final London', 'Chelsea FC Stadium')),
+            Event('16:30', '**Return to hotel** & checkout, collect luggage', LONDON),
+            Event('17:30', "**Train King's Cross → Northallerton** (2 hours direct)", LONDON, CostLink('Day 3 - Final London', 'Train to Northallerton')),
+            Event('20:00', '**Dinner** at host home', NORTHALLERTON),
+        ),
+    ),
+    ItineraryDay(
+        4, '🏰', 'December 28', 'Northern England Triangle',
+        theme='Durham, Newcastle & Whitby Public Transport Tour',
+        events=(
+            Event('08:00', '**Breakfast**', NORTHALLERTON),
+            Event('09:00', '**Train Northallerton → Durham** (30 minutes)', NORTHALLERTON, CostLink('Day 4 - Northern England', 'Train to Durham')),
+            Event('10:00', '**Durham Cathedral & Castle** - UNESCO World Heritage site, Norman architecture', DURHAM, CostLink('Day 4 - Northern England', 'Durham Cathedral')),
+            Event('11:30', '**Train Durham → Newcastle** (20 minutes)', DURHAM, CostLink('Day 4 - Northern England', 'Train Durham-Newcastle')),
+            Event('12:00', '**Newcastle Quayside & Tyne Bridge** - Walk from Central Station', NEWCASTLE),
+            Event('13:00', '**Lunch** in Newcastle city center', NEWCASTLE),
+            Event('14:30', '**Bus Newcastle → Whitby** (2 hours via Middlesbrough)', NEWCASTLE, CostLink('Day 4 - Northern England', 'Bus Newcastle-Whitby')),
+            Event('16:30', '**Whitby Abbey** - Dramatic clifftop ruins, Dracula connections', WHITBY, CostLink('Day 4 - Northern England', 'Whitby Abbey')),
+            Event('17:30', '**Whitby Harbor** - Picturesque fishing port, Captain Cook heritage', WHITBY),
+            Event('18:00', '**Bus Whitby → Northallerton** (1.5 hours direct)', WHITBY, CostLink('Day 4 - Northern England', 'Bus Whitby-Northallerton')),
+            Event('20:00', '**Dinner** at host home', NORTHALLERTON),
+        ),
+    ),
+    ItineraryDay(
+        5, '🏴\U000e0067\U000e0062\U000e0073\U000e0063\U000e0074\U000e007f', 'December 29', 'Edinburgh → Scottish Highlands',
+        theme='Edinburgh Castle & Highland Railway Journey',
+        events=(
+            Event('08:00', '**Breakfast**', NORTHALLERTON),
+            Event('09:00', '**Train Northallerton → Edinburgh** (2.5 hours, change at York)', NORTHALLERTON, CostLink('Day 5 - Edinburgh to Highlands', 'Train to Edinburgh')),
+            Event('12:00', '**Walk from Waverley Station to Edinburgh Castle** (15-minute uphill walk)', EDINBURGH),
+            Event('12:30', '**Edinburgh Castle** - Scottish Crown Jewels, Stone of Destiny, city views', EDINBURGH, CostLink('Day 5 - Edinburgh to Highlands', 'Edinburgh Castle')),
+            Event('14:30', '**Walk down Royal Mile** - Historic street from castle to palace', EDINBURGH),
+            Event('15:00', "**St. Giles Cathedral** - Scotland's High Kirk (free entry)", EDINBURGH),
+            Event('15:30', '**Lunch** on Royal Mile', EDINBURGH),
+            Event('16:30', '**Train Edinburgh → Fort William** (4 hours - scenic West Highland Line)', EDINBURGH, CostLink('Day 5 - Edinburgh to Highlands', 'Train Edinburgh-Fort William')),
+            Event('20:30', 'Check into Fort William Highland accommodation', FORT_WILLIAM, CostLink('Day 5 - Edinburgh to Highlands', 'Fort William Accommodation')),
+            Event('21:00', '**Dinner** in Fort William', FORT_WILLIAM),
+        ),
+        note="🚂 One of the world's most beautiful train journeys - West Highland Line!",
+        note_kind='success',
+    ),
+    ItineraryDay(
+        6, '🏔️', 'December 30', 'Scottish Highlands',
+        theme='Full Highland Adventure Day',
+        events=(
+            Event('08:00', '**Breakfast**', FORT_WILLIAM),
+            Event('09:00', '**Highland Day Tour** (organized bus tour from Fort William):', FORT_WILLIAM, CostLink('Day 6 - Scottish Highlands', 'Highland Day Tour'), notes=(
+                "**Ben Nevis area** - UK's highest mountain viewpoints",
+                '**Glenfinnan Viaduct** - Famous Harry Potter filming location',
+                '**Glenfinnan Monument** - Bonnie Prince Charlie memorial',
+            )),
+            Event('13:00', '**Lunch** during tour with Highland scenery', FORT_WILLIAM),
+            Event('14:30', '**Loch Shiel** - Beautiful Highland loch, boat trip option', FORT_WILLIAM),
+            Event('16:00', "**Glen Coe** - Dramatic valley, 'Scotland in Miniature'", FORT_WILLIAM, CostLink('Day 6 - Scottish Highlands', 'Glen Coe Views')),
+            Event('17:30', '**Commando Memorial** - WWII memorial with mountain panorama', FORT_WILLIAM),
+            Event('19:00', 'Return to Fort William', FORT_WILLIAM),
+            Event('20:00', '**Dinner** in Fort William', FORT_WILLIAM),
+        ),
+        note='🎬 Perfect day for Harry Potter fans and Highland scenery lovers!',
+    ),
+    ItineraryDay(
+        7, '🎆', "December 31 - New Year's Eve", 'Fort William → Edinburgh',
+        theme='Edinburgh Hogmanay Preparation',
+        events=(
+            Event('08:00', '**Breakfast**', FORT_WILLIAM),
+            Event('09:00', '**Train Fort William → Edinburgh** (4 hours scenic return journey)', FORT_WILLIAM, CostLink('Day 7 - Edinburgh Hogmanay', 'Train Fort William-Edinburgh')),
+            Event('13:00', '**Bus/walk to Holyrood Palace** from Waverley Station', EDINBURGH),
+            Event('13:30', '**Holyrood Palace** - Official royal residence in Scotland', EDINBURGH, CostLink('Day 7 - Edinburgh Hogmanay', 'Holyrood Palace')),
+            Event('15:00', "**Arthur's Seat hike** - Ancient volcano, panoramic Edinburgh views (weather permitting)", EDINBURGH, CostLink('Day 7 - Edinburgh Hogmanay', "Arthur's Seat (free)")),
+            Event('16:00', '**Lunch** in Edinburgh city center', EDINBURGH),
+            Event('17:00', '**Princes Street** - Main shopping street, New Year atmosphere', EDINBURGH),
+            Event('18:00', '**Edinburgh Christmas Market** (if still running)', EDINBURGH),
+            Event('19:30', '**Dinner** in Edinburgh Old Town', EDINBURGH),
+            Event('21:00', '**Edinburgh Hogmanay Street Party** - World-famous NYE celebration', EDINBURGH, CostLink('Day 7 - Edinburgh Hogmanay', 'Hogmanay Street Party')),
+            Event('00:00', '**Midnight Fireworks from Edinburgh Castle** - Viewed from Royal Mile', EDINBURGH),
+            Event('01:00', '**Hotel near Edinburgh Airport** (taxi/night bus)', EDINBURGH, CostLink('Day 7 - Edinburgh Hogmanay', 'Edinburgh Airport Hotel')),
+        ),
+        note='🎉 Book Hogmanay dinner reservations in advance! Dress very warmly for outdoor celebration!',
+        note_kind='warning',
+    ),
+    ItineraryDay(
+        8, '✈️', "January 1 - New Year's Day Departure", 'Edinburgh → Bangalore',
+        events=(
+            Event('07:00', '**Breakfast**', EDINBURGH),
+            Event('08:00', '**Airport bus to Edinburgh Airport**', EDINBURGH, CostLink('Day 8 - Departure', 'Airport Bus')),
+            Event('09:00', 'Airport check-in and security', EDINBURGH),
+            Event('10:20', '**Flight departure to Bangalore (British Airways)**', EDINBURGH),
+            Event('05:05+1', '**Arrive Bangalore** (next day)', BANGALORE),
+        ),
+        note="✅ Perfect New Year's Day departure with comfortable morning timing!",
+        note_kind='success',
+    ),
+)
+
+# Places with photos on the Places & Images tab; their details come from the attraction catalog
+PLACES = [
+    "Tower of London", "Tower Bridge", "London Eye", "Buckingham Palace",
+    "Hyde Park Winter Wonderland", "The Shard", "British Museum", "Chelsea FC",
+    "Durham Cathedral", "Newcastle Tyne Bridge", "Whitby Abbey",
+    "Edinburgh Castle", "Glenfinnan Viaduct", "Glen Coe", "Fort William"
+]
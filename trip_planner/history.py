@@ -0,0 +1,278 @@
+"""Undoable edit history of a trip's budget and line items.
+
+Every change to a Cost Calculator budget line or to a line item goes
+through an ``EditLog``, which applies it to the ledger or budget and
+appends an ``Edit`` holding the value before and after. Undo and redo move
+a cursor along the log and apply one edit backwards or forwards, so each
+is a single step however long the log is. Editing after an undo drops the
+undone edits.
+
+Every ``SNAPSHOT_EVERY`` edits the log snapshots the budget lines and days
+edited so far. A snapshot shares the days it didn't change with the one
+before it, so snapshots stay small over thousands of edits. Jumping to a
+distant version restores the nearest earlier snapshot and replays at most
+``SNAPSHOT_EVERY`` edits from there; ``state`` and ``diff`` read past
+versions the same way without touching the ledger.
+
+Line items are addressed by day and position rather than ledger row id,
+since restoring a snapshot gives a day's rows new ids.
+"""
+import difflib
+from dataclasses import dataclass
+
+SNAPSHOT_EVERY = 64
+
+# Ledger row dict keys -> CostLedger.add/update keyword arguments
+_FIELDS = {
+    'Activity': 'activity', 'Category': 'category', 'Unit Price': 'unit_price', 'Currency': 'currency',
+    'Pricing': 'rule', 'Child Discount': 'child_discount', 'Senior Discount': 'senior_discount',
+}
+
+
+@dataclass(frozen=True)
+class Edit:
+    """One change to a budget line (``kind='cost'``) or a line item (``kind='line'``).
+
+    ``key`` is the budget line's name or the line item's day, and ``index``
+    the line item's position in that day. Adding a line item has no
+    ``before`` and deleting one no ``after``.
+    """
+
+    kind: str
+    key: str
+    index: int
+    before: object
+    after: object
+
+    def describe(self):
+        if self.kind == 'cost':
+            return f"{self.key}: {self.before:g} → {self.after:g}"
+        if self.before is None:
+            return f"Added {self.after['Activity']} to {self.key}"
+        if self.after is None:
+            return f"Deleted {self.before['Activity']} from {self.key}"
+        return f"Edited {self.after['Activity']} on {self.key}"
+
+
+def _ledger_fields(row):
+    return {_FIELDS[name]: value for name, value in row.items()}
+
+
+def _describe_row(row):
+    return f"{row['Activity']} ({row['Category']}, {row['Unit Price']:.2f} {row['Currency']}, {row['Pricing'].lower()})"
+
+
+class EditLog:
+    """Edits to one session's ``ledger`` and ``costs`` (the budget mapping), with undo and redo.
+
+    ``version`` is the number of edits applied; 0 is the trip as opened.
+    Budget lines whose amount changed since the last ``take_dirty_costs()``
+    are remembered there, like the ledger's dirty days, so a caller can
+    write back just those.
+    """
+
+    def __init__(self, ledger, costs, snapshot_every=SNAPSHOT_EVERY):
+        self.ledger = ledger
+        self.costs = costs
+        self.snapshot_every = snapshot_every
+        self.edits = []
+        self.version = 0
+        # Values of everything edited this session, as they were at version 0
+        self._base_costs = {}
+        self._base_days = {}
+        # Version -> ({budget line: amount}, {day: rows}) for what was edited up to it
+        self._snapshots = {0: ({}, {})}
+        self._dirty_costs = set()
+
+    def __len__(self):
+        return len(self.edits)
+
+    @property
+    def can_undo(self):
+        return self.version > 0
+
+    @property
+    def can_redo(self):
+        return self.version < len(self.edits)
+
+    def touches(self, kind, key):
+        """True if any edit of ``kind`` ('cost' or 'line') was made to budget line or day ``key``."""
+        return key in (self._base_costs if kind == 'cost' else self._base_days)
+
+    def take_dirty_costs(self):
+        """Return ``{name: amount}`` for budget lines changed since the last call, and forget them."""
+        dirty = {name: self.costs[name] for name in self._dirty_costs}
+        self._dirty_costs = set()
+        return dirty
+
+    # Edits
+
+    def set_cost(self, name, amount):
+        before = self.costs[name]
+        if before == amount:
+            return
+        self._base_costs.setdefault(name, before)
+        self.costs[name] = amount
+        self._dirty_costs.add(name)
+        self._push(Edit('cost', name, None, before, amount))
+
+    def add_line(self, day, activity, category, unit_price, **fields):
+        """Append a line item to ``day``; takes ``CostLedger.add``'s arguments."""
+        self._remember_day(day)
+        row = self.ledger.add(day, activity, category, unit_price, **fields)
+        self._push(Edit('line', day, len(self.ledger.rows(day)) - 1, None, self.ledger.get(row)))
+
+    def update_line(self, day, index, **changes):
+        """Edit the ``index``-th line item of ``day``; takes ``CostLedger.update``'s fields."""
+        self._remember_day(day)
+        row = self.ledger.rows(day)[index]
+        before = self.ledger.get(row)
+        self.ledger.update(row, **changes)
+        after = self.ledger.get(row)
+        if after != before:
+            self._push(Edit('line', day, index, before, after))
+
+    def delete_line(self, day, index):
+        self._remember_day(day)
+        row = self.ledger.rows(day)[index]
+        before = self.ledger.get(row)
+        self.ledger.delete(row)
+        self._push(Edit('line', day, index, before, None))
+
+    def _remember_day(self, day):
+        if day not in self._base_days:
+            self._base_days[day] = self._day_rows(day) if day in self.ledger.days else ()
+
+    def _day_rows(self, day):
+        return tuple(self.ledger.get(row) for row in self.ledger.rows(day))
+
+    def _push(self, edit):
+        if self.can_redo:
+            del self.edits[self.version:]
+            for version in [version for version in self._snapshots if version > self.version]:
+                del self._snapshots[version]
+        self.edits.append(edit)
+        self.version += 1
+        if self.version % self.snapshot_every == 0:
+            self._snapshot()
+
+    def _snapshot(self):
+        """Snapshot the current version from the last one and the days and lines edited since."""
+        since = self.version - self.snapshot_every
+        costs, days = self._snapshots[since]
+        costs, days = dict(costs), dict(days)
+        edited = self.edits[since:self.version]
+        for name in dict.fromkeys(edit.key for edit in edited if edit.kind == 'cost'):
+            costs[name] = self.costs[name]
+        for day in dict.fromkeys(edit.key for edit in edited if edit.kind == 'line'):
+            days[day] = self._day_rows(day)
+        self._snapshots[self.version] = (costs, days)
+
+    # Moving through versions
+
+    def _apply(self, edit, forward=True):
+        before, after = (edit.before, edit.after) if forward else (edit.after, edit.before)
+        if edit.kind == 'cost':
+            self.costs[edit.key] = after
+            self._dirty_costs.add(edit.key)
+        elif before is None:
+            self.ledger.add(edit.key, position=edit.index, **_ledger_fields(after))
+        elif after is None:
+            self.ledger.delete(self.ledger.rows(edit.key)[edit.index])
+        else:
+            self.ledger.update(self.ledger.rows(edit.key)[edit.index], **_ledger_fields(after))
+
+    def undo(self):
+        """Step back one edit and return it, or None at version 0."""
+        if not self.can_undo:
+            return None
+        self.version -= 1
+        edit = self.edits[self.version]
+        self._apply(edit, forward=False)
+        return edit
+
+    def redo(self):
+        """Reapply the next undone edit and return it, or None if there is none."""
+        if not self.can_redo:
+            return None
+        edit = self.edits[self.version]
+        self._apply(edit)
+        self.version += 1
+        return edit
+
+    def goto(self, version):
+        """Move to ``version``, stepping if it's near and restoring a snapshot if not."""
+        if not 0 <= version <= len(self.edits):
+            raise ValueError(f"No version {version}; the log has versions 0 to {len(self.edits)}")
+        if abs(version - self.version) <= self.snapshot_every:
+            while self.version > version:
+                self.undo()
+            while self.version < version:
+                self.redo()
+            return
+        start = version - version % self.snapshot_every
+        costs, days = self._snapshots[start]
+        # Whatever was edited between the snapshot and now goes back to its snapshot value
+        between = self.edits[min(start, self.version):max(start, self.version)]
+        for name in dict.fromkeys(edit.key for edit in between if edit.kind == 'cost'):
+            self.costs[name] = costs.get(name, self._base_costs[name])
+            self._dirty_costs.add(name)
+        for day in dict.fromkeys(edit.key for edit in between if edit.kind == 'line'):
+            self.ledger.replace_day(day, days.get(day, self._base_days[day]))
+        for edit in self.edits[start:version]:
+            self._apply(edit)
+        self.version = version
+
+    # Reading past versions
+
+    def state(self, version):
+        """``({budget line: amount}, {day: rows})`` at ``version`` for everything edited up to it.
+
+        Budget lines and days missing from the result are as they were at version 0.
+        """
+        start = version - version % self.snapshot_every
+        costs, days = self._snapshots[start]
+        costs, days = dict(costs), dict(days)
+        for edit in self.edits[start:version]:
+            if edit.kind == 'cost':
+                costs[edit.key] = edit.after
+                continue
+            rows = list(days.get(edit.key, self._base_days[edit.key]))
+            if edit.before is None:
+                rows.insert(edit.index, edit.after)
+            elif edit.after is None:
+                del rows[edit.index]
+            else:
+                rows[edit.index] = edit.after
+            days[edit.key] = tuple(rows)
+        return costs, days
+
+    def diff(self, a, b):
+        """What changed from version ``a`` to ``b``, as ``{'Where', 'Change', 'Before', 'After'}`` rows."""
+        costs_a, days_a = self.state(a)
+        costs_b, days_b = self.state(b)
+        changes = []
+        for name, base in self._base_costs.items():
+            before, after = costs_a.get(name, base), costs_b.get(name, base)
+            if before != after:
+                changes.append({'Where': 'Budget', 'Change': 'changed', 'Before': f"{name}: {before:g}",
+                                'After': f"{name}: {after:g}"})
+        for day, base in self._base_days.items():
+            rows_a, rows_b = days_a.get(day, base), days_b.get(day, base)
+            if rows_a == rows_b:
+                continue
+            matcher = difflib.SequenceMatcher(None, [tuple(row.values()) for row in rows_a],
+                                              [tuple(row.values()) for row in rows_b], autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == 'equal':
+                    continue
+                removed, added = rows_a[i1:i2], rows_b[j1:j2]
+                # Lines replaced one for one read as edits; any extra as adds or deletes
+                for before, after in zip(removed, added):
+                    changes.append({'Where': day, 'Change': 'changed', 'Before': _describe_row(before),
+                                    'After': _describe_row(after)})
+                changes += [{'Where': day, 'Change': 'removed', 'Before': _describe_row(row), 'After': ''}
+                            for row in removed[len(added):]]
+                changes += [{'Where': day, 'Change': 'added', 'Before': '', 'After': _describe_row(row)}
+                            for row in added[len(removed):]]
+        return changes
@@ -0,0 +1,131 @@
+"""Photos of places kept on disk, deduplicated by content and capped in size.
+
+An upload is hashed before anything else, so a photo already on disk is never
+decoded again. A new photo is decoded at reduced scale (JPEG draft mode) and
+written once as a thumbnail and a display-size WebP, named by content hash,
+under Streamlit's static route. When the photos outgrow the size cap, the
+least recently shown ones are dropped. A small JSON index maps places to
+photos and keeps the LRU order, as of the last upload, across restarts.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .assets import STATIC_URL, decode_reduced
+from .imports import lazy_import
+
+PLACE_IMAGE_SUBDIR = "places"
+INDEX_FILE = "index.json"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# name -> longest edge in pixels, largest first
+IMAGE_SIZES = {
+    'display': 1280,
+    'thumbnail': 240,
+}
+IMAGE_OPTIONS = {'quality': 80, 'method': 4}
+
+
+class PlaceImageStore:
+    """One photo per place under ``<static_dir>/places``, safe to share between sessions."""
+
+    def __init__(self, static_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.join(static_dir, PLACE_IMAGE_SUBDIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._places, self._sizes = self._read_index()
+
+    def _path(self, digest, variant):
+        return os.path.join(self.root, f"{digest}-{variant}.webp")
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        # Trust the index only for photos whose files are all still there
+        sizes = OrderedDict(
+            (digest, size) for digest, size in data.get('photos', {}).items()
+            if all(os.path.exists(self._path(digest, variant)) for variant in IMAGE_SIZES)
+        )
+        places = {place: digest for place, digest in data.get('places', {}).items() if digest in sizes}
+        return places, sizes
+
+    def _write_index(self):
+        target = os.path.join(self.root, INDEX_FILE)
+        tmp = target + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'places': self._places, 'photos': self._sizes}, f, ensure_ascii=False)
+        os.replace(tmp, target)
+
+    def put(self, place, data):
+        """Store encoded image bytes as ``place``'s photo and return its content hash.
+
+        Raises ``ValueError`` if ``data`` isn't a readable image.
+        """
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        with self._lock:
+            size = self._sizes.get(digest)
+        if size is None:
+            size = self._encode(digest, data)
+        with self._lock:
+            self._sizes[digest] = size
+            self._sizes.move_to_end(digest)
+            self._places[place] = digest
+            self._evict()
+            self._write_index()
+        return digest
+
+    def _encode(self, digest, data):
+        Image = lazy_import('PIL.Image')
+        try:
+            image = decode_reduced(io.BytesIO(data), max(IMAGE_SIZES.values()))
+        except (OSError, Image.DecompressionBombError) as error:
+            raise ValueError(f"Not a readable image: {error}") from error
+        total = 0
+        for variant, longest_edge in IMAGE_SIZES.items():
+            image = image.copy()
+            image.thumbnail((longest_edge, longest_edge), Image.LANCZOS)
+            # Write then rename so a concurrent request never sees a partial file
+            target = self._path(digest, variant)
+            tmp = target + '.tmp'
+            image.save(tmp, 'WEBP', **IMAGE_OPTIONS)
+            os.replace(tmp, target)
+            total += os.path.getsize(target)
+        return total
+
+    def _evict(self):
+        """Drop least recently used photos until under the cap; the newest always stays."""
+        total = sum(self._sizes.values())
+        while total > self.max_bytes and len(self._sizes) > 1:
+            digest, size = self._sizes.popitem(last=False)
+            total -= size
+            for variant in IMAGE_SIZES:
+                try:
+                    os.remove(self._path(digest, variant))
+                except OSError:
+                    pass
+            self._places = {place: kept for place, kept in self._places.items() if kept != digest}
+
+    def urls(self, place, touch=True):
+        """``{variant: url}`` for ``place``'s photo, or None; ``touch`` counts it as used for the LRU order."""
+        with self._lock:
+            digest = self._places.get(place)
+            if digest is None:
+                return None
+            if touch:
+                self._sizes.move_to_end(digest)
+        return {variant: f"{STATIC_URL}/{PLACE_IMAGE_SUBDIR}/{digest}-{variant}.webp" for variant in IMAGE_SIZES}
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sizes)
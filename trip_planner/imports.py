@@ -0,0 +1,67 @@
+"""Deferred imports of heavy libraries, and where import time goes.
+
+``lazy_import`` loads a module the first time a tab actually needs it and
+records how long that took, so a cold start only pays for the libraries
+behind the tab being shown. ``startup_profile`` measures the other side:
+it runs ``python -X importtime`` in a fresh interpreter over a script's
+top-level imports and totals the time per package.
+"""
+import ast
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# module -> seconds its first import took in this process
+IMPORT_TIMES = {}
+
+
+def lazy_import(name):
+    """Return module ``name``, importing it now if needed and recording how long that took."""
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+def top_level_imports(script_path):
+    """Module names a script imports at module level, in order."""
+    with open(script_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), script_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def startup_profile(modules, cwd=None):
+    """Import ``modules`` in a fresh interpreter; return ``(package, seconds)`` pairs, slowest first.
+
+    Each module's own time (not counting what it imports) goes to its top-level
+    package, so the pairs add up to the whole import time.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', ''.join(f"import {name}\n" for name in modules)],
+        cwd=cwd, capture_output=True, text=True, check=False,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def default_script():
+    """The Streamlit app next to this package."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uk_travel_planner.py')
@@ -0,0 +1,97 @@
+"""Structured day-by-day itinerary and its markdown rendering.
+
+An itinerary is a tuple of ``ItineraryDay``s, each holding its timed
+``Event``s. Events point at the ``Location`` they happen in and, where they
+have a price, at the ledger line item they cost (``CostLink``). Every day
+renders to a single markdown block, so a trip costs one message per day.
+"""
+import hashlib
+import html
+import json
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Location:
+    """A place on the route; ``lat``/``lon`` are set for places on the map.
+
+    ``utc_offset`` is the local time zone in minutes east of UTC.
+    """
+
+    name: str
+    lat: float = None
+    lon: float = None
+    utc_offset: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class CostLink:
+    """The ledger line item an event is paid through."""
+
+    day: str
+    activity: str
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """One timeline entry; ``time`` is shown as written, e.g. ``"05:05+1"``."""
+
+    time: str
+    text: str
+    location: Location = None
+    cost: CostLink = None
+    notes: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ItineraryDay:
+    """A day's heading, route, events and an optional tip (``note_kind`` is info/success/warning)."""
+
+    number: int
+    emoji: str
+    title: str
+    route: str
+    theme: str = ''
+    events: tuple = ()
+    note: str = ''
+    note_kind: str = 'info'
+
+    @property
+    def locations(self):
+        """Distinct locations of the day's events, in order of first visit."""
+        return tuple(dict.fromkeys(event.location for event in self.events if event.location))
+
+    @property
+    def cost_links(self):
+        return tuple(event.cost for event in self.events if event.cost)
+
+    @property
+    def ledger_day(self):
+        """Label of the ledger day the day's events are paid through, or None if none are."""
+        links = self.cost_links
+        return links[0].day if links else None
+
+
+def day_key(day):
+    """Stable hash of a day's content, used as its render cache key."""
+    payload = json.dumps(asdict(day), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def day_markdown(day, separator=True):
+    """Render a whole day as one markdown block, tip included as HTML."""
+    lines = [
+        f"## {day.emoji} Day {day.number}: {day.title}",
+        f"**Location:** {day.route}",
+    ]
+    if day.theme:
+        lines.append(f"### {day.theme}")
+    for event in day.events:
+        lines.append(f"**{event.time}** - {event.text}")
+        if event.notes:
+            lines.append("\n".join(f"- {note}" for note in event.notes))
+    if day.note:
+        lines.append(f'<div class="itinerary-note note-{day.note_kind}">{html.escape(day.note)}</div>')
+    if separator:
+        lines.append("---")
+    return "\n\n".join(lines)
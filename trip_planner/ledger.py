@@ -0,0 +1,411 @@
+"""Columnar ledger of daily line items with running totals.
+
+Line items live in typed NumPy columns (day, category, currency, unit price,
+pricing rule, child/senior discounts) plus a list of activity names. Per-day
+and grand sums of each line's party components (see ``pricing``), kept per
+currency, are adjusted on every insert, edit and delete, so totals for any
+party and display currency are read without rescanning the rows.
+
+A ledger can also be opened lazily from stored per-day sums (see ``store``):
+its totals are right from the start, and each day's rows are fetched the
+first time that day is looked at.
+"""
+import numpy as np
+
+from .imports import lazy_import
+from .pricing import PARTY_COMPONENTS, PRICING_RULES, RULE_CODES, line_components, price_lines
+
+CATEGORIES = ('Flight', 'Transport', 'Accommodation', 'Attraction', 'Food', 'Other')
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+# Flights are budgeted in the Cost Calculator, so they stay out of daily totals
+EXCLUDED_CATEGORIES = frozenset({'Flight'})
+_EXCLUDED = np.array([name in EXCLUDED_CATEGORIES for name in CATEGORIES])
+
+_INITIAL_CAPACITY = 64
+_COLUMNS = ('_day', '_category', '_currency', '_price', '_rule', '_child_discount', '_senior_discount', '_alive')
+
+
+def guess_category(activity):
+    """Best-effort category for line items imported without one."""
+    name = activity.lower()
+    if 'flight' in name:
+        return 'Flight'
+    if any(word in name for word in ('train', 'bus', 'express', 'travel card', 'taxi', 'ferry')):
+        return 'Transport'
+    if any(word in name for word in ('hotel', 'accommodation', 'hostel', 'b&b')):
+        return 'Accommodation'
+    if any(word in name for word in ('lunch', 'dinner', 'breakfast', 'food')):
+        return 'Food'
+    return 'Attraction'
+
+
+class CostLedger:
+    """Daily line items stored column-wise, with O(1) per-day and grand totals.
+
+    Rows are addressed by a stable integer id. Deleting a row leaves a
+    tombstone, so ids held by the UI stay valid.
+
+    Days touched by an edit are remembered until ``take_dirty_days()``, so
+    a caller can write back just those days.
+    """
+
+    def __init__(self, days=()):
+        self.days = []
+        self._day_index = {}
+        self._day_rows = []
+        self.currencies = []
+        self._currency_index = {}
+        self._day_sums = np.zeros((0, 0, len(PARTY_COMPONENTS)))
+        self._day_versions = np.zeros(0, dtype=np.int64)
+        self._grand_sums = np.zeros((0, len(PARTY_COMPONENTS)))
+        self._converted = {}
+        self._loader = None
+        self._loaded = []
+        self._dirty = set()
+        self.version = 0
+
+        self._size = 0
+        self._day = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self._category = np.zeros(_INITIAL_CAPACITY, dtype=np.int8)
+        self._currency = np.zeros(_INITIAL_CAPACITY, dtype=np.int16)
+        self._price = np.zeros(_INITIAL_CAPACITY, dtype=np.float64)
+        self._rule = np.zeros(_INITIAL_CAPACITY, dtype=np.int8)
+        self._child_discount = np.zeros(_INITIAL_CAPACITY, dtype=np.float64)
+        self._senior_discount = np.zeros(_INITIAL_CAPACITY, dtype=np.float64)
+        self._alive = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._activity = []
+
+        for day in days:
+            self.add_day(day)
+
+    @classmethod
+    def from_daily_costs(cls, daily_costs):
+        """Build a ledger from ``{day: [row dict, ...]}``.
+
+        Rows carry ``Activity``, ``Category``, ``Unit Price`` and optionally
+        ``Currency`` (GBP if missing), ``Pricing``, ``Child Discount`` and
+        ``Senior Discount``. Rows in the
+        older shape (per-person ``Individual`` or ``Total_4`` for a group of
+        four, no ``Category``) are accepted too.
+        """
+        ledger = cls(daily_costs.keys())
+        for day, activities in daily_costs.items():
+            day_index = ledger._day_index[day]
+            for activity in activities:
+                name = activity['Activity']
+                if 'Unit Price' in activity:
+                    price = activity['Unit Price']
+                elif 'Individual' in activity:
+                    price = activity['Individual']
+                else:
+                    price = activity['Total_4'] / 4
+                category = activity.get('Category') or guess_category(name)
+                rule = activity.get('Pricing', 'Per person')
+                _check_choice(category, CATEGORY_CODES)
+                _check_choice(rule, RULE_CODES)
+                ledger._insert(day_index, {
+                    'Activity': name, 'Category': category, 'Unit Price': price,
+                    'Currency': activity.get('Currency', 'GBP'), 'Pricing': rule,
+                    'Child Discount': activity.get('Child Discount', 0.0),
+                    'Senior Discount': activity.get('Senior Discount', 0.0),
+                })
+            ledger._touch(day_index)
+        # Sum every row's components in one pass instead of row by row
+        rows = np.flatnonzero(~_EXCLUDED[ledger._category[:ledger._size]])
+        components = line_components(ledger._price[rows], ledger._rule[rows],
+                                     ledger._child_discount[rows], ledger._senior_discount[rows])
+        np.add.at(ledger._day_sums, (ledger._day[rows], ledger._currency[rows]), components)
+        ledger._grand_sums[:] = ledger._day_sums.sum(axis=0)
+        return ledger
+
+    @classmethod
+    def from_summary(cls, days, currencies, day_sums, load_day):
+        """Build a ledger whose rows are fetched one day at a time.
+
+        ``day_sums`` has shape ``(len(days), len(currencies), 5)`` and holds
+        each day's party component sums (flights excluded) per currency, so
+        totals are available before any row is loaded. ``load_day(day)``
+        returns that day's rows in the ``from_daily_costs`` row shape.
+        """
+        ledger = cls(days)
+        for currency in currencies:
+            ledger._add_currency(currency)
+        if len(ledger.days):
+            ledger._day_sums[:] = day_sums
+            ledger._grand_sums[:] = ledger._day_sums.sum(axis=0)
+        ledger._loader = load_day
+        ledger._loaded = [False] * len(ledger.days)
+        return ledger
+
+    def _load(self, day_index):
+        """Fetch a lazily opened day's rows; their sums are already counted."""
+        if self._loaded[day_index]:
+            return
+        self._loaded[day_index] = True
+        for activity in self._loader(self.days[day_index]):
+            self._insert(day_index, activity)
+        # The content is unchanged, but converted price arrays no longer cover every row
+        self._converted = {}
+
+    def _load_all(self):
+        for day_index in range(len(self.days)):
+            self._load(day_index)
+
+    def loaded_days(self):
+        """Number of days whose rows are in memory."""
+        return sum(self._loaded)
+
+    def take_dirty_days(self):
+        """Return the days edited since the last call, in day order, and forget them."""
+        dirty = [day for day in self.days if day in self._dirty]
+        self._dirty = set()
+        return dirty
+
+    def to_daily_costs(self):
+        """Export back to the ``{day: [row dict, ...]}`` shape."""
+        self._load_all()
+        return {day: [self.get(row) for row in rows] for day, rows in zip(self.days, self._day_rows)}
+
+    def __len__(self):
+        """Number of line items in memory; days not loaded yet don't count."""
+        return sum(len(rows) for rows in self._day_rows)
+
+    # Days
+
+    def add_day(self, day):
+        """Append a day label, returning its index; existing labels are reused."""
+        if day in self._day_index:
+            return self._day_index[day]
+        index = len(self.days)
+        self.days.append(day)
+        self._day_index[day] = index
+        self._day_rows.append([])
+        self._loaded.append(True)
+        self._day_sums = np.concatenate([self._day_sums, np.zeros((1,) + self._day_sums.shape[1:])])
+        self._day_versions = np.append(self._day_versions, 0)
+        return index
+
+    def _add_currency(self, code):
+        if code in self._currency_index:
+            return self._currency_index[code]
+        index = len(self.currencies)
+        self.currencies.append(code)
+        self._currency_index[code] = index
+        self._day_sums = np.concatenate([self._day_sums, np.zeros((len(self.days), 1, len(PARTY_COMPONENTS)))], axis=1)
+        self._grand_sums = np.vstack([self._grand_sums, np.zeros(len(PARTY_COMPONENTS))])
+        return index
+
+    def day_version(self, day):
+        """Counter bumped whenever a row of ``day`` changes, for cache keys."""
+        return int(self._day_versions[self._day_index[day]])
+
+    # Rows
+
+    def _grow(self):
+        capacity = len(self._day) * 2
+        for column in _COLUMNS:
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def _touch(self, day_index):
+        self._day_versions[day_index] += 1
+        self._dirty.add(self.days[day_index])
+        self.version += 1
+
+    def _apply(self, row, sign):
+        """Add (sign=1) or remove (sign=-1) a row's contribution to the totals."""
+        if _EXCLUDED[self._category[row]]:
+            return
+        components = sign * line_components(
+            self._price[row:row + 1], self._rule[row:row + 1],
+            self._child_discount[row:row + 1], self._senior_discount[row:row + 1],
+        )[0]
+        self._day_sums[self._day[row], self._currency[row]] += components
+        self._grand_sums[self._currency[row]] += components
+
+    def add(self, day, activity, category, unit_price, currency='GBP', rule='Per person',
+            child_discount=0.0, senior_discount=0.0, position=None):
+        """Add a line item to ``day`` and return its row id; ``unit_price`` is in ``currency``.
+
+        The line goes at ``position`` among the day's rows, or at the end.
+        """
+        _check_choice(category, CATEGORY_CODES)
+        _check_choice(rule, RULE_CODES)
+        day_index = self.add_day(day)
+        self._load(day_index)
+        row = self._insert(day_index, {
+            'Activity': activity, 'Category': category, 'Unit Price': unit_price, 'Currency': currency,
+            'Pricing': rule, 'Child Discount': child_discount, 'Senior Discount': senior_discount,
+        })
+        if position is not None:
+            rows = self._day_rows[day_index]
+            rows.insert(position, rows.pop())
+        self._apply(row, 1)
+        self._touch(day_index)
+        return row
+
+    def _insert(self, day_index, activity):
+        """Store one row dict in the columns without touching the totals."""
+        if self._size == len(self._day):
+            self._grow()
+        row = self._size
+        self._size += 1
+        self._day[row] = day_index
+        self._category[row] = CATEGORY_CODES[activity['Category']]
+        self._currency[row] = self._add_currency(activity['Currency'])
+        self._price[row] = activity['Unit Price']
+        self._rule[row] = RULE_CODES[activity['Pricing']]
+        self._child_discount[row] = activity['Child Discount']
+        self._senior_discount[row] = activity['Senior Discount']
+        self._alive[row] = True
+        self._activity.append(activity['Activity'])
+        self._day_rows[day_index].append(row)
+        return row
+
+    def update(self, row, activity=None, category=None, unit_price=None, currency=None, rule=None,
+               child_discount=None, senior_discount=None):
+        """Edit a line item in place; omitted fields keep their value."""
+        self._check_row(row)
+        if category is not None:
+            _check_choice(category, CATEGORY_CODES)
+        if rule is not None:
+            _check_choice(rule, RULE_CODES)
+        self._apply(row, -1)
+        if activity is not None:
+            self._activity[row] = activity
+        if category is not None:
+            self._category[row] = CATEGORY_CODES[category]
+        if currency is not None:
+            self._currency[row] = self._add_currency(currency)
+        if unit_price is not None:
+            self._price[row] = unit_price
+        if rule is not None:
+            self._rule[row] = RULE_CODES[rule]
+        if child_discount is not None:
+            self._child_discount[row] = child_discount
+        if senior_discount is not None:
+            self._senior_discount[row] = senior_discount
+        self._apply(row, 1)
+        self._touch(self._day[row])
+
+    def delete(self, row):
+        """Remove a line item."""
+        self._check_row(row)
+        self._apply(row, -1)
+        self._alive[row] = False
+        day_index = self._day[row]
+        self._day_rows[day_index].remove(row)
+        self._touch(day_index)
+
+    def replace_day(self, day, activities):
+        """Swap all of ``day``'s line items for ``activities``, row dicts as ``get`` returns them."""
+        day_index = self.add_day(day)
+        self._load(day_index)
+        for row in self._day_rows[day_index]:
+            self._apply(row, -1)
+            self._alive[row] = False
+        self._day_rows[day_index] = []
+        for activity in activities:
+            self._apply(self._insert(day_index, activity), 1)
+        self._touch(day_index)
+
+    def _check_row(self, row):
+        if not (0 <= row < self._size and self._alive[row]):
+            raise KeyError(f"No line item with id {row}")
+
+    def rows(self, day):
+        """Row ids of ``day`` in insertion order."""
+        day_index = self._day_index[day]
+        self._load(day_index)
+        return list(self._day_rows[day_index])
+
+    def get(self, row):
+        """Return a line item as a dict."""
+        self._check_row(row)
+        return {
+            'Activity': self._activity[row],
+            'Category': CATEGORIES[self._category[row]],
+            'Unit Price': float(self._price[row]),
+            'Currency': self.currencies[self._currency[row]],
+            'Pricing': PRICING_RULES[self._rule[row]],
+            'Child Discount': float(self._child_discount[row]),
+            'Senior Discount': float(self._senior_discount[row]),
+        }
+
+    # Totals for a whole party in one currency, excluding flights
+
+    def day_total(self, day, party, rates, currency):
+        return self._total(self._day_sums[self._day_index[day]], party, rates, currency)
+
+    def grand_total(self, party, rates, currency):
+        return self._total(self._grand_sums, party, rates, currency)
+
+    def _total(self, sums, party, rates, currency):
+        if not self.currencies:
+            return 0.0
+        return float((sums @ party.weights()) @ rates.factors(self.currencies, currency))
+
+    def category_totals(self, party, rates, currency):
+        """Party totals per category in ``currency``, flights included."""
+        sums = self.day_category_totals(party, rates, currency).sum(axis=0)
+        return dict(zip(CATEGORIES, sums.tolist()))
+
+    def day_category_totals(self, party, rates, currency):
+        """Party totals as a ``(days, categories)`` array in ``currency``, flights included."""
+        self._load_all()
+        rows = np.flatnonzero(self._alive[:self._size])
+        totals = price_lines(self.converted_prices(rates, currency)[rows], self._rule[rows],
+                             self._child_discount[rows], self._senior_discount[rows], party)
+        sums = np.zeros((len(self.days), len(CATEGORIES)))
+        np.add.at(sums, (self._day[rows], self._category[rows]), totals)
+        return sums
+
+    def converted_prices(self, rates, currency):
+        """Unit prices of every row converted to ``currency``.
+
+        The array is cached per (rates version, currency) until the ledger
+        next changes, so toggling the display currency back and forth reuses it.
+        """
+        key = (rates.version, currency)
+        cached = self._converted.get(key)
+        if cached is None or cached[0] != self.version:
+            factors = rates.factors(self.currencies, currency) if self.currencies else np.zeros(0)
+            prices = self._price[:self._size] * factors[self._currency[:self._size]]
+            cached = self._converted[key] = (self.version, prices)
+        return cached[1]
+
+    # Views
+
+    def day_frame(self, day, party, rates, currency):
+        """Return ``day``'s line items with party totals converted to ``currency``."""
+        return self._frame(np.array(self.rows(day), dtype=np.intp), party, rates, currency)
+
+    def frame(self, party, rates, currency):
+        """Every line item, in day order, with a ``Day`` column first."""
+        self._load_all()
+        rows = np.array([row for rows in self._day_rows for row in rows], dtype=np.intp)
+        df = self._frame(rows, party, rates, currency)
+        pd = lazy_import('pandas')
+        df.insert(0, 'Day', pd.Categorical.from_codes(self._day[rows], self.days))
+        return df
+
+    def _frame(self, rows, party, rates, currency):
+        converted = self.converted_prices(rates, currency)[rows]
+        pd = lazy_import('pandas')
+        return pd.DataFrame({
+            'Activity': [self._activity[row] for row in rows],
+            'Category': pd.Categorical.from_codes(self._category[rows], CATEGORIES),
+            'Pricing': pd.Categorical.from_codes(self._rule[rows], PRICING_RULES),
+            'Currency': pd.Categorical.from_codes(self._currency[rows], self.currencies),
+            'Unit Price': self._price[rows],
+            'Party Total': price_lines(converted, self._rule[rows], self._child_discount[rows],
+                                       self._senior_discount[rows], party),
+        })
+
+
+def _check_choice(value, codes):
+    if value not in codes:
+        raise ValueError(f"Unknown value {value!r}; expected one of {tuple(codes)}")
@@ -0,0 +1,289 @@
+"""Queued email delivery of per-traveller trip summaries.
+
+``Mailer.send_summary`` returns as soon as one job per recipient is queued.
+An asyncio event loop on a background thread runs a few workers; each
+renders a job's message and sends it over its own SMTP connection, kept
+open between messages and closed after a quiet spell. Temporary failures
+(4xx replies, dropped connections) are retried with exponential backoff;
+permanent ones (5xx replies, refused recipients) fail the job at once.
+
+To try delivery without a real mail server, run a local debugging server
+such as aiosmtpd's (``python -m aiosmtpd -n -l localhost:8025``, the
+default ``TRIP_SMTP_HOST``:``TRIP_SMTP_PORT``), which prints what it receives.
+"""
+import asyncio
+import itertools
+import os
+import smtplib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.utils import formataddr, getaddresses
+
+from .core import trip_totals
+from .currency import load_rates
+from .ledger import CostLedger
+
+DEFAULT_WORKERS = 4
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 0.5
+IDLE_SECONDS = 30
+MAX_BATCHES = 100
+
+
+@dataclass(frozen=True)
+class SMTPSettings:
+    """Where and how to send; ``from_env`` reads the ``TRIP_SMTP_*`` variables."""
+
+    host: str = 'localhost'
+    port: int = 8025
+    username: str = None
+    password: str = None
+    starttls: bool = False
+    sender: str = 'Trip Planner <trip-planner@localhost>'
+    timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        return cls(
+            host=environ.get('TRIP_SMTP_HOST', cls.host),
+            port=int(environ.get('TRIP_SMTP_PORT', cls.port)),
+            username=environ.get('TRIP_SMTP_USER') or None,
+            password=environ.get('TRIP_SMTP_PASSWORD') or None,
+            starttls=environ.get('TRIP_SMTP_STARTTLS', '') in ('1', 'true', 'yes'),
+            sender=environ.get('TRIP_MAIL_FROM', cls.sender),
+        )
+
+
+@dataclass(eq=False)
+class MailJob:
+    """One recipient's message; ``status`` is queued, sending, retrying, sent or failed."""
+
+    batch: 'MailBatch'
+    name: str
+    address: str
+    status: str = 'queued'
+    attempts: int = 0
+    error: str = None
+
+
+@dataclass(eq=False)
+class MailBatch:
+    """The jobs queued by one click, and the trip data their messages are rendered from."""
+
+    id: int
+    context: dict
+    jobs: list = field(default_factory=list)
+    _summary: dict = None
+
+    def counts(self):
+        counts = dict.fromkeys(('queued', 'sending', 'retrying', 'sent', 'failed'), 0)
+        for job in self.jobs:
+            counts[job.status] += 1
+        return counts
+
+    @property
+    def done(self):
+        return all(job.status in ('sent', 'failed') for job in self.jobs)
+
+    def errors(self):
+        return [f"{job.address}: {job.error}" for job in self.jobs if job.status == 'failed']
+
+
+def parse_recipients(text):
+    """``[(name, address)]`` from lines or commas like ``Asha <asha@example.com>``; entries without an @ are dropped."""
+    return [(name, address) for name, address in getaddresses([text.replace('\n', ',')]) if '@' in address]
+
+
+def summary_context(trip, party, cost_data, daily_costs, currency, rates_version):
+    """Plain trip data for rendering summaries on the mailer's thread; ``trip`` is a ``store.Trip``."""
+    return {
+        'name': trip.name,
+        'dates': trip.date_range(),
+        'party': party,
+        'cost_data': dict(cost_data),
+        'daily_costs': daily_costs,
+        'currency': currency,
+        'rates_version': rates_version,
+    }
+
+
+def trip_summary(context):
+    """Per-person totals and day-by-day costs for a summary, in the context's currency."""
+    rates = load_rates(version=context['rates_version'])
+    party, currency = context['party'], context['currency']
+    ledger = CostLedger.from_daily_costs(context['daily_costs'])
+    totals = trip_totals(context['cost_data'], ledger, party, rates, currency)
+    return {
+        'per_person': {name: party.per_person(amount) for name, amount in totals.items()},
+        'group': totals['grand'],
+        'days': [(day, party.per_person(ledger.day_total(day, party, rates, currency))) for day in ledger.days],
+        'format': lambda amount: rates.format(amount, currency, 2),
+    }
+
+
+def summary_message(context, summary, name, address, sender):
+    """A traveller's summary email, as plain text."""
+    party, money = context['party'], summary['format']
+    per_person = summary['per_person']
+    lines = [
+        f"Hi {name or 'traveller'},",
+        "",
+        f"Here is your share of {context['name']} ({context['dates']}), for {party.describe()}.",
+        "",
+        *(f"  {label:<26}{money(amount)}" for label, amount in (
+            ("Flights", per_person['flights']), ("Daily costs (no flights)", per_person['daily']),
+            ("Your total", per_person['grand']), ("Group total", summary['group']),
+        )),
+        "",
+        "Day by day, per person (flights excluded):",
+    ]
+    lines += [f"  {day}: {money(amount)}" for day, amount in summary['days']]
+    lines += ["", "Shares are the group's average per traveller; child and senior discounts lower some."]
+
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = formataddr((name, address))
+    message['Subject'] = f"Your trip summary: {context['name']}"
+    message.set_content("\n".join(lines))
+    return message
+
+
+class _TemporaryFailure(Exception):
+    pass
+
+
+def _is_temporary(error):
+    """True for 4xx replies, dropped connections and network errors, which are worth retrying."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # SMTPException is an OSError too; refused recipients and the like are permanent
+    return isinstance(error, smtplib.SMTPServerDisconnected) or not isinstance(error, smtplib.SMTPException)
+
+
+class Mailer:
+    """Queues summaries for delivery by ``workers`` asyncio workers; safe to share between sessions."""
+
+    def __init__(self, settings=None, workers=DEFAULT_WORKERS, max_attempts=MAX_ATTEMPTS,
+                 backoff=BACKOFF_SECONDS, idle_seconds=IDLE_SECONDS):
+        self.settings = settings or SMTPSettings.from_env()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.idle_seconds = idle_seconds
+        self.batches = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+
+    def _start(self):
+        """Start the event loop thread and its workers on first use."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._queue = asyncio.Queue()
+            for _ in range(self.workers):
+                self._loop.create_task(self._worker())
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name='mailer', daemon=True).start()
+        started.wait()
+
+    def send_summary(self, context, recipients):
+        """Queue one summary per ``(name, address)`` and return the batch id without waiting."""
+        with self._lock:
+            self._start()
+            batch = MailBatch(next(self._ids), context)
+            batch.jobs = [MailJob(batch, name, address) for name, address in recipients]
+            self.batches[batch.id] = batch
+            while len(self.batches) > MAX_BATCHES:
+                self.batches.popitem(last=False)
+        for job in batch.jobs:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return batch.id
+
+    def batch(self, batch_id):
+        return self.batches.get(batch_id)
+
+    # Event loop side
+
+    async def _worker(self):
+        smtp = None
+        while True:
+            try:
+                job = await asyncio.wait_for(self._queue.get(), self.idle_seconds)
+            except asyncio.TimeoutError:
+                smtp = await self._close(smtp)
+                continue
+            smtp = await self._deliver(job, smtp)
+
+    async def _deliver(self, job, smtp):
+        """Send one job, retrying temporary failures; returns the connection to reuse, if any."""
+        try:
+            batch = job.batch
+            if batch._summary is None:
+                batch._summary = trip_summary(batch.context)
+            message = summary_message(batch.context, batch._summary, job.name, job.address, self.settings.sender)
+        except Exception as error:  # a bad trip can't be mailed however often we try
+            job.status, job.error = 'failed', f"{type(error).__name__}: {error}"
+            return smtp
+        for attempt in range(1, self.max_attempts + 1):
+            job.status, job.attempts = 'sending', attempt
+            try:
+                if smtp is None:
+                    smtp = await asyncio.to_thread(self._connect)
+                await asyncio.to_thread(self._send, smtp, message)
+                job.status, job.error = 'sent', None
+                return smtp
+            except _TemporaryFailure as error:
+                job.error = str(error)
+                smtp = await self._close(smtp)
+            except (smtplib.SMTPException, ValueError) as error:
+                job.status, job.error = 'failed', f"{type(error).__name__}: {error}"
+                return smtp
+            if attempt < self.max_attempts:
+                job.status = 'retrying'
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        job.status = 'failed'
+        return smtp
+
+    def _connect(self):
+        settings = self.settings
+        try:
+            smtp = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+            if settings.starttls:
+                smtp.starttls()
+            if settings.username:
+                smtp.login(settings.username, settings.password or '')
+        except OSError as error:
+            if not _is_temporary(error):
+                raise
+            raise _TemporaryFailure(f"Can't connect to {settings.host}:{settings.port}: {error}") from error
+        return smtp
+
+    @staticmethod
+    def _send(smtp, message):
+        try:
+            smtp.send_message(message)
+        except OSError as error:
+            if not _is_temporary(error):
+                raise
+            if isinstance(error, smtplib.SMTPResponseException):
+                raise _TemporaryFailure(f"{error.smtp_code} {error.smtp_error.decode(errors='replace')}") from error
+            raise _TemporaryFailure(f"Connection lost: {error}") from error
+
+    async def _close(self, smtp):
+        if smtp is not None:
+            try:
+                await asyncio.to_thread(smtp.quit)
+            except (OSError, smtplib.SMTPException):
+                pass
+        return None
+
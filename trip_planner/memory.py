@@ -0,0 +1,52 @@
+"""Rough accounting of the memory a Python object graph holds."""
+import sys
+from collections import ChainMap
+
+import numpy as np
+
+
+def _children(obj):
+    if isinstance(obj, dict):
+        yield from obj.keys()
+        yield from obj.values()
+    elif isinstance(obj, ChainMap):
+        yield from obj.maps
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+    elif isinstance(obj, np.ndarray):
+        if obj.base is not None:
+            yield obj.base
+    else:
+        if hasattr(obj, '__dict__'):
+            yield obj.__dict__
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                yield getattr(obj, slot)
+
+
+def deep_sizeof(obj):
+    """Bytes held by ``obj`` and everything it references.
+
+    NumPy buffers count at their full ``nbytes``; interned small objects
+    are counted like any other.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += item.nbytes if isinstance(item, np.ndarray) and item.base is None else sys.getsizeof(item)
+        stack.extend(_children(item))
+    return total
+
+
+def format_bytes(size):
+    """Human-readable size such as ``"12.3 KB"``."""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,78 @@
+"""Party composition and the pricing rules that turn unit prices into totals.
+
+Every line item is reduced to its cost per unit of five party components:
+adults, children, seniors, rooms and the group itself. A line's total for a
+party is then the dot product with the party's component counts, so whole
+ledgers are priced with one matrix-vector product and running sums of the
+components give totals for any party without touching the rows again.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+PRICING_RULES = ('Per person', 'Per room', 'Per group')
+RULE_CODES = {name: code for code, name in enumerate(PRICING_RULES)}
+PER_PERSON, PER_ROOM, PER_GROUP = range(len(PRICING_RULES))
+
+# Order of the columns returned by line_components and Party.weights
+PARTY_COMPONENTS = ('adults', 'children', 'seniors', 'rooms', 'group')
+
+
+@dataclass(frozen=True)
+class Party:
+    """Who is travelling: head counts by fare type and rooms booked."""
+
+    adults: int = 4
+    children: int = 0
+    seniors: int = 0
+    rooms: int = 3
+    label: str = ''
+
+    @property
+    def size(self):
+        return self.adults + self.children + self.seniors
+
+    def weights(self):
+        """Component counts in ``PARTY_COMPONENTS`` order."""
+        return np.array([self.adults, self.children, self.seniors, self.rooms, 1], dtype=np.float64)
+
+    def per_person(self, amount):
+        """Average share of ``amount`` per traveller."""
+        return amount / max(self.size, 1)
+
+    def composition(self):
+        """The label if set, otherwise head counts such as ``"3 adults, 2 children"``."""
+        if self.label:
+            return self.label
+        counts = ((self.adults, 'adults'), (self.children, 'children'), (self.seniors, 'seniors'))
+        return ", ".join(f"{count} {name}" for count, name in counts if count) or "nobody"
+
+    def describe(self):
+        """Short description such as ``"Group of 4: Couple + 2 Individuals"``."""
+        return f"Group of {self.size}: {self.composition()}"
+
+
+DEFAULT_PARTY = Party(adults=4, rooms=3, label="Couple + 2 Individuals")
+
+
+def line_components(unit_price, rule, child_discount=0.0, senior_discount=0.0):
+    """Return an ``(n, 5)`` matrix of each line's cost per party component.
+
+    ``rule`` holds ``PRICING_RULES`` codes; discounts are fractions (0.25 is
+    25% off) and only apply to per-person prices.
+    """
+    unit_price = np.asarray(unit_price, dtype=np.float64)
+    rule = np.asarray(rule)
+    per_person = np.where(rule == PER_PERSON, unit_price, 0.0)
+    return np.column_stack([
+        per_person,
+        per_person * (1 - np.asarray(child_discount, dtype=np.float64)),
+        per_person * (1 - np.asarray(senior_discount, dtype=np.float64)),
+        np.where(rule == PER_ROOM, unit_price, 0.0),
+        np.where(rule == PER_GROUP, unit_price, 0.0),
+    ])
+
+
+def price_lines(unit_price, rule, child_discount, senior_discount, party):
+    """Total cost of each line for ``party``, computed in one vectorized pass."""
+    return line_components(unit_price, rule, child_discount, senior_discount) @ party.weights()
@@ -0,0 +1,75 @@
+"""Opt-in timing spans for app reruns: wall time, memory and messages per section.
+
+A ``Profiler`` groups spans into runs, one per full rerun or fragment rerun.
+Each span records its wall time, the memory it allocated and kept and its
+peak above the starting point (via ``tracemalloc``), and how many messages
+it sent to the browser, as counted by a function the caller supplies.
+``tracemalloc`` is started the first time a profiler is made and traces the
+whole process, slowing Python code down noticeably: profiling is for
+diagnosis, not for normal use. Peaks are process-wide, so spans running at
+the same time in other sessions inflate each other's.
+"""
+import json
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DEFAULT_MAX_RUNS = 50
+
+
+class Profiler:
+    """The last ``max_runs`` runs of one session, each a list of spans.
+
+    With ``log_path`` set, every finished run is also appended to that file
+    as a JSON line.
+    """
+
+    def __init__(self, count_messages=None, max_runs=DEFAULT_MAX_RUNS, log_path=None):
+        self.count_messages = count_messages or (lambda: 0)
+        self.log_path = log_path
+        self.runs = deque(maxlen=max_runs)
+        self._next_run = 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin_run(self, kind='app'):
+        """Start collecting spans for a new rerun; ``kind`` is ``'app'`` or ``'fragment'``."""
+        if self.log_path and self.runs:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.runs[-1], ensure_ascii=False) + '\n')
+        self.runs.append({
+            'run': self._next_run,
+            'kind': kind,
+            'started': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'spans': [],
+        })
+        self._next_run += 1
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block and add it to the current run."""
+        if not self.runs:
+            self.begin_run()
+        run = self.runs[-1]
+        messages = self.count_messages()
+        tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            run['spans'].append({
+                'name': name,
+                'wall_ms': round(wall * 1000, 2),
+                'allocated_kb': round((current - memory) / 1024, 1),
+                'peak_kb': round((peak - memory) / 1024, 1),
+                'messages': self.count_messages() - messages,
+            })
+
+    def to_jsonl(self):
+        """Every kept run as one JSON object per line."""
+        return ''.join(json.dumps(run, ensure_ascii=False) + '\n' for run in self.runs)
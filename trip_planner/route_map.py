@@ -0,0 +1,87 @@
+"""Route map data and the folium map built from it."""
+import hashlib
+import json
+
+from .imports import lazy_import
+
+# Key locations shown as markers
+LOCATIONS = {
+    "London": {"coords": [51.5074, -0.1278], "color": "red", "icon": "star",
+              "popup": "Days 1-3: Christmas, Boxing Day & Final London"},
+    "Northallerton": {"coords": [54.3394, -1.4324], "color": "green", "icon": "home",
+                      "popup": "Host Home Base - Dec 27, 30"},
+    "Durham": {"coords": [54.7761, -1.5733], "color": "blue", "icon": "university",
+               "popup": "Day 4: UNESCO Cathedral & Castle"},
+    "Newcastle": {"coords": [54.9783, -1.6178], "color": "blue", "icon": "building",
+                 "popup": "Day 4: Tyne Bridge & Quayside"},
+    "Whitby": {"coords": [54.4858, -0.6206], "color": "purple", "icon": "anchor",
+               "popup": "Day 4: Abbey Ruins & Harbor"},
+    "Edinburgh": {"coords": [55.9533, -3.1883], "color": "orange", "icon": "castle",
+                 "popup": "Days 5&7: Castle & Hogmanay"},
+    "Fort William": {"coords": [56.8198, -5.1052], "color": "darkgreen", "icon": "mountain",
+                    "popup": "Days 5-6: Highland Base & Tours"}
+}
+
+# Travel routes with different colors
+ROUTES = [
+    {"coords": [[51.5074, -0.1278], [54.3394, -1.4324]], "color": "green", "weight": 4, "tooltip": "Dec 27: London → Northallerton (Train)"},
+    {"coords": [[54.3394, -1.4324], [54.7761, -1.5733]], "color": "blue", "weight": 3, "tooltip": "Dec 28: Northallerton → Durham (Train)"},
+    {"coords": [[54.7761, -1.5733], [54.9783, -1.6178]], "color": "blue", "weight": 3, "tooltip": "Dec 28: Durham → Newcastle (Train)"},
+    {"coords": [[54.9783, -1.6178], [54.4858, -0.6206]], "color": "purple", "weight": 3, "tooltip": "Dec 28: Newcastle → Whitby (Bus)"},
+    {"coords": [[54.3394, -1.4324], [55.9533, -3.1883]], "color": "orange", "weight": 4, "tooltip": "Dec 29: Northallerton → Edinburgh (Train)"},
+    {"coords": [[55.9533, -3.1883], [56.8198, -5.1052]], "color": "darkgreen", "weight": 5, "tooltip": "Dec 29: Edinburgh → Fort William (Scenic Train)"},
+    {"coords": [[56.8198, -5.1052], [55.9533, -3.1883]], "color": "red", "weight": 4, "tooltip": "Dec 31: Fort William → Edinburgh (Train)"}
+]
+
+MAP_CENTER = [54.5, -2.5]
+MAP_ZOOM = 6
+
+
+def route_data_key(locations, routes, attractions=()):
+    """Return a stable hash of the map data, used as the map cache key."""
+    payload = json.dumps([locations, routes, list(attractions)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def build_route_map(locations, routes, attractions=()):
+    """Build the folium map with one marker per location and one line per route.
+
+    ``attractions`` are extra ``{"name", "coords", "popup"}`` points, drawn as small circles.
+    """
+    # folium takes about a second to import; only the map tab needs it
+    folium = lazy_import('folium')
+    m = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM)
+
+    for name, details in locations.items():
+        folium.Marker(
+            details["coords"],
+            popup=f"<b>{name}</b><br>{details['popup']}",
+            tooltip=name,
+            icon=folium.Icon(color=details["color"], icon=details["icon"])
+        ).add_to(m)
+
+    for route in routes:
+        folium.PolyLine(
+            locations=route["coords"],
+            color=route["color"],
+            weight=route["weight"],
+            tooltip=route["tooltip"]
+        ).add_to(m)
+
+    for attraction in attractions:
+        folium.CircleMarker(
+            attraction["coords"],
+            radius=5,
+            color="cadetblue",
+            fill=True,
+            fill_opacity=0.8,
+            popup=f"<b>{attraction['name']}</b><br>{attraction['popup']}",
+            tooltip=attraction["name"]
+        ).add_to(m)
+
+    return m
+
+
+def route_map_html(locations, routes, attractions=()):
+    """Render the map to a standalone HTML document."""
+    return build_route_map(locations, routes, attractions).get_root().render()
@@ -0,0 +1,196 @@
+"""Distances between trip locations and the order to visit them in.
+
+Distances are great-circle (haversine) kilometres computed for all pairs in
+one NumPy broadcast. Visit orders start from a greedy nearest-neighbour path
+and are improved with 2-opt (reverse a stretch) and Or-opt (move a run of up
+to three stops), both evaluating every candidate position for a move in one
+vector operation. The first and last stops stay fixed, e.g. the arrival and
+departure airports; without a fixed end the path may finish anywhere.
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Ground routes are longer than great circles; speeds are door-to-door averages
+DETOUR_FACTOR = 1.25
+TRAVEL_SPEEDS_KMH = {'Train': 95.0, 'Bus': 50.0, 'Car': 60.0, 'Walk': 4.5}
+
+# Straight-line speeds nothing beats; a transfer needing more is impossible, not just tight
+MAX_SPEEDS_KMH = {'Flight': 900.0, 'Train': 200.0, 'Bus': 100.0, 'Car': 110.0, 'Taxi': 110.0, 'Tube': 60.0, 'Walk': 6.0}
+
+_EPSILON = 1e-9
+
+
+def haversine(a, b):
+    """Great-circle km between broadcastable arrays of ``[lat, lon]`` pairs in degrees."""
+    lat1, lon1 = np.moveaxis(np.radians(np.asarray(a, dtype=np.float64)), -1, 0)
+    lat2, lon2 = np.moveaxis(np.radians(np.asarray(b, dtype=np.float64)), -1, 0)
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def haversine_matrix(coords):
+    """Return the ``(n, n)`` great-circle distances in km between ``[lat, lon]`` rows."""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return haversine(coords[:, None, :], coords[None, :, :])
+
+
+def route_lengths(routes):
+    """Great-circle km of each two-point route in the ``route_map.ROUTES`` shape."""
+    if not routes:
+        return np.zeros(0)
+    coords = np.array([route["coords"] for route in routes], dtype=np.float64)
+    return haversine(coords[:, 0], coords[:, 1])
+
+
+def travel_minutes(distance_km, mode='Train'):
+    """Rough door-to-door travel time for a great-circle distance."""
+    return np.asarray(distance_km) * DETOUR_FACTOR / TRAVEL_SPEEDS_KMH[mode] * 60
+
+
+def path_length(order, dist):
+    """Total length of visiting ``order`` along ``dist``."""
+    order = np.asarray(order)
+    return float(dist[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour(dist, start=0, end=None):
+    """Greedy path from ``start`` through every stop, finishing at ``end`` if given."""
+    n = len(dist)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[start] = False
+    if end is not None:
+        unvisited[end] = False
+    order = [start]
+    current = start
+    for _ in range(unvisited.sum()):
+        candidates = np.where(unvisited, dist[current], np.inf)
+        current = int(candidates.argmin())
+        unvisited[current] = False
+        order.append(current)
+    if end is not None and end != start:
+        order.append(end)
+    return np.array(order, dtype=np.intp)
+
+
+def two_opt(order, dist, max_passes=100):
+    """Reverse stretches of ``order`` while that shortens it; the endpoints stay put.
+
+    Stops whose neighbours haven't changed since they last failed to improve
+    are skipped ("don't look bits").
+    """
+    order = np.array(order, dtype=np.intp)
+    n = len(order)
+    active = np.ones(len(dist), dtype=bool)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            a, b = order[i - 1], order[i]
+            if not active[b]:
+                continue
+            # Reversing order[i..j] swaps edges (a, b), (c, d) for (a, c), (b, d)
+            c, d = order[i + 1:n - 1], order[i + 2:n]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(delta.argmin())
+            if delta[j] < -_EPSILON:
+                active[[a, b, c[j], d[j]]] = True
+                order[i:i + j + 2] = order[i:i + j + 2][::-1].copy()
+                improved = True
+            else:
+                active[b] = False
+        if not improved:
+            break
+    return order
+
+
+def or_opt(order, dist, max_segment=3, max_passes=100):
+    """Move runs of up to ``max_segment`` stops, possibly reversed, to where they fit best.
+
+    Uses the same don't-look bits as ``two_opt``, keyed on a run's first stop.
+    """
+    order = np.array(order, dtype=np.intp)
+    n = len(order)
+    active = np.ones(len(dist), dtype=bool)
+    u, v = order[:-1], order[1:]
+    edges = dist[u, v]
+    for _ in range(max_passes):
+        improved = False
+        i = 1
+        while i < n - 1:
+            if not active[order[i]]:
+                i += 1
+                continue
+            moved = False
+            for length in range(1, min(max_segment, n - 1 - i) + 1):
+                first, last = order[i], order[i + length - 1]
+                prev, after = order[i - 1], order[i + length]
+                removal_gain = dist[prev, first] + dist[last, after] - dist[prev, after]
+                # Insert between u and v of any edge not touching the run
+                forward = dist[first, u] + dist[last, v] - edges
+                backward = dist[last, u] + dist[first, v] - edges
+                forward[i - 1:i + length] = backward[i - 1:i + length] = np.inf
+                k = int(np.minimum(forward, backward).argmin())
+                cost = min(forward[k], backward[k])
+                if cost < removal_gain - _EPSILON:
+                    active[[prev, after, first, last, u[k], v[k]]] = True
+                    segment = order[i:i + length]
+                    if backward[k] < forward[k]:
+                        segment = segment[::-1]
+                    rest = np.concatenate([order[:i], order[i + length:]])
+                    at = k + 1 if k < i else k + 1 - length
+                    order = np.concatenate([rest[:at], segment, rest[at:]])
+                    u, v = order[:-1], order[1:]
+                    edges = dist[u, v]
+                    improved = moved = True
+                    break
+            if not moved:
+                active[order[i]] = False
+                i += 1
+        if not improved:
+            break
+    return order
+
+
+def optimize_order(coords, start=0, end=None, max_passes=100):
+    """Short visiting order over ``coords`` as an index array from ``start`` to ``end``.
+
+    With ``end=None`` a zero-distance dummy stop is added as the end, which
+    leaves the real last stop free.
+    """
+    dist = haversine_matrix(coords)
+    n = len(dist)
+    if n <= 1:
+        return np.arange(n, dtype=np.intp)
+    open_end = end is None
+    if open_end:
+        dist = np.pad(dist, ((0, 1), (0, 1)))
+        end = n
+    order = nearest_neighbour(dist, start, end)
+    for _ in range(max_passes):
+        length = path_length(order, dist)
+        order = or_opt(two_opt(order, dist, max_passes), dist, max_passes=max_passes)
+        if path_length(order, dist) > length - _EPSILON:
+            break
+    return order[:-1] if open_end else order
+
+
+def build_routes(names, coords, order, color="blue", weight=4, mode='Train'):
+    """Route polylines in the ``route_map.ROUTES`` shape for consecutive stops of ``order``.
+
+    Each route also carries its ``stops`` names, ``distance_km`` and ``minutes``.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    legs = haversine(coords[order[:-1]], coords[order[1:]])
+    minutes = travel_minutes(legs, mode)
+    routes = []
+    for a, b, km, mins in zip(order[:-1], order[1:], legs.tolist(), minutes.tolist()):
+        routes.append({
+            "coords": [coords[a].tolist(), coords[b].tolist()],
+            "color": color,
+            "weight": weight,
+            "tooltip": f"{names[a]} → {names[b]} ({km:.0f} km, ~{mins / 60:.1f} h by {mode.lower()})",
+            "stops": [names[a], names[b]],
+            "distance_km": km,
+            "minutes": mins,
+        })
+    return routes
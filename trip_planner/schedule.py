@@ -0,0 +1,196 @@
+"""Timetable checks for an itinerary: overlaps, impossible transfers and rollovers.
+
+Every event becomes an interval on one timeline, in UTC minutes since
+midnight (UTC) at the start of day 1. The start comes from the event's time
+(``"09:00"``, ``"03:55 IST"``, ``"05:05+1"``) and the day it is on. The
+duration comes from text such as ``"(2.5 hours"`` and is missing otherwise.
+Intervals sit in arrays sorted by start, so every check is a vector pass
+after one O(n log n) sort.
+
+A time earlier than the one before it on the same day is taken to be after
+midnight. Since the text doesn't say so, it is reported as a rollover
+alongside the explicit ``+1`` ones.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from .routing import MAX_SPEEDS_KMH, haversine
+
+MINUTES_PER_DAY = 24 * 60
+ZONE_OFFSETS = {'GMT': 0, 'UTC': 0, 'BST': 60, 'CET': 60, 'IST': 330}
+
+# Transfers between places with no travelling event in between
+DEFAULT_MODE = 'Car'
+
+_TIME = re.compile(r'^(\d{1,2}):(\d{2})(?:\+(\d+))?(?:\s+([A-Z]{2,4}))?$')
+_DURATION = re.compile(r'\((\d+(?:\.\d+)?)\s*(hours?|hrs?|minutes?|mins?)\b', re.IGNORECASE)
+_MODE_KEYWORDS = {
+    'Flight': ('flight', 'airways', 'airlines'),
+    'Train': ('train', 'express', 'railway'),
+    'Bus': ('bus', 'coach'),
+    'Tube': ('tube',),
+    'Taxi': ('taxi',),
+    'Walk': ('walk',),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Conflict:
+    """One finding; ``kind`` is ``'overlap'``, ``'transfer'`` or ``'rollover'``."""
+
+    kind: str
+    day: int
+    time: str
+    message: str
+
+
+def parse_time(text):
+    """Split ``"05:05+1 IST"`` into ``(minutes after midnight, days later, zone or None)``."""
+    match = _TIME.match(text.strip())
+    if not match:
+        raise ValueError(f"Unrecognised event time {text!r}")
+    hours, minutes, days, zone = match.groups()
+    if zone is not None and zone not in ZONE_OFFSETS:
+        raise ValueError(f"Unknown time zone {zone!r} in {text!r}")
+    return int(hours) * 60 + int(minutes), int(days or 0), zone
+
+
+def parse_duration(text):
+    """Minutes from the first ``"(N hours"``/``"(N minutes"`` in ``text``, or None."""
+    match = _DURATION.search(text)
+    if not match:
+        return None
+    amount, unit = float(match.group(1)), match.group(2).lower()
+    return amount * 60 if unit.startswith('h') else amount
+
+
+def travel_mode(text):
+    """How an event travels, from the first transport word in its text, or None."""
+    lowered = text.lower()
+    found = [(lowered.find(word), mode) for mode, words in _MODE_KEYWORDS.items() for word in words if word in lowered]
+    return min(found)[1] if found else None
+
+
+def _plain(text):
+    """Event text without markdown emphasis, for messages."""
+    return text.replace('**', '')
+
+
+def _clock(minutes):
+    return f"{int(minutes) // 60 % 24:02d}:{int(minutes) % 60:02d}"
+
+
+class Timeline:
+    """An itinerary's events as intervals in arrays sorted by start time."""
+
+    def __init__(self, itinerary):
+        events, days, starts, durations, lats, lons, rollovers = [], [], [], [], [], [], []
+        for day in itinerary:
+            previous = None
+            carried = 0  # days added by unmarked rollovers earlier in this day
+            for event in day.events:
+                local, days_later, zone = parse_time(event.time)
+                location = event.location
+                offset = ZONE_OFFSETS[zone] if zone else (location.utc_offset if location else 0)
+                start = (day.number - 1 + max(days_later, carried)) * MINUTES_PER_DAY + local - offset
+                if days_later:
+                    rollovers.append(Conflict('rollover', day.number, event.time,
+                                              f"{_plain(event.text)} is {days_later} day(s) later"))
+                if previous is not None and start < previous and not days_later:
+                    rollovers.append(Conflict('rollover', day.number, event.time,
+                                              f"{_plain(event.text)} runs past midnight without a +1"))
+                while previous is not None and start < previous:
+                    start += MINUTES_PER_DAY
+                    carried += 1
+                previous = start
+                events.append((day, event))
+                days.append(day.number)
+                starts.append(start)
+                duration = parse_duration(event.text)
+                durations.append(np.nan if duration is None else duration)
+                has_coords = location is not None and location.lat is not None
+                lats.append(location.lat if has_coords else np.nan)
+                lons.append(location.lon if has_coords else np.nan)
+
+        order = np.argsort(np.array(starts, dtype=np.float64), kind='stable')
+        self.events = [events[i] for i in order]
+        self.day = np.array(days, dtype=np.int32)[order]
+        self.start = np.array(starts, dtype=np.float64)[order]
+        self.duration = np.array(durations, dtype=np.float64)[order]
+        self.end = self.start + np.nan_to_num(self.duration)
+        self.coords = np.column_stack([np.array(lats, dtype=np.float64)[order], np.array(lons, dtype=np.float64)[order]])
+        self.modes = [travel_mode(event.text) for _, event in self.events]
+        self.rollovers = rollovers
+        self._longest = float(np.nanmax(self.duration)) if np.isfinite(self.duration).any() else 0.0
+
+    def __len__(self):
+        return len(self.events)
+
+    def on_day(self, number):
+        """Events of day ``number`` in time order (including any after its midnight)."""
+        days = np.flatnonzero(self.day == number)
+        return [self.events[i] for i in days]
+
+    def overlapping(self, start, end):
+        """Indices of events whose interval meets ``[start, end)``; O(log n + k)."""
+        low = np.searchsorted(self.start, start - self._longest, side='left')
+        high = np.searchsorted(self.start, end, side='left')
+        candidates = np.arange(low, high)
+        return candidates[(self.end[candidates] > start) | (self.start[candidates] >= start)]
+
+    def overlaps(self):
+        """Events starting before an earlier one has finished."""
+        if len(self) < 2:
+            return []
+        running_end = np.maximum.accumulate(self.end)
+        holder = np.maximum.accumulate(np.where(self.end == running_end, np.arange(len(self)), 0))
+        clashes = np.flatnonzero(self.start[1:] < running_end[:-1]) + 1
+        conflicts = []
+        for i in clashes:
+            j = holder[i - 1]
+            (day, event), (_, earlier) = self.events[i], self.events[j]
+            conflicts.append(Conflict(
+                'overlap', day.number, event.time,
+                f"{_plain(event.text)} starts during {_plain(earlier.text)} "
+                f"({earlier.time}, until {_clock(self.end[j])} UTC)"
+            ))
+        return conflicts
+
+    def transfers(self):
+        """Consecutive events in different places with too little time to travel between them.
+
+        A travelling event (a train, bus, flight...) carries the trip from its
+        own start; otherwise the move has to fit between the first event's end
+        and the next start, at ``DEFAULT_MODE`` speed.
+        """
+        if len(self) < 2:
+            return []
+        a, b = self.coords[:-1], self.coords[1:]
+        km = haversine(a, b)
+        moving = np.isfinite(km) & (km > 0.5)
+        modes = [mode or DEFAULT_MODE for mode in self.modes[:-1]]
+        speed = np.array([MAX_SPEEDS_KMH[mode] for mode in modes])
+        travelling = np.array([mode is not None for mode in self.modes[:-1]])
+        window = self.start[1:] - np.where(travelling, self.start[:-1], self.end[:-1])
+        needed = np.where(moving, km, 0.0) / speed * 60
+        conflicts = []
+        for i in np.flatnonzero(moving & (needed > window)):
+            day, event = self.events[i + 1]
+            _, earlier = self.events[i]
+            conflicts.append(Conflict(
+                'transfer', day.number, event.time,
+                f"{_plain(earlier.text)} → {_plain(event.text)}: {km[i]:.0f} km needs at least "
+                f"{needed[i]:.0f} min by {modes[i].lower()}, but only {max(window[i], 0):.0f} min are free"
+            ))
+        return conflicts
+
+    def conflicts(self):
+        """All findings ordered by day: rollovers, then overlaps, then transfers."""
+        return sorted(self.rollovers + self.overlaps() + self.transfers(), key=lambda conflict: conflict.day)
+
+
+def check_schedule(itinerary):
+    """Overlaps, impossible transfers and midnight rollovers in ``itinerary``."""
+    return Timeline(itinerary).conflicts()
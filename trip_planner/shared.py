@@ -0,0 +1,80 @@
+"""Optimistic concurrency for a trip edited by several sessions at once.
+
+Every session holds its own ledger, budget and party, read from the
+``TripStore``. A ``SharedTrip``, one per trip and process, decides whose
+edits win: it keeps a version counter for each day, each budget line and
+the party. A session remembers the versions its copy was read at and
+commits its edits against them, compare-and-swap style. If another session
+committed to any of those first, the commit is refused with ``Conflict``
+and the session reloads them instead of overwriting.
+
+Each day and budget line has its own lock, held only while one commit
+compares versions and writes to the database, so travellers editing
+different days never wait on each other. Reading versions takes no lock:
+sessions poll ``changed`` to find what to reload, a dict lookup per key.
+
+Keys are ``(DAY, label)``, ``(BUDGET, name)`` and ``(PARTY, 'party')``
+tuples; a key nobody has committed to yet is at version 0.
+"""
+import threading
+
+DAY = 'day'
+BUDGET = 'budget'
+PARTY = 'party'
+
+
+class Conflict(Exception):
+    """A commit refused because another session committed to ``keys`` first."""
+
+    def __init__(self, keys):
+        super().__init__(f"Changed by someone else: {', '.join(name for _, name in keys)}")
+        self.keys = keys
+
+
+class SharedTrip:
+    """Version counters and commit locks for one trip, shared by every session on the server."""
+
+    def __init__(self, store, trip_id):
+        self.store = store
+        self.trip_id = trip_id
+        self._versions = {}
+        self._locks = {}
+
+    def version(self, key):
+        return self._versions.get(key, 0)
+
+    def versions(self):
+        """A copy of every committed key's version, to remember what a session has read."""
+        return dict(self._versions)
+
+    def changed(self, seen, keys=None):
+        """Keys committed since the versions in ``seen``; only among ``keys`` if given."""
+        if keys is None:
+            return [key for key, version in list(self._versions.items()) if seen.get(key, 0) != version]
+        return [key for key in keys if seen.get(key, 0) != self.version(key)]
+
+    def commit(self, seen, days=None, costs=None, party=None):
+        """Store ``days`` (``{label: rows}``), ``costs`` (``{name: amount}``) and ``party`` unless beaten to them.
+
+        ``seen`` holds the versions the edits were made from. Returns the new
+        versions of the committed keys, or raises ``Conflict`` naming the
+        keys that moved on; nothing is written then. The edits are written in
+        one transaction, so if that fails, no edit is stored and no version moves.
+        """
+        keys = sorted([(DAY, day) for day in days or ()] + [(BUDGET, name) for name in costs or ()]
+                      + ([(PARTY, 'party')] if party is not None else []))
+        # Always taken in sorted order, so two commits can't hold each other's locks
+        locks = [self._locks.setdefault(key, threading.Lock()) for key in keys]
+        for lock in locks:
+            lock.acquire()
+        try:
+            stale = self.changed(seen, keys)
+            if stale:
+                raise Conflict(stale)
+            self.store.save_edits(self.trip_id, days, costs, party)
+            for key in keys:
+                self._versions[key] = self.version(key) + 1
+            return {key: self._versions[key] for key in keys}
+        finally:
+            for lock in reversed(locks):
+                lock.release()
@@ -0,0 +1,95 @@
+"""Monte Carlo budget risk for the trip total.
+
+Each cost group (a Cost Calculator category, or all daily line items of one
+category) gets an uncertainty: a triangular multiplier on its planned amount,
+optionally with a surge, e.g. trains over Christmas, that multiplies the price
+with some probability. Line items within a group move together, which keeps
+sampling at one draw per group and is a fair model for seasonal effects.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_SAMPLES = 100_000
+DEFAULT_SEED = 2024
+
+
+@dataclass(frozen=True)
+class Uncertainty:
+    """Multiplier distribution on a planned amount (1.0 means as planned)."""
+
+    low: float = 1.0
+    mode: float = 1.0
+    high: float = 1.0
+    surge_probability: float = 0.0
+    surge_factor: float = 1.0
+
+
+# Cost Calculator categories
+BUDGET_UNCERTAINTY = {
+    'Flights': Uncertainty(0.95, 1.0, 1.25),
+    'London Accommodation (3 nights)': Uncertainty(0.9, 1.0, 1.3),
+    'Edinburgh/Highland Accommodation': Uncertainty(0.9, 1.0, 1.4),
+    'Transport (all trains/buses)': Uncertainty(0.95, 1.0, 1.1, surge_probability=0.3, surge_factor=1.5),
+    'Attractions': Uncertainty(0.9, 1.0, 1.15),
+    'Food Budget': Uncertainty(0.8, 1.0, 1.4),
+    'Shopping & Souvenirs': Uncertainty(0.5, 1.0, 1.6),
+    'Emergency Fund': Uncertainty(),
+}
+
+# Ledger line-item categories
+LINE_ITEM_UNCERTAINTY = {
+    'Flight': Uncertainty(0.95, 1.0, 1.25),
+    'Transport': Uncertainty(0.95, 1.0, 1.1, surge_probability=0.3, surge_factor=1.5),
+    'Accommodation': Uncertainty(0.9, 1.0, 1.3),
+    'Attraction': Uncertainty(0.95, 1.0, 1.1),
+    'Food': Uncertainty(0.8, 1.0, 1.4),
+    'Other': Uncertainty(0.8, 1.0, 1.5),
+}
+
+
+def _triangular(u, low, mode, high):
+    """Inverse-CDF triangular sampling that also accepts low == high."""
+    width = high - low
+    split = np.divide(mode - low, width, out=np.zeros_like(width), where=width > 0)
+    rising = low + np.sqrt(u * width * (mode - low))
+    falling = high - np.sqrt((1 - u) * width * (high - mode))
+    return np.where(u < split, rising, falling)
+
+
+def simulate_totals(amounts, uncertainties, samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED):
+    """Draw ``samples`` trip totals and return them sorted ascending.
+
+    ``amounts`` are the planned amounts of each cost group and
+    ``uncertainties`` the matching ``Uncertainty`` objects.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if amounts.size == 0:
+        return np.zeros(samples)
+    low, mode, high, surge_probability, surge_factor = (
+        np.array(values, dtype=np.float64) for values in zip(*(
+            (u.low, u.mode, u.high, u.surge_probability, u.surge_factor) for u in uncertainties
+        ))
+    )
+    rng = np.random.default_rng(seed)
+    multipliers = _triangular(rng.random((samples, amounts.size)), low, mode, high)
+    if surge_probability.any():
+        surged = rng.random((samples, amounts.size)) < surge_probability
+        multipliers = np.where(surged, multipliers * surge_factor, multipliers)
+    totals = multipliers @ amounts
+    totals.sort()
+    return totals
+
+
+def summarize(sorted_totals, cap=None):
+    """Percentiles of sorted simulated totals and the chance of going over ``cap``."""
+    n = len(sorted_totals)
+    summary = {
+        'mean': float(sorted_totals.mean()),
+        'p50': float(sorted_totals[int(0.50 * (n - 1))]),
+        'p90': float(sorted_totals[int(0.90 * (n - 1))]),
+        'p99': float(sorted_totals[int(0.99 * (n - 1))]),
+    }
+    if cap is not None:
+        summary['exceed_probability'] = float(1 - np.searchsorted(sorted_totals, cap, side='right') / n)
+    return summary
@@ -0,0 +1,338 @@
+"""Saved trips in a local SQLite database.
+
+Each trip has its own rows in indexed ``trips``, ``days``, ``activities``,
+``costs`` (the Cost Calculator budget) and ``locations`` tables, so opening
+one trip costs the same however many are stored. A trip's ledger is opened
+from per-day sums computed in SQL, and a day's line items are only read
+when that day is shown. Edits are written back one transaction per batch.
+
+The database runs in WAL mode, so sessions keep reading while another
+session writes. Connections are pooled and shared across threads.
+"""
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+
+import numpy as np
+
+from .ledger import EXCLUDED_CATEGORIES, CostLedger
+from .pricing import PARTY_COMPONENTS, RULE_CODES, Party, line_components
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'trips.sqlite3')
+DEFAULT_POOL_SIZE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    children INTEGER NOT NULL,
+    seniors INTEGER NOT NULL,
+    rooms INTEGER NOT NULL,
+    party_label TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS days (
+    id INTEGER PRIMARY KEY,
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    UNIQUE (trip_id, position),
+    UNIQUE (trip_id, label)
+);
+
+CREATE TABLE IF NOT EXISTS activities (
+    id INTEGER PRIMARY KEY,
+    day_id INTEGER NOT NULL REFERENCES days (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    unit_price REAL NOT NULL,
+    currency TEXT NOT NULL,
+    pricing TEXT NOT NULL,
+    child_discount REAL NOT NULL DEFAULT 0,
+    senior_discount REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS activities_by_day ON activities (day_id, position);
+
+CREATE TABLE IF NOT EXISTS costs (
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (trip_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    color TEXT NOT NULL DEFAULT 'blue',
+    icon TEXT NOT NULL DEFAULT 'info-sign',
+    popup TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS locations_by_trip ON locations (trip_id, position);
+"""
+
+
+@dataclass(frozen=True)
+class Trip:
+    """A saved trip's own fields; days, costs and locations are read separately."""
+
+    id: int
+    name: str
+    start_date: date
+    end_date: date
+    party: Party
+
+    def date_range(self):
+        """e.g. ``"Dec 25, 2024 - Jan 1, 2025"``."""
+        return f"{_format_date(self.start_date)} - {_format_date(self.end_date)}"
+
+
+def _format_date(day):
+    return f"{day:%b} {day.day}, {day.year}"
+
+
+def _activity_values(day_id, position, activity):
+    return (
+        day_id, position, activity['Activity'], activity['Category'], activity['Unit Price'],
+        activity.get('Currency', 'GBP'), activity.get('Pricing', 'Per person'),
+        activity.get('Child Discount', 0.0), activity.get('Senior Discount', 0.0),
+    )
+
+
+class TripStore:
+    """Pool of SQLite connections to one trips database."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=DEFAULT_POOL_SIZE):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode; transactions are opened explicitly by transaction()
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, opening one if the pool is empty."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Run a batch of writes atomically, taking the write lock up front."""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # Trips
+
+    def create_trip(self, name, start_date, end_date, party, cost_data, daily_costs, locations=None):
+        """Save a whole trip in one transaction and return its id.
+
+        ``daily_costs`` has the ``{day: [row dict, ...]}`` shape of the ledger
+        and ``locations`` the ``route_map.LOCATIONS`` shape.
+        """
+        with self.transaction() as conn:
+            trip_id = conn.execute(
+                'INSERT INTO trips (name, start_date, end_date, adults, children, seniors, rooms, party_label) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (name, start_date.isoformat(), end_date.isoformat(), party.adults, party.children,
+                 party.seniors, party.rooms, party.label),
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO costs (trip_id, name, position, amount) VALUES (?, ?, ?, ?)',
+                [(trip_id, cost, position, amount) for position, (cost, amount) in enumerate(cost_data.items())],
+            )
+            for position, (label, activities) in enumerate(daily_costs.items()):
+                day_id = conn.execute(
+                    'INSERT INTO days (trip_id, position, label) VALUES (?, ?, ?)', (trip_id, position, label)
+                ).lastrowid
+                conn.executemany(
+                    'INSERT INTO activities (day_id, position, name, category, unit_price, currency, pricing, '
+                    'child_discount, senior_discount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [_activity_values(day_id, i, activity) for i, activity in enumerate(activities)],
+                )
+            conn.executemany(
+                'INSERT INTO locations (trip_id, position, name, lat, lon, color, icon, popup) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(trip_id, position, place, details['coords'][0], details['coords'][1],
+                  details.get('color', 'blue'), details.get('icon', 'info-sign'), details.get('popup', ''))
+                 for position, (place, details) in enumerate((locations or {}).items())],
+            )
+        return trip_id
+
+    def list_trips(self, limit=None):
+        """``(id, name)`` of saved trips, oldest first."""
+        with self.connection() as conn:
+            return conn.execute(
+                'SELECT id, name FROM trips ORDER BY id LIMIT ?',
+                (-1 if limit is None else limit,),
+            ).fetchall()
+
+    def trip(self, trip_id):
+        with self.connection() as conn:
+            row = conn.execute(
+                'SELECT id, name, start_date, end_date, adults, children, seniors, rooms, party_label '
+                'FROM trips WHERE id = ?', (trip_id,),
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"No trip with id {trip_id}")
+        return Trip(row[0], row[1], date.fromisoformat(row[2]), date.fromisoformat(row[3]),
+                    Party(row[4], row[5], row[6], row[7], row[8]))
+
+    def save_party(self, trip_id, party):
+        self.save_edits(trip_id, party=party)
+
+    # Budget
+
+    def load_costs(self, trip_id):
+        """The trip's Cost Calculator budget as ``{category: amount}``."""
+        with self.connection() as conn:
+            return dict(conn.execute(
+                'SELECT name, amount FROM costs WHERE trip_id = ? ORDER BY position', (trip_id,)
+            ))
+
+    def save_costs(self, trip_id, changes):
+        """Write the changed budget amounts in ``changes`` in one transaction."""
+        self.save_edits(trip_id, costs=changes)
+
+    # Days and line items
+
+    def load_day(self, trip_id, label):
+        """One day's line items in the ``from_daily_costs`` row shape."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                'SELECT a.name, a.category, a.unit_price, a.currency, a.pricing, a.child_discount, a.senior_discount '
+                'FROM days d JOIN activities a ON a.day_id = d.id '
+                'WHERE d.trip_id = ? AND d.label = ? ORDER BY a.position',
+                (trip_id, label),
+            ).fetchall()
+        return [
+            {'Activity': name, 'Category': category, 'Unit Price': price, 'Currency': currency,
+             'Pricing': pricing, 'Child Discount': child_discount, 'Senior Discount': senior_discount}
+            for name, category, price, currency, pricing, child_discount, senior_discount in rows
+        ]
+
+    def open_ledger(self, trip_id, load_day=None):
+        """A ledger for the trip with correct totals but no rows loaded yet.
+
+        Prices are summed in SQL per day, currency, pricing rule and
+        discounts; since a line's components are linear in its price, the
+        sums go through ``line_components`` like single lines do. Days are
+        read with ``load_day(label)`` if given, else ``self.load_day``.
+        """
+        with self.connection() as conn:
+            rows = conn.execute('SELECT id, label FROM days WHERE trip_id = ? ORDER BY position', (trip_id,)).fetchall()
+            excluded = sorted(EXCLUDED_CATEGORIES)
+            groups = conn.execute(
+                'SELECT a.day_id, a.currency, a.pricing, a.child_discount, a.senior_discount, SUM(a.unit_price) '
+                'FROM days d JOIN activities a ON a.day_id = d.id '
+                f'WHERE d.trip_id = ? AND a.category NOT IN ({", ".join("?" * len(excluded))}) '
+                'GROUP BY a.day_id, a.currency, a.pricing, a.child_discount, a.senior_discount',
+                (trip_id, *excluded),
+            ).fetchall()
+        days = [label for _, label in rows]
+        # Stored positions may have gaps, so sums are placed by day id, not position
+        day_index = {day_id: index for index, (day_id, _) in enumerate(rows)}
+        currencies = sorted({group[1] for group in groups})
+        day_sums = np.zeros((len(days), len(currencies), len(PARTY_COMPONENTS)))
+        if groups:
+            day_id, currency, pricing, child_discount, senior_discount, price = zip(*groups)
+            components = line_components(price, [RULE_CODES[rule] for rule in pricing], child_discount, senior_discount)
+            currency_index = [currencies.index(code) for code in currency]
+            np.add.at(day_sums, ([day_index[day] for day in day_id], currency_index), components)
+        return CostLedger.from_summary(days, currencies, day_sums, load_day or partial(self.load_day, trip_id))
+
+    def save_days(self, trip_id, daily_costs):
+        """Replace the line items of the days in ``daily_costs`` in one transaction.
+
+        Days not yet stored for the trip are appended after its last day.
+        """
+        self.save_edits(trip_id, days=daily_costs)
+
+    def save_edits(self, trip_id, days=None, costs=None, party=None):
+        """Write ``days`` (as in ``save_days``), budget ``costs`` and ``party`` in one transaction.
+
+        Either every edit is stored or, if any write fails, none is.
+        """
+        with self.transaction() as conn:
+            for label, activities in (days or {}).items():
+                row = conn.execute('SELECT id FROM days WHERE trip_id = ? AND label = ?', (trip_id, label)).fetchone()
+                if row is None:
+                    day_id = conn.execute(
+                        'INSERT INTO days (trip_id, position, label) '
+                        'SELECT ?, COALESCE(MAX(position) + 1, 0), ? FROM days WHERE trip_id = ?',
+                        (trip_id, label, trip_id),
+                    ).lastrowid
+                else:
+                    day_id = row[0]
+                    conn.execute('DELETE FROM activities WHERE day_id = ?', (day_id,))
+                conn.executemany(
+                    'INSERT INTO activities (day_id, position, name, category, unit_price, currency, pricing, '
+                    'child_discount, senior_discount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [_activity_values(day_id, i, activity) for i, activity in enumerate(activities)],
+                )
+            conn.executemany(
+                'UPDATE costs SET amount = ? WHERE trip_id = ? AND name = ?',
+                [(amount, trip_id, name) for name, amount in (costs or {}).items()],
+            )
+            if party is not None:
+                conn.execute(
+                    'UPDATE trips SET adults = ?, children = ?, seniors = ?, rooms = ?, party_label = ? WHERE id = ?',
+                    (party.adults, party.children, party.seniors, party.rooms, party.label, trip_id),
+                )
+            conn.execute('UPDATE trips SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (trip_id,))
+
+    # Locations
+
+    def load_locations(self, trip_id):
+        """The trip's map markers in the ``route_map.LOCATIONS`` shape."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                'SELECT name, lat, lon, color, icon, popup FROM locations WHERE trip_id = ? ORDER BY position',
+                (trip_id,),
+            ).fetchall()
+        return {
+            name: {"coords": [lat, lon], "color": color, "icon": icon, "popup": popup}
+            for name, lat, lon, color, icon, popup in rows
+        }
@@ -0,0 +1,306 @@
+"""Printable trip packs: itinerary, cost tables, route map and place notes in one file.
+
+A pack is rendered from plain data (``pack_content``), so it can be built in
+another process. Its file is named by a hash of that data, so a pack asked
+for again, by the same session or any other, is read straight from disk.
+``PackExporter`` renders each pack in a fresh interpreter, a few at a time:
+building a big group's pack never holds the GIL of the process serving the
+app. (A multiprocessing pool won't do there: Streamlit runs the app script
+as ``__main__``, which spawned workers would import and run again.)
+
+HTML packs need nothing extra, embed the route map as SVG and print cleanly
+to PDF from a browser. PDF packs are rendered by WeasyPrint when it is
+installed.
+"""
+import hashlib
+import html
+import importlib.util
+import json
+import math
+import os
+import pickle
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+
+from .core import trip_totals
+from .currency import load_rates
+from .imports import lazy_import
+from .ledger import CostLedger
+
+# Bump when the layout changes, so packs cached by older code aren't served
+PACK_VERSION = 1
+FORMATS = ('html', 'pdf')
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PACKS = 64
+
+MAP_WIDTH = 520
+MAP_PADDING = 40
+
+PACK_CSS = """
+body { font-family: Georgia, serif; color: #222; margin: 2rem auto; max-width: 52rem; line-height: 1.45; }
+h1 { text-align: center; margin-bottom: 0.2rem; }
+.subtitle { text-align: center; color: #555; margin-top: 0; }
+h2 { border-bottom: 2px solid #c0392b; padding-bottom: 0.2rem; margin-top: 2rem; }
+section { page-break-before: always; }
+section.first { page-break-before: avoid; }
+table { border-collapse: collapse; width: 100%; margin: 0.5rem 0 1rem; font-size: 0.9rem; }
+th, td { border: 1px solid #ccc; padding: 0.25rem 0.5rem; text-align: left; }
+td.amount, th.amount { text-align: right; white-space: nowrap; }
+tr.subtotal td { font-weight: bold; background: #f4f4f4; }
+.note { border-left: 4px solid #2980b9; background: #eef5fb; padding: 0.4rem 0.8rem; }
+.map { display: block; margin: 1rem auto; border: 1px solid #ccc; }
+@page { size: A4; margin: 1.5cm; }
+"""
+
+
+def _plain(value):
+    if is_dataclass(value):
+        return asdict(value)
+    raise TypeError(f"Can't hash {type(value).__name__}")
+
+
+def pack_content(trip, party, cost_data, daily_costs, currency, rates_version, itinerary, locations, routes,
+                 place_info):
+    """Everything a pack shows, as picklable data; ``trip`` is a ``store.Trip``."""
+    return {
+        'name': trip.name,
+        'dates': trip.date_range(),
+        'party': party,
+        'cost_data': dict(cost_data),
+        'daily_costs': daily_costs,
+        'currency': currency,
+        'rates_version': rates_version,
+        'itinerary': tuple(itinerary),
+        'locations': locations,
+        'routes': routes,
+        'place_info': place_info,
+    }
+
+
+def pack_key(content, fmt):
+    """Hash of a pack's content and format, used as its file name."""
+    payload = json.dumps([PACK_VERSION, fmt, content], default=_plain, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def pdf_available():
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+# Rendering
+
+def _inline(text):
+    """Escape text and turn the itinerary's ``**bold**`` markdown into HTML."""
+    return re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html.escape(text))
+
+
+def route_svg(locations, routes, width=MAP_WIDTH):
+    """The route as a standalone SVG: one line per route, one labelled dot per location."""
+    points = [details['coords'] for details in locations.values()]
+    points += [point for route in routes for point in route['coords']]
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    # Equirectangular, squeezed by the cosine of the middle latitude
+    squeeze = math.cos(math.radians((min(lats) + max(lats)) / 2))
+    span_x = max((max(lons) - min(lons)) * squeeze, 1e-6)
+    span_y = max(max(lats) - min(lats), 1e-6)
+    scale = (width - 2 * MAP_PADDING) / span_x
+    height = round(span_y * scale + 2 * MAP_PADDING)
+
+    def xy(lat, lon):
+        return (round(MAP_PADDING + (lon - min(lons)) * squeeze * scale, 1),
+                round(MAP_PADDING + (max(lats) - lat) * scale, 1))
+
+    parts = [f'<svg class="map" xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="11">',
+             f'<rect width="{width}" height="{height}" fill="#eef5fb"/>']
+    for route in routes:
+        path = ' '.join(f"{x},{y}" for x, y in (xy(*point) for point in route['coords']))
+        parts.append(f'<polyline points="{path}" fill="none" stroke="{html.escape(route["color"])}" '
+                     f'stroke-width="{route["weight"]}" stroke-linecap="round">'
+                     f'<title>{html.escape(route["tooltip"])}</title></polyline>')
+    for name, details in locations.items():
+        x, y = xy(*details['coords'])
+        parts.append(f'<circle cx="{x}" cy="{y}" r="5" fill="{html.escape(details["color"])}" stroke="#fff"/>'
+                     f'<text x="{x + 8}" y="{y + 4}">{html.escape(name)}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _cost_tables(content, rates):
+    party, currency = content['party'], content['currency']
+    ledger = CostLedger.from_daily_costs(content['daily_costs'])
+    lines = ledger.frame(party, rates, currency)
+    parts = []
+    for day, rows in lines.groupby('Day', observed=False, sort=False):
+        parts.append(f"<h3>{html.escape(str(day))}</h3>")
+        if not len(rows):
+            parts.append("<p>No costs.</p>")
+            continue
+        parts.append('<table><tr><th>Activity</th><th>Category</th><th>Pricing</th>'
+                     '<th class="amount">Unit Price</th><th class="amount">Party Total</th></tr>')
+        for _, activity, category, pricing, code, unit_price, total in rows.itertuples(index=False, name=None):
+            parts.append(
+                f"<tr><td>{html.escape(activity)}</td><td>{category}</td><td>{pricing}</td>"
+                f'<td class="amount">{rates.format(unit_price, code, 2)}</td>'
+                f'<td class="amount">{rates.format(total, currency, 2)}</td></tr>'
+            )
+        day_total = ledger.day_total(day, party, rates, currency)
+        parts.append(f'<tr class="subtotal"><td colspan="4">Day total (no flights)</td>'
+                     f'<td class="amount">{rates.format(day_total, currency, 2)}</td></tr></table>')
+    return ledger, ''.join(parts)
+
+
+def render_html(content):
+    """The whole pack as one self-contained HTML document."""
+    rates = load_rates(version=content['rates_version'])
+    party, currency = content['party'], content['currency']
+    ledger, tables = _cost_tables(content, rates)
+    totals = trip_totals(content['cost_data'], ledger, party, rates, currency)
+
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f"<title>{html.escape(content['name'])}</title><style>{PACK_CSS}</style></head><body>",
+        f"<h1>{html.escape(content['name'])}</h1>",
+        f'<p class="subtitle">{html.escape(party.describe())} | {html.escape(content["dates"])}</p>',
+        '<section class="first"><h2>Summary</h2><table>',
+    ]
+    for label, amount in (("Flights", totals['flights']), ("Daily costs (no flights)", totals['daily']),
+                          ("Grand total", totals['grand']), ("Per person", party.per_person(totals['grand']))):
+        parts.append(f'<tr><td>{label}</td><td class="amount">{rates.format(amount, currency, 2)}</td></tr>')
+    parts.append(f"</table><p>Rates of {html.escape(rates.version)}.</p>")
+    parts.append(route_svg(content['locations'], content['routes']))
+    parts.append("</section>")
+
+    parts.append("<section><h2>Itinerary</h2>")
+    for day in content['itinerary']:
+        parts.append(f"<h3>{html.escape(day.emoji)} Day {day.number}: {html.escape(day.title)}</h3>"
+                     f"<p><strong>Route:</strong> {html.escape(day.route)}</p><ul>")
+        for event in day.events:
+            notes = ''.join(f"<li>{_inline(note)}</li>" for note in event.notes)
+            parts.append(f"<li><strong>{html.escape(event.time)}</strong> - {_inline(event.text)}"
+                         + (f"<ul>{notes}</ul>" if notes else '') + "</li>")
+        parts.append("</ul>")
+        if day.note:
+            parts.append(f'<p class="note">{html.escape(day.note)}</p>')
+    parts.append("</section>")
+
+    parts.append(f"<section><h2>Costs ({html.escape(currency)})</h2>{tables}</section>")
+
+    parts.append("<section><h2>Places</h2>")
+    for place, info in content['place_info'].items():
+        parts.append(f"<h3>{html.escape(place)}</h3><p>{html.escape(info['description'])}</p>"
+                     f"<p><strong>Highlights:</strong> {html.escape(', '.join(info['highlights']))}<br>"
+                     f"<strong>Visit time:</strong> {html.escape(info['visit_time'])}<br>"
+                     f"<strong>Best time:</strong> {html.escape(info['best_time'])}</p>")
+    parts.append("</section></body></html>")
+    return ''.join(parts)
+
+
+def render_pack(content, fmt):
+    """Pack bytes in ``fmt`` (``'html'`` or ``'pdf'``)."""
+    document = render_html(content)
+    if fmt == 'pdf':
+        return lazy_import('weasyprint').HTML(string=document).write_pdf()
+    return document.encode('utf-8')
+
+
+def _write_pack(content, fmt, path):
+    data = render_pack(content, fmt)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    # Renamed into place, so a reader never sees a partial pack
+    os.replace(tmp, path)
+
+
+def _build(content, fmt, path):
+    """Render a pack in a child interpreter and wait for it; runs on an exporter thread."""
+    with tempfile.NamedTemporaryFile('wb', suffix='.job', dir=os.path.dirname(path), delete=False) as f:
+        pickle.dump((content, fmt, path), f)
+    try:
+        result = subprocess.run(
+            [sys.executable, '-m', __name__, f.name],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=False,
+        )
+    finally:
+        os.remove(f.name)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "render failed")
+    return path
+
+
+class PackExporter:
+    """Builds up to ``workers`` packs at once and keeps the last ``max_packs`` on disk; safe to share between sessions."""
+
+    def __init__(self, cache_dir, workers=DEFAULT_WORKERS, max_packs=DEFAULT_MAX_PACKS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_packs = max_packs
+        self._jobs = {}
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def submit(self, content, fmt='html'):
+        """Start building a pack unless it is on disk or already being built; return its key."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown pack format {fmt!r}; expected one of {FORMATS}")
+        key = pack_key(content, fmt)
+        path = self.path(key, fmt)
+        with self._lock:
+            job = self._jobs.get(key)
+            if os.path.exists(path) or (job and not (job.done() and job.exception())):
+                return key
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='trip-pack')
+            self._prune()
+            self._jobs[key] = self._pool.submit(_build, content, fmt, path)
+        return key
+
+    def status(self, key, fmt='html'):
+        """``('ready', path)``, ``('building', None)``, ``('failed', message)`` or ``('missing', None)``.
+
+        A failed build is reported until the pack is submitted again.
+        """
+        path = self.path(key, fmt)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                if not job.done():
+                    return 'building', None
+                if job.exception():
+                    return 'failed', f"{type(job.exception()).__name__}: {job.exception()}"
+                del self._jobs[key]
+        if os.path.exists(path):
+            return 'ready', path
+        return 'missing', None
+
+    def _prune(self):
+        """Delete the oldest packs beyond ``max_packs``, leaving room for one more."""
+        packs = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(FORMATS)]
+        packs.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in packs[:max(0, len(packs) - self.max_packs + 1)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == '__main__':
+    # Child side of _build: the job file holds (content, fmt, path)
+    with open(sys.argv[1], 'rb') as job:
+        _write_pack(*pickle.load(job))
@@ -0,0 +1,188 @@
+"""What-if variants of a trip: other day orders and other overnight bases.
+
+A variant is an order of the itinerary's days plus the place slept in after
+every day but the last. Each day walks through its events' mapped locations
+in order, starting from the previous night's base and finishing at the next
+one. Variants are scored on three objectives, all to be minimized:
+
+- cost: the ledger's daily costs (flights excluded), with accommodation
+  priced per night at what the trip pays at each base and transport
+  proportional to distance, calibrated so the planned trip costs exactly
+  its ledger total;
+- distance: great-circle km travelled;
+- overnight changes: how many times the party moves to a different base.
+
+Scoring works on whole arrays of variants with a handful of NumPy gathers,
+so hundreds of thousands of variants score in well under a second.
+"""
+import math
+from itertools import combinations, permutations, product
+
+import numpy as np
+
+from .imports import lazy_import
+from .ledger import CATEGORIES
+from .routing import haversine_matrix
+
+_FLIGHT = CATEGORIES.index('Flight')
+_TRANSPORT = CATEGORIES.index('Transport')
+_ACCOMMODATION = CATEGORIES.index('Accommodation')
+
+
+class VariantSpace:
+    """The days, places and prices that variants of one trip are built from.
+
+    ``day_costs`` is ``CostLedger.day_category_totals`` for the itinerary's
+    days, in the same order; ``locations`` is the map data. Event locations
+    that aren't on the map, such as the airports abroad, are ignored.
+    """
+
+    def __init__(self, itinerary, locations, day_costs):
+        self.days = tuple(itinerary)
+        self.places = list(locations)
+        day_costs = np.asarray(day_costs, dtype=np.float64)
+        if len(day_costs) != len(self.days):
+            raise ValueError(f"Got costs for {len(day_costs)} days, expected {len(self.days)}")
+        index = {name: i for i, name in enumerate(self.places)}
+        self.dist = haversine_matrix([locations[name]["coords"] for name in self.places])
+
+        first, last, internal = [], [], []
+        for day in self.days:
+            path = np.array([index[event.location.name] for event in day.events
+                             if event.location and event.location.name in index], dtype=np.intp)
+            if not len(path):
+                raise ValueError(f"Day {day.number} has no events at a mapped location")
+            first.append(path[0])
+            last.append(path[-1])
+            internal.append(self.dist[path[:-1], path[1:]].sum())
+        self.first = np.array(first, dtype=np.intp)
+        self.last = np.array(last, dtype=np.intp)  # where the plan sleeps after each day
+        self.internal = np.array(internal)
+
+        # Nightly rate at each base: what the plan pays there, or its average hotel if it never stays
+        nights = len(self.days) - 1
+        accommodation = day_costs[:nights, _ACCOMMODATION]
+        paid = np.bincount(self.last[:nights], weights=accommodation, minlength=len(self.places))
+        stays = np.bincount(self.last[:nights], minlength=len(self.places))
+        rates = np.divide(paid, stays, out=np.zeros_like(paid), where=stays > 0)
+        hotels = rates[rates > 0]
+        rates[stays == 0] = hotels.mean() if len(hotels) else 0.0
+        self.nightly_rates = rates
+
+        transport = day_costs[:, _TRANSPORT].sum()
+        self.fixed_cost = day_costs.sum() - day_costs[:, _FLIGHT].sum() - transport - accommodation.sum()
+        planned_km = self._distance(*self.planned())[0]
+        self.cost_per_km = transport / planned_km if planned_km > 0 else 0.0
+
+    def planned(self):
+        """The itinerary as written, as a one-variant ``(orders, nights)`` pair."""
+        return np.arange(len(self.days))[None, :], self.last[None, :-1]
+
+    def _distance(self, orders, nights):
+        starts = np.column_stack([self.first[orders[:, 0]], nights])
+        ends = np.column_stack([nights, self.last[orders[:, -1]]])
+        legs = self.dist[starts, self.first[orders]] + self.internal[orders] + self.dist[self.last[orders], ends]
+        return legs.sum(axis=1)
+
+    def score(self, orders, nights):
+        """``(cost, distance, changes)`` arrays for variants given as ``(V, days)`` and ``(V, days - 1)`` arrays."""
+        distance = self._distance(orders, nights)
+        cost = self.fixed_cost + self.nightly_rates[nights].sum(axis=1) + self.cost_per_km * distance
+        changes = (nights[:, 1:] != nights[:, :-1]).sum(axis=1)
+        return cost, distance, changes
+
+    def variants(self, pinned=None, max_swaps=1, limit=200_000, seed=0):
+        """Day orders and base swaps as ``(orders, nights)``, the planned trip first.
+
+        Days numbered in ``pinned`` (default: the first and last) keep their
+        place. Every other day may move; by default it brings its planned
+        overnight base along, and up to ``max_swaps`` nights then sleep
+        somewhere else. Every combination is enumerated when there are at
+        most ``limit``; otherwise ``limit`` are sampled at random.
+        """
+        n_days, n_nights, n_places = len(self.days), len(self.days) - 1, len(self.places)
+        if pinned is None:
+            pinned = (self.days[0].number, self.days[-1].number)
+        movable = [i for i, day in enumerate(self.days) if day.number not in pinned]
+        n_orders = math.factorial(len(movable))
+        n_swaps = sum(math.comb(n_nights, k) * n_places ** k for k in range(max_swaps + 1))
+
+        if n_orders * n_swaps <= limit:
+            orders = np.tile(np.arange(n_days), (n_orders, 1))
+            orders[:, movable] = list(permutations(movable))
+            mask = np.zeros((n_swaps, n_nights), dtype=bool)
+            values = np.zeros((n_swaps, n_nights), dtype=np.intp)
+            row = 0
+            for k in range(max_swaps + 1):
+                for at in combinations(range(n_nights), k):
+                    for places in product(range(n_places), repeat=k):
+                        mask[row, list(at)] = True
+                        values[row, list(at)] = places
+                        row += 1
+            orders = np.repeat(orders, n_swaps, axis=0)
+            mask, values = np.tile(mask, (n_orders, 1)), np.tile(values, (n_orders, 1))
+        else:
+            rng = np.random.default_rng(seed)
+            orders = np.tile(np.arange(n_days), (limit, 1))
+            orders[:, movable] = rng.permuted(np.tile(movable, (limit, 1)), axis=1)
+            swaps = rng.integers(0, max_swaps + 1, limit)
+            mask = rng.random((limit, n_nights)).argsort(axis=1) < swaps[:, None]
+            values = rng.integers(0, n_places, (limit, n_nights))
+        nights = np.where(mask, values, self.last[orders[:, :-1]])
+
+        # Repeats (a swap to the planned base, a resampled variant) are left in; they can't change the front
+        planned_orders, planned_nights = self.planned()
+        return np.vstack([planned_orders, orders]), np.vstack([planned_nights, nights])
+
+    def frame(self, orders, nights, rows):
+        """Table of the variants at ``rows``: day order, bases and scores."""
+        cost, distance, changes = self.score(orders[rows], nights[rows])
+        planned_orders, planned_nights = self.planned()
+        pd = lazy_import('pandas')
+        return pd.DataFrame({
+            'Day Order': [' → '.join(str(self.days[i].number) for i in order) for order in orders[rows]],
+            'Overnight Bases': [_runs(self.places[i] for i in bases) for bases in nights[rows]],
+            'Cost': cost,
+            'Distance (km)': distance.round(),
+            'Overnight Changes': changes,
+            'Planned': [(order == planned_orders[0]).all() and (bases == planned_nights[0]).all()
+                        for order, bases in zip(orders[rows], nights[rows])],
+        })
+
+    def search(self, pinned=None, max_swaps=1, limit=200_000, seed=0):
+        """Pareto-optimal variants as a table sorted by cost, and how many variants were scored."""
+        orders, nights = self.variants(pinned, max_swaps, limit, seed)
+        front = pareto_front(*self.score(orders, nights))
+        return self.frame(orders, nights, front), len(orders)
+
+
+def _runs(names):
+    """``"London ×2, Edinburgh"`` for consecutive repeats."""
+    runs = []
+    for name in names:
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return ', '.join(name if count == 1 else f"{name} ×{count}" for name, count in runs)
+
+
+def pareto_front(cost, distance, changes):
+    """Indices of the variants no other variant matches or beats on all three scores, by cost.
+
+    Variants with the same (rounded) scores count once. ``changes`` takes
+    few distinct values, so after a lexicographic sort a variant is dominated
+    exactly when an earlier one with no more changes is no longer: one
+    running minimum per change level instead of comparing every pair.
+    """
+    cost, distance, changes = np.round(cost, 2), np.round(distance, 1), np.asarray(changes)
+    first = np.lexsort((changes, distance, cost))
+    points = np.column_stack([cost[first], distance[first], changes[first]])
+    distinct = np.concatenate([[True], (points[1:] != points[:-1]).any(axis=1)])
+    points, first = points[distinct], first[distinct]
+    dominated = np.zeros(len(points), dtype=bool)
+    for level in np.unique(points[:, 2]):
+        allowed = np.where(points[:, 2] <= level, points[:, 1], np.inf)
+        best_before = np.concatenate([[np.inf], np.minimum.accumulate(allowed)[:-1]])
+        dominated |= (points[:, 2] == level) & (best_before <= points[:, 1])
+    return first[~dominated]
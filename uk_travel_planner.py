@@ -1,12 +1,43 @@
 import streamlit as st
-import pandas as pd
-import folium
-from streamlit_folium import st_folium
-import plotly.express as px
-import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import functools
+import html
+import os
+import textwrap
+from collections import ChainMap
+from dataclasses import replace
 from datetime import datetime, timedelta
+from types import MappingProxyType
 import numpy as np
-from PIL import Image
+
+from trip_planner.analytics import FIGURES, cost_summary, summary_key
+from trip_planner.assets import build_variants
+from trip_planner.catalog import load_catalog
+from trip_planner.core import trip_totals
+from trip_planner.currency import BASE_CURRENCY, available_versions, load_rates
+from trip_planner.defaults import (
+    DEFAULT_COST_DATA, DEFAULT_DAILY_COSTS, DEFAULT_END_DATE, DEFAULT_ITINERARY, DEFAULT_START_DATE,
+    DEFAULT_TRIP_NAME, PLACES
+)
+from trip_planner.history import EditLog
+from trip_planner.image_store import PlaceImageStore
+from trip_planner.imports import IMPORT_TIMES, lazy_import, startup_profile, top_level_imports
+from trip_planner.itinerary import day_key, day_markdown
+from trip_planner.ledger import CATEGORIES, EXCLUDED_CATEGORIES, CostLedger
+from trip_planner.mailer import Mailer, parse_recipients, summary_context
+from trip_planner.memory import deep_sizeof, format_bytes
+from trip_planner.profiling import Profiler
+from trip_planner.pricing import DEFAULT_PARTY, PRICING_RULES, Party
+from trip_planner.route_map import LOCATIONS, ROUTES, build_route_map, route_data_key, route_map_html
+from trip_planner.routing import build_routes, optimize_order, route_lengths
+from trip_planner.schedule import check_schedule
+from trip_planner.shared import BUDGET, DAY, PARTY, Conflict, SharedTrip
+from trip_planner.simulation import (
+    BUDGET_UNCERTAINTY, DEFAULT_SAMPLES, LINE_ITEM_UNCERTAINTY, Uncertainty, simulate_totals, summarize
+)
+from trip_planner.store import DEFAULT_DB_PATH, TripStore
+from trip_planner.trip_pack import PackExporter, pack_content, pdf_available
+from trip_planner.variants import VariantSpace
 
 # Page configuration
 st.set_page_config(
@@ -16,15 +47,109 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def count_delta_messages():
+    """Element messages this session has sent so far, counted at the run context's send hook."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return 0
+    counter = getattr(ctx, 'delta_message_count', None)
+    if counter is None:
+        counter = ctx.delta_message_count = [0]
+        send = ctx._enqueue
+
+        def counting_send(msg):
+            if msg.WhichOneof('type') == 'delta':
+                counter[0] += 1
+            send(msg)
+
+        ctx._enqueue = counting_send
+    return counter[0]
+
+
+# Opt-in profiling: ?profile=1 for one session, TRIP_PROFILE=1 for every session
+profiling = st.query_params.get('profile') == '1' or os.environ.get('TRIP_PROFILE') == '1'
+if profiling:
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = Profiler(count_delta_messages, log_path=os.environ.get('TRIP_PROFILE_LOG'))
+    st.session_state.profiler.begin_run()
+
+
+def profiled(name):
+    """Record each run of a section (full or fragment rerun) as a span while profiling is on."""
+    def decorate(render):
+        @functools.wraps(render)
+        def wrapper(*args, **kwargs):
+            profiler = st.session_state.get('profiler') if profiling else None
+            if profiler is None:
+                return render(*args, **kwargs)
+            ctx = get_script_run_ctx()
+            if ctx is not None and ctx.fragment_ids_this_run:
+                profiler.begin_run('fragment')
+            with profiler.span(name):
+                return render(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@st.cache_resource(show_spinner=False)
+def load_image_assets(path, mtime_ns, size):
+    """Decode a photo once per process and write its pre-sized variants to ./static."""
+    try:
+        return build_variants(path, os.path.join(APP_DIR, 'static'))
+    except OSError:
+        return None
+
+
+def image_assets(filename):
+    """Return the variant URLs for ``filename``, rebuilt only when the file changes."""
+    path = os.path.join(APP_DIR, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return load_image_assets(path, stat.st_mtime_ns, stat.st_size)
+
+
+photo_assets = image_assets("1.jpg")
+
+
+@st.cache_resource(show_spinner=False)
+def place_image_store():
+    """Uploaded place photos, shared by every session on this server."""
+    return PlaceImageStore(os.path.join(APP_DIR, 'static'))
+
+
+@st.cache_resource(show_spinner=False)
+def attraction_catalog():
+    """The attraction catalog and its search indexes, built once per process."""
+    return load_catalog()
+
+# Background photo, served as a hashed static file instead of url('1.jpg'),
+# which Streamlit never served
+shade = "linear-gradient(rgba(0,0,0,0.4), rgba(0,0,0,0.4))"
+if photo_assets:
+    background = photo_assets['background']
+    app_background = (
+        f"background: {shade}, url('{background['JPEG']}');\n"
+        f"        background-image: {shade}, image-set(url('{background['WEBP']}') type('image/webp'), "
+        f"url('{background['JPEG']}') type('image/jpeg'));"
+    )
+else:
+    app_background = f"background: {shade};"
+
 # Custom CSS with proper background and clean styling
-st.markdown("""
+st.markdown(f"""
 <style>
-    .stApp {
-        background: linear-gradient(rgba(0,0,0,0.4), rgba(0,0,0,0.4)), url('1.jpg');
+    .stApp {{
+        {app_background}
         background-size: cover;
         background-position: center;
         background-attachment: fixed;
-    }
+    }}
+""" + """
     .main-header {
         font-size: 3.5rem;
         color: #ffffff;
@@ -62,258 +187,305 @@ st.markdown("""
         border: 2px solid #28a745;
         margin: 1rem 0;
     }
+    .itinerary-note {
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0 1rem 0;
+    }
+    .note-info { background: rgba(28,131,225,0.1); color: #004280; }
+    .note-success { background: rgba(33,195,84,0.1); color: #177233; }
+    .note-warning { background: rgba(255,189,69,0.2); color: #926c05; }
     .place-image {
         border-radius: 10px;
         box-shadow: 0 4px 15px rgba(0,0,0,0.2);
         margin: 0.5rem;
     }
+    .place-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(140px, 1fr));
+        gap: 0.75rem;
+        margin: 1rem 0;
+    }
+    .place-grid figure { margin: 0; text-align: center; font-size: 0.8rem; }
+    .place-grid img, .place-grid .place-missing {
+        width: 100%;
+        aspect-ratio: 4 / 3;
+        object-fit: cover;
+        border-radius: 8px;
+    }
+    .place-missing {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-size: 2rem;
+        background: rgba(0,0,0,0.05);
+    }
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def load_exchange_rates(version):
+    """Load one rates snapshot per process."""
+    return load_rates(version=version)
+
+
+rates = load_exchange_rates(available_versions()[-1])
+
+@st.cache_resource(show_spinner=False)
+def trip_store():
+    """One pool of database connections per process; an empty database gets the default trip."""
+    store = TripStore(os.environ.get('TRIP_DB_PATH', DEFAULT_DB_PATH))
+    if not store.list_trips(limit=1):
+        daily_costs = CostLedger.from_daily_costs(DEFAULT_DAILY_COSTS).to_daily_costs()
+        store.create_trip(DEFAULT_TRIP_NAME, DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_PARTY,
+                          DEFAULT_COST_DATA, daily_costs, LOCATIONS)
+    return store
+
+
+store = trip_store()
+
+
+@st.cache_resource(show_spinner=False)
+def shared_trip(trip_id):
+    """Version counters of one trip, shared by every session editing it on this server."""
+    return SharedTrip(store, trip_id)
+
+
+def open_trip(trip_id):
+    """Point this session at a saved trip: its budget, party and list of days, but no line items yet."""
+    trip = store.trip(trip_id)
+    shared = shared_trip(trip_id)
+    st.session_state.trip = trip
+    st.session_state.party = trip.party
+    # Versions this session's copy was read at; read before the data, so the data is at least as new
+    seen = st.session_state.seen_versions = shared.versions()
+
+    def load_day(day):
+        seen[(DAY, day)] = shared.version((DAY, day))
+        return store.load_day(trip_id, day)
+
+    # Each session keeps only its own edits on top of the stored budget
+    st.session_state.cost_data = ChainMap({}, MappingProxyType(store.load_costs(trip_id)))
+    st.session_state.ledger = store.open_ledger(trip_id, load_day)
+    # Budget and line item edits go through the log, so they can be undone
+    st.session_state.history = EditLog(st.session_state.ledger, st.session_state.cost_data)
+    st.session_state.table_frames = {}
+    st.query_params['trip'] = str(trip_id)
+
+
+def pull_changes(keys=None):
+    """Reload the days, budget lines and party other sessions committed since this one read them.
+
+    Only ``keys`` are checked if given. An edit history that touched a
+    reloaded day or line starts over, as its edits no longer line up with
+    the rows. Returns the reloaded keys.
+    """
+    trip_id = st.session_state.trip.id
+    shared = shared_trip(trip_id)
+    seen = st.session_state.seen_versions
+    changed = shared.changed(seen, keys)
+    if not changed:
+        return changed
+    ledger, cost_data, history = st.session_state.ledger, st.session_state.cost_data, st.session_state.history
+    restart_history = False
+    budget = None
+    for key in changed:
+        kind, name = key
+        seen[key] = shared.version(key)
+        if kind == BUDGET:
+            budget = budget or store.load_costs(trip_id)
+            cost_data.maps[0].pop(name, None)
+            # Its Cost Calculator input reads the new amount on its next run
+            st.session_state.pop(f"{trip_id}:{name}", None)
+            restart_history |= history.touches('cost', name)
+        elif kind == PARTY:
+            party = store.trip(trip_id).party
+            st.session_state.party = party
+            st.session_state.trip = replace(st.session_state.trip, party=party)
+            # The party inputs read the new counts on their next run
+            for count in ('adults', 'children', 'seniors', 'rooms'):
+                st.session_state.pop(f"{trip_id}:{count}", None)
+        else:
+            ledger.replace_day(name, store.load_day(trip_id, name))
+            restart_history |= history.touches('line', name)
+    if budget is not None:
+        cost_data.maps[-1] = MappingProxyType(budget)
+    # The reloaded days are what the store already holds
+    ledger.take_dirty_days()
+    if restart_history:
+        st.session_state.history = EditLog(ledger, cost_data)
+    return changed
+
+
+def save_edits():
+    """Commit the days and budget lines edited since the last save to the store.
+
+    Commits compare versions with what other sessions committed: where
+    someone else got there first, their version is reloaded and this
+    session's edit to it dropped. Returns the saved budget lines as
+    ``{name: amount}``.
+    """
+    ledger = st.session_state.ledger
+    days = {day: [ledger.get(row) for row in ledger.rows(day)] for day in ledger.take_dirty_days()}
+    costs = st.session_state.history.take_dirty_costs()
+    shared = shared_trip(st.session_state.trip.id)
+    while days or costs:
+        try:
+            st.session_state.seen_versions.update(shared.commit(st.session_state.seen_versions, days, costs))
+            break
+        except Conflict as conflict:
+            for kind, name in conflict.keys:
+                (days if kind == DAY else costs).pop(name, None)
+            pull_changes(conflict.keys)
+            st.toast(f"{conflict}. Reloaded their version; your edit there was not saved.", icon="⚠️")
+    return costs
+
+
+def save_party(party):
+    """Commit a new travelling party, unless another session changed it first; then theirs is reloaded."""
+    shared = shared_trip(st.session_state.trip.id)
+    try:
+        st.session_state.seen_versions.update(shared.commit(st.session_state.seen_versions, party=party))
+        st.session_state.party = party
+    except Conflict as conflict:
+        pull_changes(conflict.keys)
+        st.toast(f"{conflict}. Reloaded their version; your edit there was not saved.", icon="⚠️")
+
+
+# Initialize session state for editable content
+if 'display_currency' not in st.session_state:
+    st.session_state.display_currency = BASE_CURRENCY
+
+# The open trip is kept in the URL, so a refresh reopens it from the store
+if 'trip' not in st.session_state:
+    try:
+        open_trip(int(st.query_params.get('trip')))
+    except (TypeError, ValueError, KeyError):
+        open_trip(store.list_trips(limit=1)[0][0])
+else:
+    # Other travellers may be editing the same trip; take in what they committed
+    pull_changes()
+
 # Title
-st.markdown('''
+st.markdown(f'''
 <div class="main-header">
-    🎄 UK Epic Christmas Trip 🎄<br>
+    🎄 {st.session_state.trip.name} 🎄<br>
     <h2 style="margin-top: 1rem; font-size: 2rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.8);">Finally Shine is Leaving the District, State and Country Hurray!</h2>
-    <p style="font-size: 1.2rem; margin-top: 1rem; text-shadow: 1px 1px 2px rgba(0,0,0,0.8);">Group of 4: Couple + 2 Individuals | Dec 25, 2024 - Jan 1, 2025</p>
+    <p style="font-size: 1.2rem; margin-top: 1rem; text-shadow: 1px 1px 2px rgba(0,0,0,0.8);">{st.session_state.party.describe()} | {st.session_state.trip.date_range()}</p>
 </div>
 ''', unsafe_allow_html=True)
 
-# Initialize session state for editable content
-if 'cost_data' not in st.session_state:
-    st.session_state.cost_data = {
-        'Flights': 600,
-        'London Accommodation (3 nights)': 300,
-        'Edinburgh/Highland Accommodation': 200,
-        'Transport (all trains/buses)': 180,
-        'Attractions': 150,
-        'Food Budget': 350,
-        'Shopping & Souvenirs': 200,
-        'Emergency Fund': 100
-    }
+# Version counters for the shared trip data, bumped on every edit
+if 'data_versions' not in st.session_state:
+    st.session_state.data_versions = {'flights': 0, 'cost_data': 0, 'daily_costs': 0, 'party': 0, 'currency': 0}
 
-# Initialize daily cost tables
-if 'daily_costs' not in st.session_state:
-    st.session_state.daily_costs = {
-        'Day 1 - Christmas London': [
-            {'Activity': 'Heathrow Express', 'Individual': 25, 'Couple': 50, 'Total_4': 100},
-            {'Activity': 'Tower Bridge (walk)', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Tower of London', 'Individual': 29.90, 'Couple': 59.80, 'Total_4': 119.60},
-            {'Activity': 'London Eye', 'Individual': 32, 'Couple': 64, 'Total_4': 128},
-            {'Activity': 'London Day Travel Card', 'Individual': 15, 'Couple': 30, 'Total_4': 60}
-        ],
-        'Day 2 - Boxing Day London': [
-            {'Activity': 'Buckingham Palace', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Hyde Park Winter Wonderland', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Ice Skating', 'Individual': 17, 'Couple': 34, 'Total_4': 68},
-            {'Activity': 'London Day Travel Card', 'Individual': 15, 'Couple': 30, 'Total_4': 60}
-        ],
-        'Day 3 - Final London': [
-            {'Activity': 'The Shard', 'Individual': 32, 'Couple': 64, 'Total_4': 128},
-            {'Activity': 'British Museum', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Chelsea FC Stadium', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Train to Northallerton', 'Individual': 45, 'Couple': 90, 'Total_4': 180},
-            {'Activity': 'London Day Travel Card', 'Individual': 15, 'Couple': 30, 'Total_4': 60}
-        ],
-        'Day 4 - Northern England': [
-            {'Activity': 'Train to Durham', 'Individual': 15, 'Couple': 30, 'Total_4': 60},
-            {'Activity': 'Durham Cathedral', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Train Durham-Newcastle', 'Individual': 8, 'Couple': 16, 'Total_4': 32},
-            {'Activity': 'Bus Newcastle-Whitby', 'Individual': 12, 'Couple': 24, 'Total_4': 48},
-            {'Activity': 'Whitby Abbey', 'Individual': 7.20, 'Couple': 14.40, 'Total_4': 28.80},
-            {'Activity': 'Bus Whitby-Northallerton', 'Individual': 10, 'Couple': 20, 'Total_4': 40}
-        ],
-        'Day 5 - Edinburgh to Highlands': [
-            {'Activity': 'Train to Edinburgh', 'Individual': 35, 'Couple': 70, 'Total_4': 140},
-            {'Activity': 'Edinburgh Castle', 'Individual': 19.50, 'Couple': 39, 'Total_4': 78},
-            {'Activity': 'Train Edinburgh-Fort William', 'Individual': 45, 'Couple': 90, 'Total_4': 180},
-            {'Activity': 'Fort William Accommodation', 'Individual': 40, 'Couple': 80, 'Total_4': 160}
-        ],
-        'Day 6 - Scottish Highlands': [
-            {'Activity': 'Highland Day Tour', 'Individual': 65, 'Couple': 130, 'Total_4': 260},
-            {'Activity': 'Ben Nevis Views', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Glenfinnan Viaduct', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Glen Coe Views', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Fort William Accommodation', 'Individual': 40, 'Couple': 80, 'Total_4': 160}
-        ],
-        'Day 7 - Edinburgh Hogmanay': [
-            {'Activity': 'Train Fort William-Edinburgh', 'Individual': 45, 'Couple': 90, 'Total_4': 180},
-            {'Activity': 'Holyrood Palace', 'Individual': 17.50, 'Couple': 35, 'Total_4': 70},
-            {'Activity': 'Arthur\'s Seat (free)', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Hogmanay Street Party', 'Individual': 0, 'Couple': 0, 'Total_4': 0},
-            {'Activity': 'Edinburgh Airport Hotel', 'Individual': 37.50, 'Couple': 75, 'Total_4': 150}
-        ],
-        'Day 8 - Departure': [
-            {'Activity': 'Airport Bus', 'Individual': 8, 'Couple': 16, 'Total_4': 32}
-        ]
-    }
+# Each section is a fragment that reruns on its own; these are the shared
+# data keys a section reads and so must be redrawn for when another one edits them
+SECTION_DEPENDENCIES = {
+    'itinerary': set(),
+    'flights': {'flights', 'party', 'currency'},
+    'cost_calculator': {'flights', 'cost_data', 'daily_costs', 'party', 'currency'},
+    'price_tables': {'daily_costs', 'party', 'currency'},
+    'place_images': set(),
+    'route_map': set(),
+    'sidebar': {'flights', 'daily_costs', 'party', 'currency'},
+    'footer': {'flights', 'daily_costs', 'party', 'currency'},
+}
+
+
+def mark_changed(section, key):
+    """Record an edit made by ``section`` and rerun the app only if another section depends on it."""
+    st.session_state.data_versions[key] += 1
+    if any(key in deps for name, deps in SECTION_DEPENDENCIES.items() if name != section):
+        st.rerun(scope="app")
+
+
+def session_frame(slot, key, build):
+    """A table frame kept in this session until ``key``, the versions of its data, changes.
+
+    Not ``st.cache_data``: each session's ledger counts its own versions, so
+    the same key in another session can mean different rows.
+    """
+    frames = st.session_state.table_frames
+    cached = frames.get(slot)
+    if cached is None or cached[0] != key:
+        cached = frames[slot] = (key, build())
+    return cached[1]
+
+
+def money(amount, decimals=0, currency=None):
+    """Format an amount already in ``currency`` (default: the display currency)."""
+    return rates.format(amount, currency or st.session_state.display_currency, decimals)
+
+
+def from_gbp(amount, currency=None):
+    """Convert a GBP amount, such as a Cost Calculator budget, to ``currency``."""
+    return amount * rates.rate(BASE_CURRENCY, currency or st.session_state.display_currency)
+
+
+def entry_price(attraction):
+    """An attraction's adult entry price in its own currency, or "Free"."""
+    return rates.format(attraction.price, attraction.currency, 2) if attraction.price else "Free"
+
+
+def home_currency():
+    """Currency for the secondary figures: INR for the travellers, or GBP when INR is on display."""
+    return 'INR' if st.session_state.display_currency != 'INR' else BASE_CURRENCY
+
+
+def rate_note():
+    """e.g. ``@₹105/£`` for the home currency."""
+    home = home_currency()
+    display = st.session_state.display_currency
+    return f"@{money(rates.rate(display, home), 2, home)}/{rates.symbols.get(display, display)}"
 
-# Main content tabs
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "📅 Day-by-Day Itinerary", 
-    "✈️ Flight Details", 
-    "💰 Cost Calculator", 
-    "📊 Editable Price Tables",
-    "🖼️ Place Images",
-    "🗺️ Interactive Map"
-])
 
 # Tab 1: Clean Itinerary
-with tab1:
+@st.cache_data(show_spinner=False)
+def cached_day_markdown(day_key, _day, separator):
+    """Render a day once per version of its content (``day_key``)."""
+    return day_markdown(_day, separator)
+
+
+@st.cache_data(show_spinner=False)
+def cached_schedule_check(day_keys, _itinerary):
+    """Timetable conflicts, recomputed only when a day's content changes."""
+    return check_schedule(_itinerary)
+
+
+@st.fragment
+@profiled("Itinerary")
+def render_itinerary():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
-    st.markdown("# 📅 Complete 8-Day Itinerary")
-    
-    # Day 1
-    st.markdown("## 🎄 Day 1: Christmas Day - December 25")
-    st.markdown("**Location:** Trivandrum → London")
-    st.markdown("### Tower Thames Area (All Walking Distance)")
-    
-    st.write("**03:55 IST** - Departure from Trivandrum (Qatar Airways)")
-    st.write("**13:20 GMT** - Arrive London")
-    st.write("**15:00** - Heathrow Express to Central London")
-    st.write("**16:00** - Hotel check-in & freshen up")
-    st.write("**17:00** - **Lunch/Late Breakfast**")
-    st.write("**18:00** - **Tower Bridge** - Walk across, iconic Christmas photos")
-    st.write("**19:00** - **Tower of London** - Crown Jewels, Beefeaters (5-min walk)")
-    st.write("**20:30** - **Walk along Thames to Westminster** (20 mins riverside)")
-    st.write("**21:00** - **London Eye** - Christmas evening panoramic views")
-    st.write("**22:30** - **Christmas Dinner**")
-    
-    st.info("💡 Christmas Day: Limited tube services, but all these attractions walkable along Thames")
-    st.markdown("---")
-    
-    # Day 2
-    st.markdown("## 🎁 Day 2: Boxing Day - December 26")
-    st.markdown("**Location:** London")
-    st.markdown("### Royal London & Christmas Lights Circuit")
-    
-    st.write("**09:00** - **Breakfast**")
-    st.write("**10:00** - **Tube to Green Park** → **Buckingham Palace** - Guard changing, royal atmosphere")
-    st.write("**11:30** - **Walk through St. James's Park** - Royal park, lake views")
-    st.write("**12:30** - **Tube to Hyde Park Corner** → **Hyde Park Winter Wonderland**")
-    st.write("**14:00** - **Lunch** at Winter Wonderland")
-    st.write("**15:30** - **Ice skating** and Christmas market exploration")
-    st.write("**16:30** - **Tube to Oxford Circus** → **Oxford Street Christmas Lights**")
-    st.write("**17:00** - **Walk to Regent Street** → **Regent Street Christmas Lights**")
-    st.write("**17:30** - **Walk to Covent Garden** → **Christmas Market, street performers**")
-    st.write("**18:30** - **Walk to Leicester Square** → **Christmas decorations and buzz**")
-    st.write("**20:00** - **Dinner** in West End area")
-    
-    st.success("✅ Perfect Boxing Day when everything reopens and Winter Wonderland is fully operational")
-    st.markdown("---")
-    
-    # Day 3
-    st.markdown("## 🏛️ Day 3: December 27")
-    st.markdown("**Location:** London → Northallerton")
-    st.markdown("### Final London Highlights")
-    
-    st.write("**09:00** - **Breakfast**")
-    st.write("**10:00** - **Tube to London Bridge** → **The Shard** - Europe's tallest building views")
-    st.write("**11:30** - **Walk to Borough Market** (2-minute walk) - Historic food market")
-    st.write("**12:30** - **Tube to Russell Square** → **British Museum** - World artifacts, Egyptian collection")
-    st.write("**14:00** - **Lunch** near British Museum")
-    st.write("**15:30** - **Tube to Fulham Broadway** → **Chelsea FC Stadium (exterior)** - Quick photos")
-    st.write("**16:30** - **Return to hotel** & checkout, collect luggage")
-    st.write("**17:30** - **Train King's Cross → Northallerton** (2 hours direct)")
-    st.write("**20:00** - **Dinner** at host home")
-    
-    st.markdown("---")
-    
-    # Day 4
-    st.markdown("## 🏰 Day 4: December 28")
-    st.markdown("**Location:** Northern England Triangle")
-    st.markdown("### Durham, Newcastle & Whitby Public Transport Tour")
-    
-    st.write("**08:00** - **Breakfast**")
-    st.write("**09:00** - **Train Northallerton → Durham** (30 minutes)")
-    st.write("**10:00** - **Durham Cathedral & Castle** - UNESCO World Heritage site, Norman architecture")
-    st.write("**11:30** - **Train Durham → Newcastle** (20 minutes)")
-    st.write("**12:00** - **Newcastle Quayside & Tyne Bridge** - Walk from Central Station")
-    st.write("**13:00** - **Lunch** in Newcastle city center")
-    st.write("**14:30** - **Bus Newcastle → Whitby** (2 hours via Middlesbrough)")
-    st.write("**16:30** - **Whitby Abbey** - Dramatic clifftop ruins, Dracula connections")
-    st.write("**17:30** - **Whitby Harbor** - Picturesque fishing port, Captain Cook heritage")
-    st.write("**18:00** - **Bus Whitby → Northallerton** (1.5 hours direct)")
-    st.write("**20:00** - **Dinner** at host home")
-    
-    st.markdown("---")
-    
-    # Day 5
-    st.markdown("## 🏴󠁧󠁢󠁳󠁣󠁴󠁿 Day 5: December 29")
-    st.markdown("**Location:** Edinburgh → Scottish Highlands")
-    st.markdown("### Edinburgh Castle & Highland Railway Journey")
-    
-    st.write("**08:00** - **Breakfast**")
-    st.write("**09:00** - **Train Northallerton → Edinburgh** (2.5 hours, change at York)")
-    st.write("**12:00** - **Walk from Waverley Station to Edinburgh Castle** (15-minute uphill walk)")
-    st.write("**12:30** - **Edinburgh Castle** - Scottish Crown Jewels, Stone of Destiny, city views")
-    st.write("**14:30** - **Walk down Royal Mile** - Historic street from castle to palace")
-    st.write("**15:00** - **St. Giles Cathedral** - Scotland's High Kirk (free entry)")
-    st.write("**15:30** - **Lunch** on Royal Mile")
-    st.write("**16:30** - **Train Edinburgh → Fort William** (4 hours - scenic West Highland Line)")
-    st.write("**20:30** - Check into Fort William Highland accommodation")
-    st.write("**21:00** - **Dinner** in Fort William")
-    
-    st.success("🚂 One of the world's most beautiful train journeys - West Highland Line!")
-    st.markdown("---")
-    
-    # Day 6
-    st.markdown("## 🏔️ Day 6: December 30")
-    st.markdown("**Location:** Scottish Highlands")
-    st.markdown("### Full Highland Adventure Day")
-    
-    st.write("**08:00** - **Breakfast**")
-    st.write("**09:00** - **Highland Day Tour** (organized bus tour from Fort William):")
-    st.write("  - **Ben Nevis area** - UK's highest mountain viewpoints")
-    st.write("  - **Glenfinnan Viaduct** - Famous Harry Potter filming location")
-    st.write("  - **Glenfinnan Monument** - Bonnie Prince Charlie memorial")
-    st.write("**13:00** - **Lunch** during tour with Highland scenery")
-    st.write("**14:30** - **Loch Shiel** - Beautiful Highland loch, boat trip option")
-    st.write("**16:00** - **Glen Coe** - Dramatic valley, 'Scotland in Miniature'")
-    st.write("**17:30** - **Commando Memorial** - WWII memorial with mountain panorama")
-    st.write("**19:00** - Return to Fort William")
-    st.write("**20:00** - **Dinner** in Fort William")
-    
-    st.info("🎬 Perfect day for Harry Potter fans and Highland scenery lovers!")
-    st.markdown("---")
-    
-    # Day 7
-    st.markdown("## 🎆 Day 7: December 31 - New Year's Eve")
-    st.markdown("**Location:** Fort William → Edinburgh")
-    st.markdown("### Edinburgh Hogmanay Preparation")
-    
-    st.write("**08:00** - **Breakfast**")
-    st.write("**09:00** - **Train Fort William → Edinburgh** (4 hours scenic return journey)")
-    st.write("**13:00** - **Bus/walk to Holyrood Palace** from Waverley Station")
-    st.write("**13:30** - **Holyrood Palace** - Official royal residence in Scotland")
-    st.write("**15:00** - **Arthur's Seat hike** - Ancient volcano, panoramic Edinburgh views (weather permitting)")
-    st.write("**16:00** - **Lunch** in Edinburgh city center")
-    st.write("**17:00** - **Princes Street** - Main shopping street, New Year atmosphere")
-    st.write("**18:00** - **Edinburgh Christmas Market** (if still running)")
-    st.write("**19:30** - **Dinner** in Edinburgh Old Town")
-    st.write("**21:00** - **Edinburgh Hogmanay Street Party** - World-famous NYE celebration")
-    st.write("**00:00** - **Midnight Fireworks from Edinburgh Castle** - Viewed from Royal Mile")
-    st.write("**01:00** - **Hotel near Edinburgh Airport** (taxi/night bus)")
-    
-    st.warning("🎉 Book Hogmanay dinner reservations in advance! Dress very warmly for outdoor celebration!")
-    st.markdown("---")
-    
-    # Day 8
-    st.markdown("## ✈️ Day 8: January 1 - New Year's Day Departure")
-    st.markdown("**Location:** Edinburgh → Bangalore")
-    
-    st.write("**07:00** - **Breakfast**")
-    st.write("**08:00** - **Airport bus to Edinburgh Airport**")
-    st.write("**09:00** - Airport check-in and security")
-    st.write("**10:20** - **Flight departure to Bangalore (British Airways)**")
-    st.write("**05:05+1** - **Arrive Bangalore** (next day)")
-    
-    st.success("✅ Perfect New Year's Day departure with comfortable morning timing!")
-    
+    st.markdown(f"# 📅 Complete {len(DEFAULT_ITINERARY)}-Day Itinerary")
+
+    day_keys = [day_key(day) for day in DEFAULT_ITINERARY]
+
+    # Timetable check: overlapping events, transfers too fast to be possible, midnight rollovers
+    conflicts = cached_schedule_check(tuple(day_keys), DEFAULT_ITINERARY)
+    problems = [conflict for conflict in conflicts if conflict.kind != 'rollover']
+    if problems:
+        st.warning(f"⚠️ {len(problems)} timetable conflict(s) found")
+    else:
+        st.success("✅ Timetable check: no overlapping events or impossible transfers")
+    with st.expander(f"🕒 Timetable details ({len(conflicts)} note(s))"):
+        icons = {'overlap': '⛔', 'transfer': '🚧', 'rollover': '🌙'}
+        st.markdown("\n".join(
+            f"- {icons[conflict.kind]} **Day {conflict.day}, {conflict.time}** - {conflict.message}"
+            for conflict in conflicts
+        ) or "Nothing to report.")
+
+    # One markdown message per day instead of one per timeline entry
+    for i, (day, key) in enumerate(zip(DEFAULT_ITINERARY, day_keys)):
+        separator = i < len(DEFAULT_ITINERARY) - 1
+        st.markdown(cached_day_markdown(key, day, separator), unsafe_allow_html=True)
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 2: Flight Details
-with tab2:
+@st.fragment
+@profiled("Flights")
+def render_flights():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("# ✈️ Confirmed Flight Information")
     
@@ -338,282 +510,660 @@ with tab2:
         st.write("**Airline:** British Airways")
     
     # Clean cost summary
+    party = st.session_state.party
+    flight_price = st.session_state.cost_data['Flights']
+    flight_total = flight_price * party.size
     st.markdown("## 💰 Flight Cost Summary")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Per Person", "£600", "Return ticket")
+        st.metric("Per Person", money(from_gbp(flight_price)), "Return ticket")
     with col2:
-        st.metric("Group Total", "£2,800", "4 people")
+        st.metric("Group Total", money(from_gbp(flight_total)), f"{party.size} people")
     with col3:
-        st.metric("INR Total", "₹2,94,000", "@₹105/£")
+        st.metric(f"{home_currency()} Total", money(from_gbp(flight_total, home_currency()), currency=home_currency()), rate_note())
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 3: Cost Calculator
-with tab3:
+@st.cache_resource(max_entries=32, show_spinner=False)
+def simulated_totals(amounts, uncertainties, samples):
+    """Sorted simulated totals, drawn once per set of inputs and shared read-only."""
+    totals = simulate_totals(amounts, uncertainties, samples)
+    totals.flags.writeable = False
+    return totals
+
+
+def render_budget_risk():
+    """Monte Carlo percentiles of the group total and the chance of exceeding a cap."""
+    pd = lazy_import('pandas')
+    party = st.session_state.party
+    cost_data = st.session_state.cost_data
+    basis = st.radio("Simulate", ["Budget categories", "Flights + daily price tables"], horizontal=True)
+
+    # Planned group amounts in GBP and their uncertainty, one row per cost group
+    if basis == "Budget categories":
+        planned = {name: amount * party.size for name, amount in cost_data.items()}
+        defaults = {name: BUDGET_UNCERTAINTY.get(name, Uncertainty()) for name in planned}
+    else:
+        planned = {'Flights': cost_data['Flights'] * party.size}
+        defaults = {'Flights': BUDGET_UNCERTAINTY['Flights']}
+        category_totals = st.session_state.ledger.category_totals(party, rates, BASE_CURRENCY)
+        for category, total in category_totals.items():
+            if category not in EXCLUDED_CATEGORIES and total > 0:
+                planned[f"Daily: {category}"] = total
+                defaults[f"Daily: {category}"] = LINE_ITEM_UNCERTAINTY[category]
+
+    st.caption("Multipliers on the planned amount (100% = as planned); a surge multiplies the price with the given chance.")
+    table = pd.DataFrame({
+        'Cost Group': list(planned),
+        'Planned': [from_gbp(amount) for amount in planned.values()],
+        'Low %': [u.low * 100 for u in defaults.values()],
+        'Likely %': [u.mode * 100 for u in defaults.values()],
+        'High %': [u.high * 100 for u in defaults.values()],
+        'Surge Chance %': [u.surge_probability * 100 for u in defaults.values()],
+        'Surge ×': [u.surge_factor for u in defaults.values()],
+    })
+    edited = st.data_editor(
+        table,
+        key=f"uncertainty_{basis}",
+        hide_index=True,
+        disabled=['Cost Group', 'Planned'],
+        column_config={'Planned': st.column_config.NumberColumn(format="%.0f")},
+    )
+    # Keep each row's low <= likely <= high whatever order they were typed in
+    bounds = np.sort(edited[['Low %', 'Likely %', 'High %']].to_numpy(dtype=float) / 100, axis=1)
+    uncertainties = tuple(
+        Uncertainty(low, mode, high, min(max(chance / 100, 0.0), 1.0), factor)
+        for (low, mode, high), chance, factor in zip(bounds, edited['Surge Chance %'], edited['Surge ×'])
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        samples = st.select_slider("Samples", options=[10_000, 50_000, 100_000, 200_000], value=DEFAULT_SAMPLES)
+    with col2:
+        cap = st.number_input(
+            f"Budget cap ({st.session_state.display_currency})",
+            value=float(round(from_gbp(sum(planned.values())) * 1.1, -2)),
+            step=100.0,
+        )
+
+    totals = simulated_totals(tuple(planned.values()), uncertainties, samples)
+    summary = summarize(totals, cap / from_gbp(1.0))
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("P50 (median)", money(from_gbp(summary['p50'])), "Group total")
+    with col2:
+        st.metric("P90", money(from_gbp(summary['p90'])), "1 in 10 trips costs more")
+    with col3:
+        st.metric("P99", money(from_gbp(summary['p99'])), "1 in 100 trips costs more")
+    with col4:
+        st.metric("Chance Over Cap", f"{summary['exceed_probability']:.1%}", money(cap))
+
+    counts, edges = np.histogram(totals, bins=40)
+    midpoints = from_gbp((edges[:-1] + edges[1:]) / 2)
+    st.bar_chart(pd.DataFrame({'Simulated trips': counts}, index=np.round(midpoints, -1)))
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_figure(view, data_key, symbol, _data):
+    """Build a chart once per hash of its numbers (``data_key``), shared by every session."""
+    return FIGURES[view](_data, symbol)
+
+
+def cost_summary_frame():
+    """The ledger folded to (day, category, city) totals, kept until the ledger or pricing changes."""
+    ledger, party, currency = st.session_state.ledger, st.session_state.party, st.session_state.display_currency
+    return session_frame('summary', (ledger.version, party, rates.version, currency),
+                         lambda: cost_summary(all_days_table(), DEFAULT_ITINERARY))
+
+
+def render_chart(view):
+    currency = st.session_state.display_currency
+    if view == 'Budget split':
+        data = dict(st.session_state.cost_data)
+        data_key = repr(sorted(data.items()))
+    else:
+        data = cost_summary_frame()
+        data_key = summary_key(data)
+    fig = cached_figure(view, data_key, rates.symbols.get(currency, currency + ' '), data)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@st.fragment
+@profiled("Cost Calculator")
+def render_cost_calculator():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("# 💰 Interactive Cost Calculator")
     
-    # Editable cost inputs
+    # Editable cost inputs, seeded from the trip's current budget through
+    # session state; keys are per trip so switching trips doesn't carry values
+    # across. Undo and other travellers' edits clear a key, and reseeding it
+    # here moves the input in the browser too
     col1, col2 = st.columns(2)
+    budget = st.session_state.cost_data
+    trip_id = st.session_state.trip.id
+
+    def budget_input(label, name, step):
+        key = f"{trip_id}:{name}"
+        if key not in st.session_state:
+            st.session_state[key] = int(budget[name])
+        return st.number_input(label, step=step, key=key)
     
+    new_costs = {}
     with col1:
         st.markdown("### 💰 Major Expenses")
-        st.session_state.cost_data['Flights'] = st.number_input("Flights (return per person)", value=600, step=50)
-        st.session_state.cost_data['London Accommodation (3 nights)'] = st.number_input("London Hotels", value=300, step=25)
-        st.session_state.cost_data['Edinburgh/Highland Accommodation'] = st.number_input("Scotland Hotels", value=200, step=25)
-        st.session_state.cost_data['Transport (all trains/buses)'] = st.number_input("All Transport", value=180, step=25)
-    
+        new_costs['Flights'] = budget_input("Flights (return per person)", 'Flights', 50)
+        new_costs['London Accommodation (3 nights)'] = budget_input("London Hotels", 'London Accommodation (3 nights)', 25)
+        new_costs['Edinburgh/Highland Accommodation'] = budget_input("Scotland Hotels", 'Edinburgh/Highland Accommodation', 25)
+        new_costs['Transport (all trains/buses)'] = budget_input("All Transport", 'Transport (all trains/buses)', 25)
+
     with col2:
         st.markdown("### 💸 Variable Expenses")
-        st.session_state.cost_data['Attractions'] = st.number_input("Attraction Entries", value=150, step=25)
-        st.session_state.cost_data['Food Budget'] = st.number_input("Food Budget", value=350, step=25)
-        st.session_state.cost_data['Shopping & Souvenirs'] = st.number_input("Shopping", value=200, step=25)
-        st.session_state.cost_data['Emergency Fund'] = st.number_input("Emergency Fund", value=100, step=25)
-    
+        new_costs['Attractions'] = budget_input("Attraction Entries", 'Attractions', 25)
+        new_costs['Food Budget'] = budget_input("Food Budget", 'Food Budget', 25)
+        new_costs['Shopping & Souvenirs'] = budget_input("Shopping", 'Shopping & Souvenirs', 25)
+        new_costs['Emergency Fund'] = budget_input("Emergency Fund", 'Emergency Fund', 25)
+
+    # Only the flight price is shown outside this tab, so other edits stay fragment-local
+    changed = [name for name, value in new_costs.items() if st.session_state.cost_data[name] != value]
+    for name in changed:
+        st.session_state.history.set_cost(name, new_costs[name])
+    if changed:
+        save_edits()
+        mark_changed('cost_calculator', 'cost_data')
+    if 'Flights' in changed:
+        mark_changed('cost_calculator', 'flights')
+
     # Calculate totals (clean calculation)
     total_per_person = sum(st.session_state.cost_data.values())
-    group_total = total_per_person * 4
-    inr_total = group_total * 105
+    group_total = total_per_person * st.session_state.party.size
+    home_total = from_gbp(group_total, home_currency())
     
     # Clean cost summary display
     st.markdown(f"""
     <div class="cost-summary">
         <h2>💵 Total Cost Summary</h2>
-        <h1>£{total_per_person:,.0f}</h1>
+        <h1>{money(from_gbp(total_per_person))}</h1>
         <p><strong>Per Person</strong></p>
         
-        <h1>£{group_total:,.0f}</h1>
-        <p><strong>Group of 4</strong></p>
+        <h1>{money(from_gbp(group_total))}</h1>
+        <p><strong>Group of {st.session_state.party.size}</strong></p>
         
         <hr style="margin: 1rem 0;">
-        <h2>₹{inr_total:,.0f}</h2>
-        <p><strong>Total in Indian Rupees</strong></p>
-        <small>Exchange Rate: ₹105 per £1</small>
+        <h2>{money(home_total, currency=home_currency())}</h2>
+        <p><strong>Total in {home_currency()}</strong></p>
+        <small>Exchange Rate: {money(rates.rate(BASE_CURRENCY, home_currency()), 2, home_currency())} per £1 (rates of {rates.version})</small>
     </div>
     """, unsafe_allow_html=True)
     
-    # Cost breakdown chart
-    fig = px.pie(
-        values=list(st.session_state.cost_data.values()),
-        names=list(st.session_state.cost_data.keys()),
-        title="Cost Distribution per Person"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    # Cost charts, one at a time; see render_chart
+    st.markdown("## 📈 Cost Analytics")
+    render_chart(st.radio("Chart", list(FIGURES), horizontal=True))
+
+    # Budget risk simulation
+    st.markdown("## 🎲 Budget Risk Simulation")
+    if st.toggle("Simulate price uncertainty"):
+        render_budget_risk()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 4: Editable Price Tables
-with tab4:
+PAGE_SIZES = (100, 500, 1000)
+# How often an open day table checks for other travellers' edits
+SYNC_SECONDS = 3
+
+
+def day_table(day):
+    ledger, party, currency = st.session_state.ledger, st.session_state.party, st.session_state.display_currency
+    return session_frame(day, (ledger.day_version(day), party, rates.version, currency),
+                         lambda: ledger.day_frame(day, party, rates, currency))
+
+
+def all_days_table():
+    ledger, party, currency = st.session_state.ledger, st.session_state.party, st.session_state.display_currency
+    return session_frame(None, (ledger.version, party, rates.version, currency),
+                         lambda: ledger.frame(party, rates, currency))
+
+
+def line_item_columns():
+    """Numbers stay numbers, so the table sorts them; only their display is formatted."""
+    currency = st.session_state.display_currency
+    return {
+        'Unit Price': st.column_config.NumberColumn("Unit Price", format="%.2f", help="In the line's own currency"),
+        'Party Total': st.column_config.NumberColumn(f"Party Total ({currency})", format=rates.number_format(currency)),
+    }
+
+
+# Editable table columns -> EditLog.update_line fields
+LINE_ITEM_FIELDS = {'Activity': 'activity', 'Category': 'category', 'Pricing': 'rule', 'Currency': 'currency',
+                    'Unit Price': 'unit_price'}
+
+
+def edit_day_table(day):
+    """``day``'s table as an editor; changed cells and deleted rows go into the edit log."""
+    ledger = st.session_state.ledger
+    # A new key per day version, so the editor starts clean once its edits are applied
+    key = f"lines:{st.session_state.trip.id}:{day}:{ledger.day_version(day)}"
+    columns = line_item_columns()
+    columns['Currency'] = st.column_config.SelectboxColumn("Currency", options=rates.codes, required=True)
+    st.data_editor(day_table(day).astype({'Currency': object}), key=key, num_rows="delete", hide_index=True,
+                   use_container_width=True, column_config=columns, disabled=['Party Total'])
+    changes = st.session_state[key]
+    if changes['edited_rows'] or changes['deleted_rows']:
+        history = st.session_state.history
+        for index, edited in changes['edited_rows'].items():
+            history.update_line(day, int(index), **{
+                LINE_ITEM_FIELDS[column]: value for column, value in edited.items() if value is not None
+            })
+        for index in sorted(changes['deleted_rows'], reverse=True):
+            history.delete_line(day, index)
+        save_edits()
+        mark_changed('price_tables', 'daily_costs')
+
+
+def render_all_days():
+    party = st.session_state.party
+    df = all_days_table()
+    st.markdown(f"## All Days - {len(df):,} Line Items")
+
+    # Subtotals leave flights out, like the day and trip totals
+    counted = df['Party Total'].where(~df['Category'].isin(EXCLUDED_CATEGORIES), 0.0)
+    subtotals = counted.groupby(df['Day'], observed=False).agg(['size', 'sum'])
+    subtotals.columns = ['Items', 'Subtotal (No Flights)']
+    subtotals['Per Person'] = party.per_person(subtotals['Subtotal (No Flights)'])
+    amount = st.column_config.NumberColumn(format=rates.number_format(st.session_state.display_currency))
+    st.dataframe(subtotals, use_container_width=True,
+                 column_config={'Subtotal (No Flights)': amount, 'Per Person': amount})
+
+    # Sort the whole ledger, then send one page of it to the browser
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sort by", ['Day', 'Activity', 'Category', 'Currency', 'Unit Price', 'Party Total'])
+    with col2:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+    pages = max(1, -(-len(df) // page_size))
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+    descending = st.toggle("Descending")
+    if sort_by != 'Day' or descending:
+        df = df.sort_values(sort_by, ascending=not descending, kind='stable')
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size], use_container_width=True, hide_index=True,
+                 column_config=line_item_columns())
+    st.caption(f"Rows {min(start + 1, len(df)):,}-{min(start + page_size, len(df)):,} of {len(df):,}")
+
+
+@st.fragment(run_every=SYNC_SECONDS)
+def render_day_view(day, edit_mode):
+    """One day's table and totals. Polls for other travellers' edits to the day and redraws only itself."""
+    pull_changes([(DAY, day)])
+    ledger = st.session_state.ledger
+    party = st.session_state.party
+    if not ledger.rows(day):
+        return
+    currency = st.session_state.display_currency
+    if edit_mode:
+        edit_day_table(day)
+    else:
+        st.dataframe(day_table(day), use_container_width=True, hide_index=True,
+                     column_config=line_item_columns())
+
+    # Calculate day totals (excluding flights)
+    day_total = ledger.day_total(day, party, rates, currency)
+    day_total_per_person = party.per_person(day_total)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"{day} Total", money(day_total, 2), f"Group of {party.size}")
+    with col2:
+        st.metric("Per Person", money(day_total_per_person, 2), "Daily average")
+    with col3:
+        st.metric(f"In {home_currency()}", money(ledger.day_total(day, party, rates, home_currency()), currency=home_currency()), "Group total")
+
+
+def prefill_activity():
+    """Fill the Add Activity fields from the catalog attraction just picked."""
+    attraction = attraction_catalog().get(st.session_state.catalog_pick or "")
+    if attraction is None:
+        return
+    st.session_state.new_activity = attraction.name
+    st.session_state.new_price = float(attraction.price)
+    if attraction.currency in rates:
+        st.session_state.new_currency = attraction.currency
+
+
+@st.fragment
+@profiled("Price Tables")
+def render_price_tables():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("# 📊 Editable Day-wise Cost Tables")
     
-    # Select day to edit
-    day_select = st.selectbox("Select Day to Edit/View", 
-                             options=list(st.session_state.daily_costs.keys()))
+    ledger = st.session_state.ledger
+    party = st.session_state.party
+
+    view = st.radio("View", ["One day", "All days"], horizontal=True)
+    if view == "All days":
+        render_all_days()
+        day_select, table_edit_mode = None, False
+    else:
+        # Select day to edit
+        day_select = st.selectbox("Select Day to Edit/View", 
+                                 options=ledger.days)
     
-    st.markdown(f"## {day_select} - Detailed Costs")
+        st.markdown(f"## {day_select} - Detailed Costs")
     
-    # Edit mode for tables
-    table_edit_mode = st.toggle("✏️ Edit Price Table")
+        # Edit mode for tables
+        table_edit_mode = st.toggle("✏️ Edit Price Table")
     
     if table_edit_mode:
         st.markdown('<div class="edit-section">', unsafe_allow_html=True)
         
         # Add new activity
         with st.expander("➕ Add New Activity"):
-            new_activity = st.text_input("Activity Name")
+            # Picking a catalog attraction fills in the fields below, which stay editable
+            catalog = attraction_catalog()
+            query = st.text_input("Find in attraction catalog", placeholder="e.g. edinburgh castle, glenfinan")
+            if query:
+                matches = {attraction.name: attraction for attraction in catalog.search(query, limit=15)}
+                if matches:
+                    picked = st.selectbox("Catalog matches", list(matches), index=None, key="catalog_pick",
+                                          placeholder="Pick one to fill in the activity", on_change=prefill_activity)
+                    if picked in matches:
+                        attraction = matches[picked]
+                        st.caption(f"{attraction.category} in {attraction.town} • {entry_price(attraction)} • "
+                                   f"{attraction.opening_hours or 'Hours not listed'}")
+                else:
+                    st.caption("No catalog attractions match")
+            st.session_state.setdefault("new_activity", "")
+            st.session_state.setdefault("new_price", 0.0)
+            st.session_state.setdefault("new_currency", rates.codes[0])
+            new_activity = st.text_input("Activity Name", key="new_activity")
             col1, col2, col3 = st.columns(3)
             with col1:
-                new_individual = st.number_input("Individual Cost", value=0.0, step=0.10)
+                new_price = st.number_input("Unit Price", step=0.10, key="new_price")
             with col2:
-                new_couple = st.number_input("Couple Cost", value=0.0, step=0.10)
+                new_currency = st.selectbox("Currency", rates.codes, key="new_currency")
             with col3:
-                new_total = st.number_input("Total (4 people)", value=0.0, step=0.10)
+                new_rule = st.selectbox("Pricing", PRICING_RULES)
+            new_category = st.selectbox("Category", CATEGORIES, index=CATEGORIES.index('Attraction'))
+            col1, col2 = st.columns(2)
+            with col1:
+                new_child_discount = st.number_input("Child Discount (%)", value=0, min_value=0, max_value=100, step=5)
+            with col2:
+                new_senior_discount = st.number_input("Senior Discount (%)", value=0, min_value=0, max_value=100, step=5)
             
             if st.button("Add Activity"):
-                st.session_state.daily_costs[day_select].append({
-                    'Activity': new_activity,
-                    'Individual': new_individual,
-                    'Couple': new_couple,
-                    'Total_4': new_total
-                })
+                st.session_state.history.add_line(
+                    day_select, new_activity, new_category, new_price, currency=new_currency, rule=new_rule,
+                    child_discount=new_child_discount / 100, senior_discount=new_senior_discount / 100,
+                )
+                save_edits()
                 st.success(f"✅ Added {new_activity}")
-                st.rerun()
+                mark_changed('price_tables', 'daily_costs')
         
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Display current day's table
-    if day_select in st.session_state.daily_costs:
-        activities = st.session_state.daily_costs[day_select]
-        
-        if activities:
-            # Create clean dataframe
-            df = pd.DataFrame(activities)
-            
-            # Format currency properly
-            df_display = df.copy()
-            df_display['Individual'] = df_display['Individual'].apply(lambda x: f"£{x:.2f}" if x > 0 else "FREE")
-            df_display['Couple'] = df_display['Couple'].apply(lambda x: f"£{x:.2f}" if x > 0 else "FREE")
-            df_display['Total_4'] = df_display['Total_4'].apply(lambda x: f"£{x:.2f}" if x > 0 else "FREE")
-            
-            st.dataframe(df_display, use_container_width=True, hide_index=True)
-            
-            # Calculate day totals (excluding flights)
-            day_total = sum(activity['Total_4'] for activity in activities if 'Flight' not in activity['Activity'])
-            day_total_per_person = day_total / 4
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric(f"{day_select} Total", f"£{day_total:.2f}", "Group of 4")
-            with col2:
-                st.metric("Per Person", f"£{day_total_per_person:.2f}", "Daily average")
-            with col3:
-                st.metric("In INR", f"₹{day_total * 105:,.0f}", "Group total")
+    if day_select in ledger.days:
+        render_day_view(day_select, table_edit_mode)
     
-    # Calculate total for all days (excluding flights)
-    all_days_total = 0
-    for day_name, activities in st.session_state.daily_costs.items():
-        day_total = sum(activity['Total_4'] for activity in activities if 'Flight' not in activity['Activity'])
-        all_days_total += day_total
+    # Total for all days (excluding flights)
+    all_days_total = ledger.grand_total(party, rates, st.session_state.display_currency)
     
     st.markdown("---")
     st.markdown("## 🎯 Complete Trip Total (Excluding Flights)")
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total (No Flights)", f"£{all_days_total:.2f}", "Group of 4")
+        st.metric("Total (No Flights)", money(all_days_total, 2), f"Group of {party.size}")
     with col2:
-        st.metric("Per Person (No Flights)", f"£{all_days_total/4:.2f}", "Average cost")
+        st.metric("Per Person (No Flights)", money(party.per_person(all_days_total), 2), "Average cost")
     with col3:
-        st.metric("INR (No Flights)", f"₹{all_days_total * 105:,.0f}", "Group total")
+        st.metric(f"{home_currency()} (No Flights)", money(ledger.grand_total(party, rates, home_currency()), currency=home_currency()), "Group total")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 5: Place Images
-with tab5:
+@st.fragment
+@profiled("Place Images")
+def render_place_images():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("# 🖼️ Destination Images & Information")
     
     # Image upload section
     st.markdown("## 📸 Add Images of Places")
     
-    places = [
-        "Tower of London", "Tower Bridge", "London Eye", "Buckingham Palace",
-        "Hyde Park Winter Wonderland", "The Shard", "British Museum", "Chelsea FC",
-        "Durham Cathedral", "Newcastle Tyne Bridge", "Whitby Abbey",
-        "Edinburgh Castle", "Glenfinnan Viaduct", "Glen Coe", "Fort William"
-    ]
-    
-    selected_place = st.selectbox("Select Place to Add Image", places)
-    uploaded_image = st.file_uploader(f"Upload image for {selected_place}", type=['jpg', 'jpeg', 'png'])
-    
-    if uploaded_image:
-        image = Image.open(uploaded_image)
+    images = place_image_store()
+    catalog = attraction_catalog()
+    # Type-ahead over the whole catalog; with no query, the trip's own places
+    query = st.text_input("🔎 Search places", placeholder="Type part of a name, e.g. glen, tower, edinbrugh")
+    options = [attraction.name for attraction in catalog.search(query, limit=20)] if query else PLACES
+    if not options:
+        st.caption(f"No places match “{query}”")
+        options = PLACES
+    selected_place = st.selectbox("Select Place to Add Image", options)
+    uploaded_image = st.file_uploader(f"Upload image for {selected_place}", type=['jpg', 'jpeg', 'png'],
+                                      key=f"upload:{selected_place}")
+    
+    # Each upload is hashed and stored once; reruns only look it up
+    if uploaded_image and st.session_state.get('stored_upload') != uploaded_image.file_id:
+        try:
+            images.put(selected_place, uploaded_image.getvalue())
+            st.session_state.stored_upload = uploaded_image.file_id
+        except ValueError as error:
+            st.error(f"❌ Couldn't read {uploaded_image.name}: {error}")
+    
+    selected_urls = images.urls(selected_place)
+    if selected_urls:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            st.image(image, caption=f"{selected_place}", use_container_width=True)
+            st.markdown(f'''
+<figure style="margin: 0; text-align: center;">
+    <img class="place-image" src="{selected_urls['display']}" alt="{html.escape(selected_place)}" style="width: 100%;">
+    <figcaption>{html.escape(selected_place)}</figcaption>
+</figure>
+''', unsafe_allow_html=True)
+    
+    # Every place's thumbnail in one message; missing photos show a placeholder
+    tiles = []
+    for place in PLACES:
+        urls = images.urls(place, touch=False)
+        picture = (f'<img src="{urls["thumbnail"]}" alt="{html.escape(place)}" loading="lazy">' if urls
+                   else '<div class="place-missing">📷</div>')
+        tiles.append(f'<figure>{picture}<figcaption>{html.escape(place)}</figcaption></figure>')
+    st.markdown(f'<div class="place-grid">{"".join(tiles)}</div>', unsafe_allow_html=True)
+    st.caption(f"{len(images)} photo(s) stored • {format_bytes(images.total_bytes())} on disk")
     
     # Placeholder images section
     st.markdown("## 🏛️ Place Information & Images")
     
-    place_info = {
-        "Tower of London": {
-            "description": "Historic castle housing the Crown Jewels, with 1000 years of history",
-            "highlights": ["Crown Jewels", "Beefeater Guards", "Medieval Architecture", "Tower Ravens"],
-            "visit_time": "2-3 hours",
-            "best_time": "Morning opening to avoid crowds"
-        },
-        "London Eye": {
-            "description": "Giant observation wheel offering 360-degree views of London",
-            "highlights": ["Thames Views", "City Panorama", "30-minute rotation", "Christmas atmosphere"],
-            "visit_time": "1 hour",
-            "best_time": "Late afternoon for sunset views"
-        },
-        "Edinburgh Castle": {
-            "description": "Ancient fortress perched on volcanic rock, Scotland's most famous castle",
-            "highlights": ["Scottish Crown Jewels", "Stone of Destiny", "Great Hall", "One O'Clock Gun"],
-            "visit_time": "3-4 hours",
-            "best_time": "Early morning before crowds"
-        },
-        "Glenfinnan Viaduct": {
-            "description": "Famous railway bridge from Harry Potter films, stunning Highland scenery",
-            "highlights": ["Harry Potter Bridge", "Steam Train", "Highland Views", "Photo Opportunities"],
-            "visit_time": "1-2 hours",
-            "best_time": "When Jacobite Steam Train passes"
-        }
-    }
-    
     # Display place information in grid
-    for place, info in place_info.items():
+    for place in PLACES:
+        attraction = catalog.get(place)
+        if attraction is None:
+            continue
         with st.expander(f"📍 {place}"):
             col1, col2 = st.columns([1, 2])
             with col1:
                 st.markdown("**Key Information:**")
-                st.write(f"**Visit Time:** {info['visit_time']}")
-                st.write(f"**Best Time:** {info['best_time']}")
+                st.write(f"**Visit Time:** {attraction.visit_time or '-'}")
+                st.write(f"**Best Time:** {attraction.best_time or '-'}")
+                st.write(f"**Opening Hours:** {attraction.opening_hours or '-'}")
+                st.write(f"**Entry:** {entry_price(attraction)}")
             with col2:
-                st.write(info['description'])
-                st.write("**Highlights:**")
-                for highlight in info['highlights']:
-                    st.write(f"• {highlight}")
+                st.write(attraction.description)
+                if attraction.highlights:
+                    st.write("**Highlights:**")
+                    for highlight in attraction.highlights:
+                        st.write(f"• {highlight}")
+                nearby = catalog.near_place(place, km=10, limit=4)
+                if nearby:
+                    st.write("**Nearby:** " + ", ".join(f"{other.name} ({distance:.1f} km)" for other, distance in nearby))
+    
+    # Radius search around whichever place is selected above
+    st.markdown("## 📍 What's Near")
+    radius = st.slider("Within (km)", 1, 100, 25, key="near_km")
+    nearby = catalog.near_place(selected_place, km=radius, limit=25)
+    if catalog.get(selected_place) is None:
+        st.caption(f"{selected_place} isn't in the attraction catalog")
+    elif nearby:
+        pd = lazy_import('pandas')
+        st.dataframe(pd.DataFrame({
+            'Place': [attraction.name for attraction, _ in nearby],
+            'Category': [attraction.category for attraction, _ in nearby],
+            'Town': [attraction.town for attraction, _ in nearby],
+            'Distance (km)': [round(distance, 1) for _, distance in nearby],
+            'Entry': [entry_price(attraction) for attraction, _ in nearby],
+            'Opening Hours': [attraction.opening_hours for attraction, _ in nearby],
+        }), use_container_width=True, hide_index=True)
+    else:
+        st.caption(f"Nothing in the catalog within {radius} km of {selected_place}")
+    st.caption(f"{len(catalog):,} places in the attraction catalog")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 6: Interactive Map
-with tab6:
+@st.cache_data(show_spinner=False)
+def cached_route_map_html(map_key, _locations, _routes, _attractions=()):
+    """Serialize the route map once per version of its data (``map_key``)."""
+    return route_map_html(_locations, _routes, _attractions)
+
+
+@st.cache_data(show_spinner=False)
+def optimized_routes(map_key, start, end, _locations):
+    """Shortest visiting order found for the trip's locations, as route polylines."""
+    names = list(_locations)
+    coords = [_locations[name]["coords"] for name in names]
+    order = optimize_order(coords, names.index(start), None if end is None else names.index(end))
+    return build_routes(names, coords, order, color="darkred", weight=4)
+
+
+@st.cache_data(show_spinner=False)
+def variant_front(map_key, day_keys, day_costs, pinned, max_swaps, _locations, _itinerary):
+    """Pareto-optimal day orders and overnight bases, rescored only when the trip or costs change."""
+    return VariantSpace(_itinerary, _locations, day_costs).search(pinned, max_swaps)
+
+
+@st.fragment
+@profiled("Map")
+def render_route_map():
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("# 🗺️ Complete Travel Route Map")
     
-    # Create comprehensive map
-    m = folium.Map(location=[54.5, -2.5], zoom_start=6)
-    
-    # Add all key locations
-    locations = {
-        "London": {"coords": [51.5074, -0.1278], "color": "red", "icon": "star", 
-                  "popup": "Days 1-3: Christmas, Boxing Day & Final London"},
-        "Northallerton": {"coords": [54.3394, -1.4324], "color": "green", "icon": "home", 
-                          "popup": "Host Home Base - Dec 27, 30"},
-        "Durham": {"coords": [54.7761, -1.5733], "color": "blue", "icon": "university", 
-                   "popup": "Day 4: UNESCO Cathedral & Castle"},
-        "Newcastle": {"coords": [54.9783, -1.6178], "color": "blue", "icon": "building", 
-                     "popup": "Day 4: Tyne Bridge & Quayside"},
-        "Whitby": {"coords": [54.4858, -0.6206], "color": "purple", "icon": "anchor", 
-                   "popup": "Day 4: Abbey Ruins & Harbor"},
-        "Edinburgh": {"coords": [55.9533, -3.1883], "color": "orange", "icon": "castle", 
-                     "popup": "Days 5&7: Castle & Hogmanay"},
-        "Fort William": {"coords": [56.8198, -5.1052], "color": "darkgreen", "icon": "mountain", 
-                        "popup": "Days 5-6: Highland Base & Tours"}
-    }
-    
-    for name, details in locations.items():
-        folium.Marker(
-            details["coords"],
-            popup=f"<b>{name}</b><br>{details['popup']}",
-            tooltip=name,
-            icon=folium.Icon(color=details["color"], icon=details["icon"])
-        ).add_to(m)
-    
-    # Add travel routes with different colors
-    routes = [
-        {"coords": [[51.5074, -0.1278], [54.3394, -1.4324]], "color": "green", "weight": 4, "tooltip": "Dec 27: London → Northallerton (Train)"},
-        {"coords": [[54.3394, -1.4324], [54.7761, -1.5733]], "color": "blue", "weight": 3, "tooltip": "Dec 28: Northallerton → Durham (Train)"},
-        {"coords": [[54.7761, -1.5733], [54.9783, -1.6178]], "color": "blue", "weight": 3, "tooltip": "Dec 28: Durham → Newcastle (Train)"},
-        {"coords": [[54.9783, -1.6178], [54.4858, -0.6206]], "color": "purple", "weight": 3, "tooltip": "Dec 28: Newcastle → Whitby (Bus)"},
-        {"coords": [[54.3394, -1.4324], [55.9533, -3.1883]], "color": "orange", "weight": 4, "tooltip": "Dec 29: Northallerton → Edinburgh (Train)"},
-        {"coords": [[55.9533, -3.1883], [56.8198, -5.1052]], "color": "darkgreen", "weight": 5, "tooltip": "Dec 29: Edinburgh → Fort William (Scenic Train)"},
-        {"coords": [[56.8198, -5.1052], [55.9533, -3.1883]], "color": "red", "weight": 4, "tooltip": "Dec 31: Fort William → Edinburgh (Train)"}
-    ]
-    
-    for route in routes:
-        folium.PolyLine(
-            locations=route["coords"],
-            color=route["color"],
-            weight=route["weight"],
-            tooltip=route["tooltip"]
-        ).add_to(m)
-    
-    st_folium(m, width=600, height=500)
+    # Panning a static map never reaches the server; the clickable one only
+    # reports marker clicks, so neither mode reruns the cost tables
+    map_mode = st.radio(
+        "Map mode",
+        ["🚀 Fast", "🖱️ Clickable markers"],
+        horizontal=True,
+        help="Fast mode reuses the pre-rendered map; clickable mode shows details for the marker you click"
+    )
+
+    locations = store.load_locations(st.session_state.trip.id)
+    names = list(locations)
+
+    # Visit order optimizer: fixed first stop (arrival) and optionally last stop (departure)
+    routes = ROUTES
+    with st.expander("🧭 Route Optimizer"):
+        if len(names) < 2:
+            st.info("Save at least two locations with this trip to optimize the order they're visited in.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                start = st.selectbox("Start at", names, index=names.index("London") if "London" in names else 0)
+            with col2:
+                end_options = ["Anywhere"] + names
+                end = st.selectbox("Finish at", end_options,
+                                   index=end_options.index("Edinburgh") if "Edinburgh" in names else 0)
+            if end == start:
+                st.warning("Pick a different finish, or 'Anywhere'")
+            else:
+                optimized = optimized_routes(route_data_key(locations, None), start,
+                                             None if end == "Anywhere" else end, locations)
+                pd = lazy_import('pandas')
+                legs = pd.DataFrame({
+                    'From': [route["stops"][0] for route in optimized],
+                    'To': [route["stops"][1] for route in optimized],
+                    'Distance (km)': [round(route["distance_km"]) for route in optimized],
+                    'By Train (h)': [round(route["minutes"] / 60, 1) for route in optimized],
+                })
+                optimized_km = legs['Distance (km)'].sum()
+                st.dataframe(legs, use_container_width=True, hide_index=True)
+                st.metric("Optimized Distance", f"{optimized_km:,.0f} km",
+                          f"{optimized_km - route_lengths(ROUTES).sum():,.0f} km vs planned route", delta_color="inverse")
+                if st.toggle("Draw optimized route on map"):
+                    routes = optimized
+
+    # What-if search over day orders and overnight bases, scored on cost, distance and moves
+    with st.expander("🔀 What-if Day Orders"):
+        # The open trip's days the itinerary covers, matched to it by ledger day label
+        ledger = st.session_state.ledger
+        planned = {day.ledger_day: day for day in DEFAULT_ITINERARY if day.ledger_day}
+        trip_days = [label for label in ledger.days if label in planned]
+        if len(trip_days) < 2:
+            st.info("What-if day orders need at least two of this trip's days on the itinerary.")
+        else:
+            itinerary = tuple(planned[label] for label in trip_days)
+            day_numbers = [day.number for day in itinerary]
+            col1, col2 = st.columns(2)
+            with col1:
+                pinned = st.multiselect("Keep in place", day_numbers, default=[day_numbers[0], day_numbers[-1]],
+                                        format_func=lambda number: f"Day {number}")
+            with col2:
+                max_swaps = st.slider("Nights at a different base", 0, 3, 1,
+                                      help="How many nights may move away from the base their day normally ends at")
+            # Needs every day's costs, so it only runs on request
+            if st.toggle("Search variants"):
+                totals = ledger.day_category_totals(st.session_state.party, rates, st.session_state.display_currency)
+                rows = {label: i for i, label in enumerate(ledger.days)}
+                day_costs = totals[[rows[label] for label in trip_days]]
+                try:
+                    front, scored = variant_front(route_data_key(locations, None),
+                                                  tuple((label, day_key(planned[label])) for label in trip_days),
+                                                  day_costs, tuple(sorted(pinned)), max_swaps, locations, itinerary)
+                except ValueError as error:
+                    st.info(f"Can't search variants for this trip: {error}")
+                else:
+                    st.caption(f"{scored:,} variants scored • {len(front)} not beaten on cost, distance and overnight moves")
+                    st.dataframe(front.assign(Cost=front['Cost'].map(money)), use_container_width=True, hide_index=True)
+
+    # Catalog attractions around each stop, as small circles
+    attractions = []
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        show_attractions = st.toggle("Show nearby attractions")
+    if show_attractions:
+        with col2:
+            radius = st.slider("Around each stop (km)", 2, 50, 15, key="map_attraction_km")
+        catalog = attraction_catalog()
+        seen = set(locations)
+        for details in locations.values():
+            for attraction, _ in catalog.near(*details["coords"], km=radius, limit=12):
+                if attraction.name not in seen and attraction.category != "Town":
+                    seen.add(attraction.name)
+                    attractions.append({"name": attraction.name, "coords": attraction.coords,
+                                        "popup": f"{attraction.category} • {entry_price(attraction)}"})
+        st.caption(f"{len(attractions)} attraction(s) within {radius} km of a stop")
+
+    if map_mode == "🚀 Fast":
+        map_key = route_data_key(locations, routes, attractions)
+        st.iframe(cached_route_map_html(map_key, locations, routes, attractions), width=600, height=500)
+    else:
+        st_folium = lazy_import('streamlit_folium').st_folium
+        map_state = st_folium(
+            build_route_map(locations, routes, attractions),
+            width=600,
+            height=500,
+            returned_objects=["last_object_clicked_tooltip"],
+            key="route_map"
+        )
+        clicked = (map_state or {}).get("last_object_clicked_tooltip")
+        if clicked in locations:
+            st.info(f"📍 **{clicked}** - {locations[clicked]['popup']}")
+        elif clicked and (attraction := attraction_catalog().get(clicked)):
+            st.info(f"📍 **{attraction.name}** ({attraction.town}) - {attraction.description} "
+                    f"• {entry_price(attraction)} • {attraction.opening_hours or 'Hours not listed'}")
     
     # Clean map legend
     st.markdown("### 🗺️ Travel Route Legend")
@@ -634,101 +1184,375 @@ with tab6:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+@st.cache_data(show_spinner="Timing imports...")
+def cached_startup_profile():
+    """Per-package import times of this script's top-level imports, measured once per process."""
+    return startup_profile(top_level_imports(__file__), cwd=APP_DIR)
+
+
+def move_history(move, *args):
+    """Button callback: undo, redo or jump through the edit log, then save what moved.
+
+    Runs before the script, so the Cost Calculator inputs of the budget lines
+    that moved can still be cleared to show their new amounts.
+    """
+    move(*args)
+    trip_id = st.session_state.trip.id
+    for name in save_edits():
+        st.session_state.pop(f"{trip_id}:{name}", None)
+    for key in ('flights', 'cost_data', 'daily_costs'):
+        st.session_state.data_versions[key] += 1
+    st.session_state.history_moved = True
+
+
+def render_history():
+    history = st.session_state.history
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("↩️ Undo", disabled=not history.can_undo, on_click=move_history, args=(history.undo,),
+                  use_container_width=True)
+    with col2:
+        st.button("↪️ Redo", disabled=not history.can_redo, on_click=move_history, args=(history.redo,),
+                  use_container_width=True)
+    if not len(history):
+        st.caption("No edits yet this session.")
+        return
+    last = f" • last: {history.edits[history.version - 1].describe()}" if history.version else ""
+    st.caption(f"Version {history.version} of {len(history)}{last}")
+
+    version = st.number_input("Version", min_value=0, max_value=len(history), value=history.version)
+    st.button("Go to version", on_click=move_history, args=(history.goto, version),
+              disabled=version == history.version)
+
+    if st.toggle("Compare versions"):
+        col1, col2 = st.columns(2)
+        with col1:
+            first = st.number_input("From", min_value=0, max_value=len(history), value=0)
+        with col2:
+            second = st.number_input("To", min_value=0, max_value=len(history), value=history.version)
+        changes = history.diff(first, second)
+        if changes:
+            pd = lazy_import('pandas')
+            st.dataframe(pd.DataFrame(changes), use_container_width=True, hide_index=True)
+        else:
+            st.info("No differences")
+
+
 # Sidebar with clean summary
-with st.sidebar:
+@st.fragment
+@profiled("Sidebar")
+def render_sidebar():
     st.markdown("## 🎄 Trip Overview")
     
-    # Try to display group photo in sidebar
-    try:
-        image = Image.open("1.jpg")
-        st.image(image, caption="Epic Travel Group!", use_container_width=True)
-    except:
+    # Display the pre-sized group photo in sidebar
+    if photo_assets:
+        thumbnail = photo_assets['thumbnail']
+        st.markdown(f'''
+<figure style="margin: 0; text-align: center;">
+    <picture>
+        <source srcset="{thumbnail['WEBP']}" type="image/webp">
+        <img src="{thumbnail['JPEG']}" alt="Epic Travel Group!" style="width: 100%; border-radius: 10px;">
+    </picture>
+    <figcaption style="font-size: 0.8rem; opacity: 0.7;">Epic Travel Group!</figcaption>
+</figure>
+''', unsafe_allow_html=True)
+    else:
         st.info("📸 Upload 1.jpg to see group photo")
     
+    # Saved trips on this server; switching reopens the app on the chosen one
+    trip = st.session_state.trip
+    trip_names = dict(store.list_trips())
+    selected_trip = st.selectbox("🧳 Trip", list(trip_names), index=list(trip_names).index(trip.id),
+                                 format_func=trip_names.get)
+    if selected_trip != trip.id:
+        open_trip(selected_trip)
+        st.rerun(scope="app")
+
+    with st.expander("➕ Save as New Trip"):
+        new_trip_name = st.text_input("Trip Name", value=f"{trip.name} (copy)")
+        if st.button("Save Copy"):
+            new_trip = store.create_trip(
+                new_trip_name, trip.start_date, trip.end_date, st.session_state.party,
+                dict(st.session_state.cost_data), st.session_state.ledger.to_daily_costs(),
+                store.load_locations(trip.id),
+            )
+            open_trip(new_trip)
+            st.rerun(scope="app")
+
+    # Display currency for every amount in the app
+    currency = st.selectbox("💱 Display Currency", rates.codes, index=rates.codes.index(BASE_CURRENCY))
+    if currency != st.session_state.display_currency:
+        st.session_state.display_currency = currency
+        mark_changed('sidebar', 'currency')
+
+    # Party composition drives every group total in the app
+    party = st.session_state.party
+    with st.expander("👥 Travelling Party"):
+        counts = {
+            'adults': st.number_input("Adults", value=trip.party.adults, min_value=0, max_value=60, step=1, key=f"{trip.id}:adults"),
+            'children': st.number_input("Children", value=trip.party.children, min_value=0, max_value=60, step=1, key=f"{trip.id}:children"),
+            'seniors': st.number_input("Seniors", value=trip.party.seniors, min_value=0, max_value=60, step=1, key=f"{trip.id}:seniors"),
+            'rooms': st.number_input("Rooms", value=trip.party.rooms, min_value=0, max_value=60, step=1, key=f"{trip.id}:rooms"),
+        }
+    if counts != {name: getattr(party, name) for name in counts}:
+        save_party(Party(**counts))
+        mark_changed('sidebar', 'party')
+
     # Clean metrics
-    st.metric("Duration", "8 days")
-    st.metric("Cities Visited", "7")
-    st.metric("Group Size", "4 people")
-    st.metric("Flight Cost", f"£{st.session_state.cost_data['Flights']}")
+    st.metric("Duration", f"{len(st.session_state.ledger.days)} days")
+    st.metric("Cities Visited", len(store.load_locations(trip.id)))
+    st.metric("Group Size", f"{party.size} people")
+    st.metric("Flight Cost", money(from_gbp(st.session_state.cost_data['Flights'])))
     
-    # Calculate total daily costs (excluding flights)
-    total_daily_costs = 0
-    for day_activities in st.session_state.daily_costs.values():
-        daily_total = sum(activity['Total_4'] for activity in day_activities if 'Flight' not in activity['Activity'])
-        total_daily_costs += daily_total
+    # Daily costs exclude flights; the grand total adds them back
+    totals = trip_totals(st.session_state.cost_data, st.session_state.ledger, party, rates,
+                         st.session_state.display_currency)
     
-    st.metric("Daily Costs Total", f"£{total_daily_costs:.0f}")
-    st.metric("Grand Total", f"£{total_daily_costs + (st.session_state.cost_data['Flights'] * 4):.0f}")
+    st.metric("Daily Costs Total", money(totals['daily']))
+    st.metric("Grand Total", money(totals['grand']))
+
+    # Memory held by this session's state
+    if st.checkbox("🧠 Show session memory"):
+        session_values = [st.session_state[key] for key in st.session_state]
+        st.metric("This Session", format_bytes(deep_sizeof(session_values)))
+        budget_edits = len(st.session_state.cost_data.maps[0])
+        ledger = st.session_state.ledger
+        st.caption(f"Budget: {budget_edits} edited field(s) • Daily costs: {ledger.loaded_days()}/{len(ledger.days)} days loaded")
+
+    # Libraries loaded on first use by a tab, and what the eager imports cost a cold start
+    if st.checkbox("⏱️ Show load times"):
+        st.markdown("\n".join(
+            f"- `{module}`: {seconds:.2f} s" for module, seconds in sorted(IMPORT_TIMES.items())
+        ) or "No deferred libraries loaded yet.")
+        if st.button("Profile startup imports"):
+            profile = cached_startup_profile()
+            st.caption(f"Fresh interpreter: {sum(seconds for _, seconds in profile):.2f} s for the app's imports")
+            st.markdown("\n".join(f"- `{package}`: {seconds * 1000:.0f} ms" for package, seconds in profile[:8]))
     
     st.markdown("---")
     st.markdown("## 🎯 Quick Actions")
-    
-    if st.button("📧 Email Summary"):
-        st.info("📧 Email feature coming soon!")
-    
-    if st.button("📱 Export to PDF"):
-        st.info("📄 PDF export in development!")
-    
-    if st.button("🔄 Reset All"):
-        if st.checkbox("Confirm reset"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.success("✅ All data reset!")
-            st.rerun()
+
+    # Every budget and line item edit of this session, undoable one at a time or all at once
+    with st.expander("🕘 Edit History"):
+        render_history()
+    if st.session_state.pop('history_moved', False):
+        st.rerun(scope="app")
+    
+    # Queued here and sent by the mailer's own workers, so even a big group returns at once
+    with st.expander("📧 Email Summary"):
+        recipients = st.text_area("Recipients", placeholder="Asha <asha@example.com>\nRavi <ravi@example.com>",
+                                  help="One per line or comma-separated; each gets their own summary")
+        if st.button("Send summaries"):
+            addresses = parse_recipients(recipients)
+            if addresses:
+                st.session_state.mail_batch = mailer().send_summary(current_summary_context(), addresses)
+            else:
+                st.warning("Add at least one email address")
+        if 'mail_batch' in st.session_state:
+            render_mail_status()
+    
+    # Rendered in a worker process and kept on disk by a hash of the trip's content
+    with st.expander("📱 Export Trip Pack"):
+        formats = ['html', 'pdf'] if pdf_available() else ['html']
+        fmt = st.radio("Format", formats, format_func=str.upper, horizontal=True)
+        if not pdf_available():
+            st.caption("Print the HTML pack to PDF from your browser, or install weasyprint for PDF files.")
+        if st.button("Build trip pack"):
+            st.session_state.pack = (pack_exporter().submit(current_pack_content(), fmt), fmt)
+        if 'pack' in st.session_state:
+            render_pack_status()
+    
+    # Back to the trip as it was opened; the edits stay in the history, so redo brings them back
+    confirm_reset = st.checkbox("Confirm reset")
+    st.button("🔄 Reset All", disabled=not confirm_reset, on_click=move_history,
+              args=(st.session_state.history.goto, 0))
     
     st.markdown("---")
     st.success("✅ Fully editable travel planner")
     st.info("🎄 Epic adventure awaits!")
 
+@st.cache_resource(show_spinner=False)
+def pack_exporter():
+    """Trip pack workers and their file cache, shared by every session on this server."""
+    return PackExporter(os.environ.get('TRIP_PACK_DIR', os.path.join(APP_DIR, 'data', 'packs')))
+
+
+def current_pack_content():
+    return pack_content(st.session_state.trip, st.session_state.party, st.session_state.cost_data,
+                        st.session_state.ledger.to_daily_costs(), st.session_state.display_currency, rates.version,
+                        DEFAULT_ITINERARY, LOCATIONS, ROUTES, attraction_catalog().place_info(PLACES))
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@st.fragment(run_every=1)
+def pack_progress():
+    """Poll a pack being built; once it's done, rerun so the sidebar shows the result and stops polling."""
+    key, fmt = st.session_state.pack
+    if pack_exporter().status(key, fmt)[0] == 'building':
+        st.caption("⏳ Building trip pack...")
+    else:
+        st.rerun()
+
+
+def render_pack_status():
+    key, fmt = st.session_state.pack
+    state, detail = pack_exporter().status(key, fmt)
+    if state == 'building':
+        pack_progress()
+    elif state == 'ready':
+        # Read only when clicked, so reruns don't resend the file
+        st.download_button("⬇️ Download trip pack", functools.partial(read_file, detail),
+                           file_name=f"trip-pack-{key[:8]}.{fmt}",
+                           mime='application/pdf' if fmt == 'pdf' else 'text/html')
+    elif state == 'failed':
+        st.error(f"Couldn't build the trip pack: {detail}")
+
+
+@st.cache_resource(show_spinner=False)
+def mailer():
+    """The email queue and its workers, shared by every session on this server."""
+    return Mailer()
+
+
+def current_summary_context():
+    return summary_context(st.session_state.trip, st.session_state.party, st.session_state.cost_data,
+                           st.session_state.ledger.to_daily_costs(), st.session_state.display_currency,
+                           rates.version)
+
+
+# Streamlit only sends a session updates from that session's own script runs, so the
+# mailer's thread can't push progress; this fragment polls instead, and only while a
+# batch is in flight (each poll reruns just the progress bar)
+@st.fragment(run_every=1)
+def mail_progress():
+    """Refresh a batch's progress; once it's done, rerun so the sidebar shows the outcome and stops polling."""
+    batch = mailer().batch(st.session_state.mail_batch)
+    if batch is None or batch.done:
+        st.rerun()
+    counts = batch.counts()
+    st.progress((counts['sent'] + counts['failed']) / len(batch.jobs),
+                f"📤 {counts['sent']} of {len(batch.jobs)} sent"
+                + (f" • {counts['retrying']} retrying" if counts['retrying'] else ""))
+
+
+def render_mail_status():
+    batch = mailer().batch(st.session_state.mail_batch)
+    if batch is None:
+        return
+    if not batch.done:
+        mail_progress()
+        return
+    counts = batch.counts()
+    if counts['sent']:
+        st.success(f"✅ Sent {counts['sent']} of {len(batch.jobs)} summaries")
+    if counts['failed']:
+        st.error(f"{counts['failed']} couldn't be sent:\n\n" + "\n\n".join(batch.errors()[:5]))
+
+
 # Clean footer
-st.markdown('<div class="content-card">', unsafe_allow_html=True)
+@st.fragment
+@profiled("Footer")
+def render_footer():
+    st.markdown('<div class="content-card">', unsafe_allow_html=True)
 
-# Calculate final totals properly
-flight_total = st.session_state.cost_data['Flights'] * 4
-daily_total = sum(
-    sum(activity['Total_4'] for activity in day_activities if 'Flight' not in activity['Activity'])
-    for day_activities in st.session_state.daily_costs.values()
-)
-grand_total = flight_total + daily_total
-inr_grand_total = grand_total * 105
-
-footer_content = f"""
-# 🎄 Epic UK Christmas Adventure Complete! 🎄
-
-## 🎉 Finally Shine is Leaving the District, State and Country - What an Achievement!
-
-### 📋 Complete Trip Summary:
-- **📅 Duration:** 8 amazing days (Dec 25, 2024 - Jan 1, 2025)
-- **👥 Group:** 4 adventurers (Couple + 2 individuals)
-- **✈️ Route:** Trivandrum → London → Scottish Highlands → Edinburgh → Bangalore
-- **🎯 Highlights:** Christmas in London, Yorkshire coast, Highland railway, Edinburgh Hogmanay
-
-### 💰 Final Cost Breakdown:
-- **✈️ Flights:** £{flight_total:,.0f} (£600 × 4 people)
-- **🏨 Daily Expenses:** £{daily_total:.0f} (all accommodation, transport, attractions)
-- **💵 Grand Total:** £{grand_total:.0f} for entire group
-- **💱 INR Total:** ₹{inr_grand_total:,.0f} (@ ₹105 per £1)
-
-### 🎉 Epic Experiences Included:
-- **🎄 Christmas Day** arrival in London with Tower Bridge & London Eye
-- **🎁 Boxing Day** at Hyde Park Winter Wonderland with Christmas lights
-- **🏰 Durham Cathedral** - UNESCO World Heritage medieval masterpiece
-- **⚓ Whitby Abbey** - Dramatic coastal ruins with Dracula connections
-- **🚂 West Highland Line** - One of world's most beautiful train journeys
-- **🏔️ Scottish Highlands** - Glenfinnan Viaduct (Harry Potter bridge)
-- **🎆 Edinburgh Hogmanay** - World's most famous New Year celebration
-
-### 📞 Emergency & Support:
-- **🚨 UK Emergency:** 999 or 112
-- **🇮🇳 Indian High Commission London:** +44 20 7836 8484
-- **📱 Host Contact:** Available throughout trip
-
----
-**Generated:** {datetime.now().strftime("%B %d, %Y at %I:%M %p")}  
-**⚡ Fully customizable travel planner - edit anything you need!**  
-**🎄 Wishing you the most epic Christmas adventure ever! 🎄**
-"""
-
-st.markdown(footer_content)
-st.markdown('</div>', unsafe_allow_html=True)
+    # Calculate final totals properly
+    party = st.session_state.party
+    flight_price = st.session_state.cost_data['Flights']
+    totals = trip_totals(st.session_state.cost_data, st.session_state.ledger, party, rates)
+    flight_total, daily_total, grand_total = totals['flights'], totals['daily'], totals['grand']
+    home_grand_total = from_gbp(grand_total, home_currency())
+
+    footer_content = textwrap.dedent(f"""
+    # 🎄 Epic UK Christmas Adventure Complete! 🎄
+
+    ## 🎉 Finally Shine is Leaving the District, State and Country - What an Achievement!
+
+    ### 📋 Complete Trip Summary:
+    - **📅 Duration:** {len(st.session_state.ledger.days)} amazing days ({st.session_state.trip.date_range()})
+    - **👥 Group:** {party.size} adventurers ({party.composition()})
+    - **✈️ Route:** Trivandrum → London → Scottish Highlands → Edinburgh → Bangalore
+    - **🎯 Highlights:** Christmas in London, Yorkshire coast, Highland railway, Edinburgh Hogmanay
+
+    ### 💰 Final Cost Breakdown:
+    - **✈️ Flights:** {money(from_gbp(flight_total))} ({money(from_gbp(flight_price))} × {party.size} people)
+    - **🏨 Daily Expenses:** {money(from_gbp(daily_total))} (all accommodation, transport, attractions)
+    - **💵 Grand Total:** {money(from_gbp(grand_total))} for entire group
+    - **💱 {home_currency()} Total:** {money(home_grand_total, currency=home_currency())} (@ {money(rates.rate(BASE_CURRENCY, home_currency()), 2, home_currency())} per £1)
+
+    ### 🎉 Epic Experiences Included:
+    - **🎄 Christmas Day** arrival in London with Tower Bridge & London Eye
+    - **🎁 Boxing Day** at Hyde Park Winter Wonderland with Christmas lights
+    - **🏰 Durham Cathedral** - UNESCO World Heritage medieval masterpiece
+    - **⚓ Whitby Abbey** - Dramatic coastal ruins with Dracula connections
+    - **🚂 West Highland Line** - One of world's most beautiful train journeys
+    - **🏔️ Scottish Highlands** - Glenfinnan Viaduct (Harry Potter bridge)
+    - **🎆 Edinburgh Hogmanay** - World's most famous New Year celebration
+
+    ### 📞 Emergency & Support:
+    - **🚨 UK Emergency:** 999 or 112
+    - **🇮🇳 Indian High Commission London:** +44 20 7836 8484
+    - **📱 Host Contact:** Available throughout trip
+
+    ---
+    **Generated:** {datetime.now().strftime("%B %d, %Y at %I:%M %p")}  
+    **⚡ Fully customizable travel planner - edit anything you need!**  
+    **🎄 Wishing you the most epic Christmas adventure ever! 🎄**
+    """)
+
+    st.markdown(footer_content)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Main content tabs; only the selected tab's section runs on each rerun
+tabs = st.tabs([
+    "📅 Day-by-Day Itinerary", 
+    "✈️ Flight Details", 
+    "💰 Cost Calculator", 
+    "📊 Editable Price Tables",
+    "🖼️ Place Images",
+    "🗺️ Interactive Map"
+], key="active_tab", on_change="rerun")
+
+tab_sections = [
+    render_itinerary,
+    render_flights,
+    render_cost_calculator,
+    render_price_tables,
+    render_place_images,
+    render_route_map,
+]
+for tab, render_section in zip(tabs, tab_sections):
+    with tab:
+        if tab.open:
+            render_section()
+
+with st.sidebar:
+    render_sidebar()
+
+render_footer()
 
+# Profile of this run so far (everything above) and the runs before it
+if profiling:
+    profiler = st.session_state.profiler
+    with st.expander("⏱️ Performance Profile"):
+        pd = lazy_import('pandas')
+        spans = pd.DataFrame([
+            {'Run': run['run'], 'Kind': run['kind'], **span}
+            for run in profiler.runs for span in run['spans']
+        ])
+        if spans.empty:
+            st.info("No spans recorded yet.")
+        else:
+            latest = spans[spans['Run'] == spans['Run'].max()]
+            st.caption(f"Run {profiler.runs[-1]['run']}: {latest['wall_ms'].sum():.0f} ms, "
+                       f"{latest['messages'].sum()} messages over {len(latest)} section(s)")
+            st.dataframe(latest.drop(columns=['Run', 'Kind']), use_container_width=True, hide_index=True)
+            st.markdown("**Wall time per run (ms)**")
+            st.dataframe(spans.pivot_table(index='Run', columns='name', values='wall_ms', aggfunc='sum'),
+                         use_container_width=True)
+        st.download_button("⬇️ Export JSON lines", profiler.to_jsonl(), file_name="trip_profile.jsonl",
+                           mime="application/x-ndjson")